@@ -9,7 +9,10 @@ from ..execution import simulate_execute
 from ..protocols.signing import verify_signature
 from ..llm_router.profiles import PROFILES
 from ..llm_router import llama_http_client
+from ..llm_router.health import health_monitor
+from ..llm_router.routing import dispatcher, resolve_route
 from ..memory.node_memory import fetch_last_n, fetch_by_key
+from ..memory.write_behind import artefact_writer
 from ..observability.metrics import metrics
 from ..protocols.reporting import build_execution_report, persist_report
 from ..protocols.schemas import ActionPacket
@@ -76,23 +79,32 @@ def llm_health():
         response["reason"] = "missing base URL (set LLM_BASE_URL or LOCAL_LLM_SERVER_URL/LLM_HOST/LLM_PORT)"
         return response
 
-    available, reason = llama_http_client.get_server_health(base_url)
-    response["ok"] = available
-    if not available:
-        response["reason"] = reason or f"unreachable at {base_url}"
+    circuit = health_monitor.breaker(base_url).snapshot()
+    if circuit["checked_at"] is None:
+        # Nothing has reached this backend yet: probe once rather than report it healthy unseen.
+        health_monitor.probe(base_url)
+        circuit = health_monitor.breaker(base_url).snapshot()
+    # Healthy only if the latest check succeeded, even while failures are below the threshold.
+    response["ok"] = circuit["state"] == "closed" and circuit["failures"] == 0
+    response["circuit"] = circuit
+    if not response["ok"]:
+        response["reason"] = circuit["last_error"] or f"unreachable at {base_url}"
+    try:
+        routes = [resolve_route(profile, settings) for profile in PROFILES]
+    except ValueError as exc:
+        response["routes_error"] = str(exc)
+    else:
+        response["routes"] = dispatcher.snapshot(routes)
 
     return response
 
 
 @router.get("/status")
 def status():
-    settings = get_settings()
-    last_run_path = Path(settings.data_dir) / "state" / "last_run.txt"
-    last_run_id = last_run_path.read_text().strip() if last_run_path.exists() else None
     return {
-        "mode": settings.llm_mode,
+        "mode": get_settings().llm_mode,
         "profiles": list(PROFILES.keys()),
-        "last_run_id": last_run_id,
+        "last_run_id": _get_last_run_id(),
     }
 
 
@@ -117,7 +129,18 @@ def run_pipeline(payload: dict | None = None):
     if payload and ("query" in payload or "top_k" in payload):
         query = payload.get("query", "") if payload else ""
         top_k = payload.get("top_k", 5) if payload else 5
-        return run_rag_pipeline(query, top_k=top_k)
+        try:
+            return run_rag_pipeline(
+                query,
+                top_k=top_k,
+                retrieval_mode=payload.get("retrieval_mode"),
+                since=payload.get("since"),
+                until=payload.get("until"),
+                max_age_s=payload.get("max_age_s"),
+                recency_half_life_s=payload.get("recency_half_life_s"),
+            )
+        except ValueError as exc:  # noqa: BLE001
+            raise HTTPException(status_code=400, detail=str(exc))
 
     headlines = None
     headlines_path = None
@@ -125,17 +148,26 @@ def run_pipeline(payload: dict | None = None):
         headlines = payload["headlines"]
     if payload and "headlines_path" in payload:
         headlines_path = payload["headlines_path"]
+    deadline_s = payload.get("deadline_s") if payload else None
     try:
-        result = orch.run_pipeline(headlines, headlines_path=headlines_path)
+        result = orch.run_pipeline(headlines, headlines_path=headlines_path, deadline_s=deadline_s)
     except ValueError as exc:  # noqa: BLE001
         raise HTTPException(status_code=400, detail=str(exc))
     return result
 
 
+@router.post("/pipeline/run/batch")
+def run_pipeline_batch(payload: dict | None = None):
+    payload = payload or {}
+    try:
+        return orch.run_batch(payload.get("headline_sets"), deadline_s=payload.get("deadline_s"))
+    except ValueError as exc:  # noqa: BLE001
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
 @router.get("/pipeline/last")
 def get_pipeline_last():
-    state_dir = Path(get_settings().data_dir) / "state"
-    last_path = state_dir / "pipeline_last.json"
+    last_path = _state_dir() / "pipeline_last.json"
     if not last_path.exists():
         raise HTTPException(status_code=404, detail="no pipeline runs yet")
     with last_path.open("r", encoding="utf-8") as f:
@@ -209,7 +241,15 @@ def get_memory_by_key(node_id: str, key: str, n: int = 10):
     return fetch_by_key(node_id, key, n)
 
 
+def _state_dir() -> Path:
+    """Data state directory, after any queued artefact writes have reached it."""
+    artefact_writer.flush()
+    return Path(get_settings().data_dir) / "state"
+
+
 def _load_json(path: Path):
+    """Read a state file, after any queued artefact writes have reached disk; None if unreadable."""
+    artefact_writer.flush()
     if not path.exists():
         return None
     try:
@@ -220,13 +260,12 @@ def _load_json(path: Path):
 
 
 def _get_last_run_id() -> str | None:
-    settings = get_settings()
-    last_run_path = Path(settings.data_dir) / "state" / "last_run.txt"
+    last_run_path = _state_dir() / "last_run.txt"
     return last_run_path.read_text().strip() if last_run_path.exists() else None
 
 
 def _load_run(run_id: str) -> dict:
-    run_path = Path(get_settings().data_dir) / "state" / "runs" / f"{run_id}.json"
+    run_path = _state_dir() / "runs" / f"{run_id}.json"
     if not run_path.exists():
         raise HTTPException(status_code=404, detail="run not found")
     with run_path.open("r", encoding="utf-8") as f:
@@ -234,7 +273,7 @@ def _load_run(run_id: str) -> dict:
 
 
 def _load_or_build_report(run_id: str) -> dict:
-    report_path = Path(get_settings().data_dir) / "state" / "reports" / f"{run_id}.json"
+    report_path = _state_dir() / "reports" / f"{run_id}.json"
     if report_path.exists():
         with report_path.open("r", encoding="utf-8") as f:
             return json.load(f)
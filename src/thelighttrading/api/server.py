@@ -1,10 +1,15 @@
 import logging.config
+from contextlib import asynccontextmanager
 import yaml
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from .routes import router
 from ..config.settings import get_settings
+from ..llm_router.async_http import close_async_clients
+from ..llm_router.health import health_monitor
+from ..llm_router.http_pool import close_sessions
+from ..memory.write_behind import artefact_writer
 
 logging_config_path = Path(__file__).resolve().parents[2] / "config" / "logging.yaml"
 if logging_config_path.exists():
@@ -12,7 +17,17 @@ if logging_config_path.exists():
         config = yaml.safe_load(f)
         logging.config.dictConfig(config)
 
-app = FastAPI(title="TheLightTrading API")
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    yield
+    artefact_writer.stop()
+    health_monitor.stop()
+    close_async_clients()
+    close_sessions()
+
+
+app = FastAPI(title="TheLightTrading API", lifespan=lifespan)
 app.include_router(router)
 
 settings = get_settings()
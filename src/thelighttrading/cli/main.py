@@ -1,10 +1,14 @@
 import json
 from pathlib import Path
+import numpy as np
 import uvicorn
 import typer
 from nacl import signing
 from nacl.encoding import Base64Encoder
 from ..api.server import app as api_app
+from ..pipeline.ann import benchmark_recall
+from ..pipeline.embedding_store import EmbeddingStore
+from ..pipeline.retrieval import benchmark_quantization, dequantize_rows
 from ..pipeline.runner import run_pipeline as run_rag_pipeline
 from ..execution import simulate_execute
 from ..config.settings import get_settings
@@ -24,8 +28,55 @@ def run_api():
 
 
 @app.command("run-pipeline")
-def run_pipeline(query: str = typer.Option("Mock query", "--query"), top_k: int = typer.Option(5, "--top-k")):
-    result = run_rag_pipeline(query, top_k=top_k)
+def run_pipeline(
+    query: str = typer.Option("Mock query", "--query"),
+    top_k: int = typer.Option(5, "--top-k"),
+    retrieval_mode: str | None = typer.Option(None, "--retrieval-mode", help="vector, lexical or hybrid"),
+    since: str | None = typer.Option(None, "--since", help="ISO-8601 or epoch seconds"),
+    until: str | None = typer.Option(None, "--until", help="ISO-8601 or epoch seconds"),
+    max_age: float | None = typer.Option(None, "--max-age", help="Only consider news newer than this many seconds"),
+    recency_half_life: float | None = typer.Option(None, "--recency-half-life", help="Score half-life in seconds"),
+):
+    result = run_rag_pipeline(
+        query,
+        top_k=top_k,
+        retrieval_mode=retrieval_mode,
+        since=since,
+        until=until,
+        max_age_s=max_age,
+        recency_half_life_s=recency_half_life,
+    )
+    typer.echo(json.dumps(result, indent=2))
+
+
+@app.command("bench-retrieval")
+def bench_retrieval(
+    docs: int = typer.Option(20000, "--docs", min=1),
+    dims: int = typer.Option(64, "--dims", min=1),
+    queries: int = typer.Option(100, "--queries", min=1),
+    top_k: int = typer.Option(10, "--top-k", min=1),
+    nlist: int = typer.Option(0, "--nlist", min=0),
+    nprobe: int = typer.Option(8, "--nprobe", min=1),
+    use_index: bool = typer.Option(False, "--use-index", help="Benchmark the persisted embedding store instead of synthetic data"),
+    dtype: str | None = typer.Option(None, "--dtype", help="Also report recall and memory of float16 or int8 storage"),
+    seed: int = 0,
+):
+    rng = np.random.default_rng(seed)
+    if use_index:
+        settings = get_settings()
+        store = EmbeddingStore(Path(settings.data_dir) / "state" / "index", dtype=settings.retrieval_embedding_dtype)
+        matrix = dequantize_rows(store.matrix(), store.scales())
+        if not len(matrix):
+            typer.echo("Embedding index is empty")
+            raise typer.Exit(code=1)
+    else:
+        centers = rng.normal(size=(max(1, docs // 100), dims))
+        matrix = centers[rng.integers(0, len(centers), size=docs)] + 0.3 * rng.normal(size=(docs, dims))
+    picks = matrix[rng.integers(0, len(matrix), size=queries)]
+    query_matrix = picks + 0.1 * rng.normal(size=picks.shape)
+    result = benchmark_recall(matrix, query_matrix, top_k=top_k, nlist=nlist, nprobe=nprobe)
+    if dtype:
+        result["quantization"] = benchmark_quantization(matrix, query_matrix, top_k=top_k, dtype=dtype)
     typer.echo(json.dumps(result, indent=2))
 
 
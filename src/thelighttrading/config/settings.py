@@ -58,6 +58,25 @@ class Settings(BaseSettings):
     llm_chat_model_path: str | None = Field(default_factory=_default_chat_model_path, alias="LLM_CHAT_MODEL")
     llm_embed_model_path: str | None = Field(default_factory=_default_embed_model_path, alias="LLM_EMBED_MODEL")
     local_llm_server_url: str = "http://127.0.0.1:8081"
+    llm_http_pool_size: int = 8
+    llm_http_connect_timeout_s: float = 3.0
+    llm_embed_batch_size: int = 32
+    llm_embed_max_in_flight: int = 2
+    llm_embed_retries: int = 2
+    llm_routes: dict[str, dict] = Field(default_factory=dict)
+    llm_profile_max_concurrency: int = 0
+    llm_prompt_cache: bool = True
+    llm_server_slots: int = 0
+    llm_stream: bool = False
+    llm_output_constraint: str = "json_schema"
+    llm_cache_enabled: bool = False
+    llm_cache_max_entries: int = 1000
+    llm_cache_ttl_s: float = 86400.0
+    llm_single_flight: bool = True
+    llm_single_flight_timeout_s: float = 120.0
+    llm_circuit_failure_threshold: int = 2
+    llm_circuit_reset_s: float = 10.0
+    llm_health_refresh_s: float = 15.0
     local_chat_model_default: str | None = None
     local_chat_model_qwen: str | None = None
     local_chat_model_mistral: str | None = None
@@ -68,6 +87,29 @@ class Settings(BaseSettings):
     device_id: str = "aspire_brain_001"
     policy_text: str = "default_safety_policy_v1"
     replay_nonce_cache_size: int = 200
+    query_cache_size: int = 256
+    query_cache_ttl_s: float = 3600.0
+    query_cache_persist: bool = False
+    query_cache_persist_interval_s: float = 5.0
+    retrieval_mode: str = "vector"
+    retrieval_index: str = "exact"
+    retrieval_embedding_dtype: str = "float32"
+    retrieval_recency_half_life_s: float = 0.0
+    retrieval_ivf_nlist: int = 0
+    retrieval_ivf_nprobe: int = 8
+    rag_context_tokens: int = 4096
+    rag_max_tokens: int = 512
+    rag_snippet_max_tokens: int = 200
+    rag_tokenizer: str = "approx"
+    orchestrator_max_workers: int = 4
+    orchestrator_memoize: bool = True
+    orchestrator_memo_ttl_s: float = 0.0
+    orchestrator_memo_max_entries: int = 256
+    orchestrator_run_deadline_s: float = 0.0
+    orchestrator_batch_max_runs: int = 8
+    orchestrator_batch_profile_concurrency: int = 1
+    artefact_write_behind: bool = True
+    artefact_fsync: bool = True
 
     model_config = SettingsConfigDict(env_file_encoding="utf-8", case_sensitive=False)
 
@@ -0,0 +1,185 @@
+import asyncio
+import json
+import threading
+import weakref
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from ..config.settings import get_settings
+from ..observability.metrics import metrics
+from .http_pool import _count_lock
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, status_code: int, reason: str, body: str = ""):
+        super().__init__(f"HTTP {status_code} {reason}" + (f": {body[:300]}" if body else ""))
+        self.status_code = status_code
+
+
+@dataclass
+class AsyncResponse:
+    status_code: int
+    reason: str
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+    def json(self):
+        return json.loads(self.body.decode("utf-8"))
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise HTTPStatusError(self.status_code, self.reason, self.body.decode("utf-8", "replace").strip())
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: dict[str, str]) -> tuple[bytes, bool]:
+    """Read a response body; returns (body, connection reusable)."""
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks), True
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+    if "content-length" in headers:
+        return await reader.readexactly(int(headers["content-length"])), True
+    return await reader.read(), False
+
+
+class AsyncHTTPClient:
+    """Minimal HTTP/1.1 JSON client over asyncio streams with keep-alive connection reuse for one host."""
+
+    def __init__(self, base_url: str, pool_size: int = 8):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"unsupported scheme for {base_url}")
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = parts.scheme == "https"
+        self.prefix = parts.path.rstrip("/")
+        self.pool_size = pool_size
+        self._idle: list[_Connection] = []
+
+    async def _connect(self, timeout_s: float) -> _Connection:
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, ssl=self.ssl or None), timeout_s
+            )
+        except OSError as exc:
+            raise ConnectionError(f"cannot connect to {self.host}:{self.port}: {exc}") from exc
+        with _count_lock:
+            metrics.http_connections_opened += 1
+        return _Connection(reader, writer)
+
+    def _release(self, conn: _Connection, reusable: bool) -> None:
+        if reusable and len(self._idle) < self.pool_size and not conn.writer.is_closing():
+            self._idle.append(conn)
+        else:
+            conn.close()
+
+    async def _exchange(self, conn: _Connection, request: bytes) -> tuple[AsyncResponse, bool]:
+        conn.writer.write(request)
+        await conn.writer.drain()
+        status_line = await conn.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before response")
+        parts = status_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        status_code = int(parts[1])
+        reason = parts[2] if len(parts) > 2 else ""
+        headers: dict[str, str] = {}
+        while True:
+            line = await conn.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body, reusable = await _read_body(conn.reader, headers)
+        reusable = reusable and headers.get("connection", "").lower() != "close"
+        return AsyncResponse(status_code, reason, headers, body), reusable
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        payload: dict | None = None,
+        timeout_s: float = 60.0,
+    ) -> AsyncResponse:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        head = [
+            f"{method} {self.prefix}{path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Connection: keep-alive",
+            "Accept: application/json",
+            f"Content-Length: {len(body)}",
+        ]
+        if payload is not None:
+            head.append("Content-Type: application/json")
+        request = ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+        connect_timeout = min(get_settings().llm_http_connect_timeout_s, timeout_s)
+
+        with _count_lock:
+            metrics.http_requests_total += 1
+        while True:
+            reused = bool(self._idle)
+            conn = self._idle.pop() if reused else await self._connect(connect_timeout)
+            try:
+                async with asyncio.timeout(timeout_s):
+                    response, reusable = await self._exchange(conn, request)
+            except (ConnectionError, asyncio.IncompleteReadError) as exc:
+                conn.close()
+                if reused:
+                    # The server dropped an idle keep-alive connection; retry on a fresh one.
+                    continue
+                raise ConnectionError(str(exc)) from exc
+            except BaseException:
+                conn.close()
+                raise
+            self._release(conn, reusable)
+            return response
+
+    async def get(self, path: str, timeout_s: float = 60.0) -> AsyncResponse:
+        return await self.request("GET", path, timeout_s=timeout_s)
+
+    async def post(self, path: str, payload: dict, timeout_s: float = 60.0) -> AsyncResponse:
+        return await self.request("POST", path, payload=payload, timeout_s=timeout_s)
+
+    def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+# asyncio streams are bound to their event loop, so clients are kept per loop.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, AsyncHTTPClient]]" = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def get_async_client(base_url: str) -> AsyncHTTPClient:
+    loop = asyncio.get_running_loop()
+    key = base_url.rstrip("/")
+    with _clients_lock:
+        clients = _clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = AsyncHTTPClient(key, pool_size=get_settings().llm_http_pool_size)
+            clients[key] = client
+    return client
+
+
+def close_async_clients() -> None:
+    """Close pooled connections of the running loop's clients."""
+    with _clients_lock:
+        clients = _clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        client.close()
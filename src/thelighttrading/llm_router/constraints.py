@@ -0,0 +1,65 @@
+from functools import lru_cache
+from typing import Type
+
+from pydantic import BaseModel
+
+from ..protocols.schemas import NewsBrief, Signals, Strategy, WatchdogDecision
+
+PROFILE_SCHEMAS: dict[str, Type[BaseModel]] = {
+    "news_llama": NewsBrief,
+    "parser_qwen": Signals,
+    "brain_mistral": Strategy,
+    "watchdog_phi": WatchdogDecision,
+}
+
+CONSTRAINT_MODES = {"off", "json_schema", "response_format"}
+
+
+def _inline(node, defs: dict):
+    if isinstance(node, dict):
+        ref = node.get("$ref")
+        if ref is not None:
+            return _inline(defs[ref.rsplit("/", 1)[-1]], defs)
+        out = {}
+        for key, value in node.items():
+            if key in {"title", "$defs", "default"}:
+                continue
+            if key == "properties":
+                # Field names are data, not keywords: a field called "title" or "default" stays.
+                out[key] = {name: _inline(schema, defs) for name, schema in value.items()}
+            else:
+                out[key] = _inline(value, defs)
+        if out.get("type") == "object" and "properties" in out:
+            # Grammar-constrained decoding should always emit every field.
+            out["required"] = list(out["properties"])
+            out["additionalProperties"] = False
+        return out
+    if isinstance(node, list):
+        return [_inline(item, defs) for item in node]
+    return node
+
+
+@lru_cache(maxsize=None)
+def json_schema_for(model: Type[BaseModel]) -> dict:
+    """Self-contained JSON schema for ``model``: refs inlined, titles dropped, all fields required."""
+    schema = model.model_json_schema()
+    return _inline(schema, schema.get("$defs", {}))
+
+
+def output_constraint(model: Type[BaseModel] | None, mode: str) -> dict:
+    """Completion payload fields that constrain output to ``model``.
+
+    ``json_schema`` uses llama.cpp's native field; ``response_format`` the OpenAI-compatible one.
+    """
+    if model is None or mode == "off":
+        return {}
+    if mode not in CONSTRAINT_MODES:
+        raise ValueError(f"invalid_output_constraint: {mode}")
+    schema = json_schema_for(model)
+    if mode == "json_schema":
+        return {"json_schema": schema}
+    return {"response_format": {"type": "json_schema", "json_schema": {"name": model.__name__, "schema": schema}}}
+
+
+def profile_constraint(profile: str, mode: str) -> dict:
+    return output_constraint(PROFILE_SCHEMAS.get(profile), mode)
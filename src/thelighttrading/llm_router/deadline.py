@@ -0,0 +1,33 @@
+import time
+from dataclasses import dataclass
+
+
+class DeadlineExceeded(TimeoutError):
+    """The caller's time budget ran out before the LLM call finished."""
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """Absolute ``time.monotonic()`` deadline; ``at=None`` means no budget."""
+
+    at: float | None = None
+
+    @classmethod
+    def after(cls, timeout_s: float | None) -> "Deadline":
+        return cls(None if timeout_s is None else time.monotonic() + timeout_s)
+
+    def remaining(self) -> float | None:
+        return None if self.at is None else self.at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.at is not None and time.monotonic() >= self.at
+
+    def cap(self, default_s: float) -> float:
+        """``default_s`` capped by the remaining budget; raises ``DeadlineExceeded`` once it is spent."""
+        remaining = self.remaining()
+        if remaining is None:
+            return default_s
+        if remaining <= 0:
+            raise DeadlineExceeded("deadline_exceeded")
+        return min(default_s, remaining)
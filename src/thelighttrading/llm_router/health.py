@@ -0,0 +1,136 @@
+import threading
+import time
+
+from ..config.settings import get_settings
+from .llama_http_client import get_server_health
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Per-backend circuit: ``closed`` lets calls through, ``open`` fails fast, and after
+    ``reset_timeout_s`` a single ``half_open`` trial decides whether to close again."""
+
+    def __init__(self, failure_threshold: int = 2, reset_timeout_s: float = 10.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout_s = reset_timeout_s
+        self.state = CLOSED
+        self.failures = 0
+        self.last_error: str | None = None
+        self.opened_at: float | None = None
+        self.checked_at: float | None = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.time() - (self.opened_at or 0.0) >= self.reset_timeout_s:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.last_error = None
+            self.opened_at = None
+            self.checked_at = time.time()
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """End a call without a verdict (e.g. the caller's deadline ran out); a half-open
+        circuit admits the next trial instead of waiting for the background probe."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self, reason: str | None = None) -> None:
+        with self._lock:
+            self.failures += 1
+            self.last_error = reason
+            self.checked_at = time.time()
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = self.checked_at
+            self._trial_in_flight = False
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "last_error": self.last_error,
+                "opened_at": self.opened_at,
+                "checked_at": self.checked_at,
+            }
+
+
+class HealthMonitor:
+    """Circuit breakers keyed by base URL, refreshed by real call outcomes and a background probe."""
+
+    def __init__(self):
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def breaker(self, base_url: str) -> CircuitBreaker:
+        key = base_url.rstrip("/")
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                settings = get_settings()
+                breaker = CircuitBreaker(settings.llm_circuit_failure_threshold, settings.llm_circuit_reset_s)
+                self._breakers[key] = breaker
+        self.ensure_refresh()
+        return breaker
+
+    def probe(self, base_url: str) -> None:
+        ok, reason = get_server_health(base_url)
+        breaker = self.breaker(base_url)
+        if ok:
+            breaker.record_success()
+        else:
+            breaker.record_failure(reason)
+
+    def ensure_refresh(self) -> None:
+        interval = get_settings().llm_health_refresh_s
+        if interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._refresh_loop, args=(interval,), name="llm-health", daemon=True)
+            self._thread.start()
+
+    def _refresh_loop(self, interval: float) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                base_urls = list(self._breakers)
+            for base_url in base_urls:
+                try:
+                    self.probe(base_url)
+                except Exception:  # noqa: BLE001
+                    continue
+            self._stop.wait(interval)
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=2)
+
+    def reset(self) -> None:
+        self.stop()
+        with self._lock:
+            self._breakers.clear()
+
+
+health_monitor = HealthMonitor()
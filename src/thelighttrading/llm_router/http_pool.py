@@ -0,0 +1,103 @@
+import atexit
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from ..config.settings import get_settings
+from ..observability.metrics import metrics
+
+
+_count_lock = threading.Lock()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        with _count_lock:
+            metrics.http_connections_opened += 1
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        with _count_lock:
+            metrics.http_connections_opened += 1
+        return super()._new_conn()
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter that reports requests sent and TCP connections opened to ``metrics``."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        with _count_lock:
+            metrics.http_requests_total += 1
+        return super().send(request, **kwargs)
+
+
+class SessionPool:
+    """One keep-alive ``requests.Session`` per base URL, shared across threads."""
+
+    def __init__(self, pool_size: int = 8):
+        self.pool_size = pool_size
+        self._sessions: dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def session(self, base_url: str) -> requests.Session:
+        key = base_url.rstrip("/")
+        session = self._sessions.get(key)
+        if session is not None:
+            return session
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = _CountingAdapter(pool_connections=1, pool_maxsize=self.pool_size, pool_block=False)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[key] = session
+            return session
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+_pool: SessionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_session(base_url: str) -> requests.Session:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SessionPool(get_settings().llm_http_pool_size)
+    return _pool.session(base_url)
+
+
+def http_timeout(read_timeout_s: float) -> tuple[float, float]:
+    """(connect, read) timeout pair; the connect part never exceeds the read budget."""
+    connect = get_settings().llm_http_connect_timeout_s
+    return (min(connect, read_timeout_s), read_timeout_s)
+
+
+def close_sessions() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+atexit.register(close_sessions)
@@ -1,5 +1,9 @@
 import requests
 from ..config.settings import get_settings
+from .async_http import HTTPStatusError, get_async_client
+from .deadline import Deadline
+from .http_pool import get_session, http_timeout
+from .streaming import iter_sse_deltas
 
 
 def get_base_url(settings=None) -> str:
@@ -21,7 +25,7 @@ def get_server_health(base_url: str | None = None) -> tuple[bool, str | None]:
         base_url = get_base_url()
     url = f"{base_url.rstrip('/')}/v1/models"
     try:
-        resp = requests.get(url, timeout=1)
+        resp = get_session(base_url).get(url, timeout=http_timeout(1))
     except requests.RequestException as exc:
         return False, f"{type(exc).__name__}: {exc}"
     if resp.status_code >= 400:
@@ -33,27 +37,125 @@ def get_server_health(base_url: str | None = None) -> tuple[bool, str | None]:
     return True, None
 
 
-def post_completion(messages, temperature=0.2, max_tokens=512, base_url: str | None = None):
-    if base_url is None:
-        base_url = get_base_url()
-    url = f"{base_url.rstrip('/')}/v1/chat/completions"
+def _completion_payload(messages, temperature, max_tokens, model="auto", extra: dict | None = None) -> dict:
     payload = {
-        "model": "auto",
+        "model": model,
         "messages": messages,
         "temperature": temperature,
         "max_tokens": max_tokens,
     }
+    if extra:
+        payload.update(extra)
+    return payload
+
+
+def prompt_token_stats(data: dict) -> tuple[int, int] | None:
+    """(prompt tokens evaluated, prompt tokens served from the KV cache) from a llama.cpp response."""
+    timings = data.get("timings") or {}
+    evaluated = timings.get("prompt_n")
+    if evaluated is None:
+        return None
+    cached = timings.get("cache_n")
+    if cached is None:
+        details = (data.get("usage") or {}).get("prompt_tokens_details") or {}
+        cached = details.get("cached_tokens", 0)
+    return int(evaluated), int(cached or 0)
+
+
+def _report_timings(data: dict, on_timings) -> None:
+    if on_timings is None:
+        return
+    stats = prompt_token_stats(data)
+    if stats is not None:
+        on_timings(*stats)
+
+
+def post_completion(
+    messages,
+    temperature=0.2,
+    max_tokens=512,
+    base_url: str | None = None,
+    model: str = "auto",
+    extra: dict | None = None,
+    on_timings=None,
+    timeout_s: float | None = None,
+):
+    if base_url is None:
+        base_url = get_base_url()
+    url = f"{base_url.rstrip('/')}/v1/chat/completions"
+    payload = _completion_payload(messages, temperature, max_tokens, model, extra)
+    deadline = Deadline.after(timeout_s)
     last_exc = None
     for attempt in range(2):
         try:
-            resp = requests.post(url, json=payload, timeout=10)
+            resp = get_session(base_url).post(url, json=payload, timeout=http_timeout(deadline.cap(10)))
             resp.raise_for_status()
             data = resp.json()
+            _report_timings(data, on_timings)
             return data.get("choices", [{}])[0].get("message", {}).get("content", "")
         except requests.RequestException as exc:
             last_exc = exc
-            if attempt == 1:
+            if attempt == 1 or deadline.expired:
                 raise
     if last_exc:
         raise last_exc
     return ""
+
+
+def stream_completion(
+    messages,
+    temperature=0.2,
+    max_tokens=512,
+    base_url: str | None = None,
+    model: str = "auto",
+    extra: dict | None = None,
+    on_timings=None,
+    timeout_s: float | None = None,
+):
+    """Yield content deltas from a ``stream: true`` completion; closing the generator drops the connection."""
+    if base_url is None:
+        base_url = get_base_url()
+    url = f"{base_url.rstrip('/')}/v1/chat/completions"
+    payload = _completion_payload(messages, temperature, max_tokens, model, extra)
+    payload["stream"] = True
+    deadline = Deadline.after(timeout_s)
+    for attempt in range(2):
+        try:
+            resp = get_session(base_url).post(url, json=payload, timeout=http_timeout(deadline.cap(10)), stream=True)
+            resp.raise_for_status()
+            break
+        except requests.RequestException:
+            if attempt == 1 or deadline.expired:
+                raise
+    try:
+        yield from iter_sse_deltas(resp, on_event=lambda event: _report_timings(event, on_timings))
+    finally:
+        resp.close()
+
+
+async def apost_completion(
+    messages,
+    temperature=0.2,
+    max_tokens=512,
+    base_url: str | None = None,
+    model: str = "auto",
+    extra: dict | None = None,
+    on_timings=None,
+    timeout_s: float | None = None,
+):
+    if base_url is None:
+        base_url = get_base_url()
+    client = get_async_client(base_url)
+    payload = _completion_payload(messages, temperature, max_tokens, model, extra)
+    deadline = Deadline.after(timeout_s)
+    for attempt in range(2):
+        try:
+            resp = await client.post("/v1/chat/completions", payload, timeout_s=deadline.cap(10))
+            resp.raise_for_status()
+            data = resp.json()
+            _report_timings(data, on_timings)
+            return data.get("choices", [{}])[0].get("message", {}).get("content", "")
+        except (OSError, HTTPStatusError, ValueError):
+            if attempt == 1 or deadline.expired:
+                raise
+    return ""
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+DB_NAME = "llm_responses.db"
+
+
+def cache_key(
+    profile: str, model: str, messages: list[dict], temperature: float, max_tokens: int, stop_on_json: bool = False
+) -> str:
+    """``stop_on_json`` is part of the key: a streamed reply cut at the first JSON value differs from the full one."""
+    canonical = json.dumps(
+        [profile, model, messages, round(float(temperature), 6), int(max_tokens), bool(stop_on_json)],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed LLM response cache with a TTL and least-recently-used eviction."""
+
+    def __init__(self, path: Path, max_entries: int = 1000, ttl_s: float = 86400.0):
+        self.path = Path(path)
+        self.max_entries = max(1, max_entries)
+        self.ttl_s = ttl_s
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_response_cache (
+                key TEXT PRIMARY KEY,
+                profile TEXT,
+                response TEXT,
+                created_at REAL,
+                last_used REAL
+            )
+            """
+        )
+        return conn
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT response, created_at FROM llm_response_cache WHERE key=?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if now - row[1] >= self.ttl_s:
+                    conn.execute("DELETE FROM llm_response_cache WHERE key=?", (key,))
+                    return None
+                conn.execute("UPDATE llm_response_cache SET last_used=? WHERE key=?", (now, key))
+            return row[0]
+        finally:
+            conn.close()
+
+    def put(self, key: str, profile: str, response: str) -> None:
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_response_cache (key, profile, response, created_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, profile, response, now, now),
+                )
+                conn.execute("DELETE FROM llm_response_cache WHERE created_at <= ?", (now - self.ttl_s,))
+                conn.execute(
+                    "DELETE FROM llm_response_cache WHERE key IN ("
+                    "SELECT key FROM llm_response_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        finally:
+            conn.close()
+
+    def clear(self) -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM llm_response_cache")
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM llm_response_cache").fetchone()[0]
+        finally:
+            conn.close()
@@ -3,12 +3,22 @@ import logging
 import os
 import time
 from pathlib import Path
-from typing import List
+from typing import Iterator, List
+
+import requests
 
 from .profiles import PROFILES
 from .mock_llm import mock_generate
-from .llama_http_client import post_completion, is_server_available, get_base_url
+from .llama_http_client import apost_completion, post_completion, stream_completion
+from .constraints import profile_constraint
+from .deadline import Deadline, DeadlineExceeded
+from .health import health_monitor
+from .routing import Lease, dispatcher, resolve_route
+from .response_cache import DB_NAME as RESPONSE_CACHE_DB, ResponseCache, cache_key
+from .single_flight import SingleFlight
+from .streaming import collect_text, timed_deltas
 from ..config.settings import get_settings
+from ..observability.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -27,28 +37,367 @@ def audit_log(profile: str, mode: str, messages: List[dict], response: str) -> N
         f.write(json.dumps(record) + "\n")
 
 
-def generate(profile: str, messages: List[dict], temperature: float = 0.2, max_tokens: int = 256) -> str:
-    settings = get_settings()
-    mode = settings.llm_mode
+single_flight = SingleFlight()
+
+_UNREACHABLE_ERRORS = (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError)
+
+
+def _is_server_fault(exc: Exception) -> bool:
+    """5xx responses count against the backend's circuit; client errors and bad payloads do not."""
+    response = getattr(exc, "response", None)
+    status_code = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    return status_code is not None and status_code >= 500
+
+
+def _payload_extra(profile: str, lease: Lease) -> dict:
+    return {**lease.route.payload_hints(), **profile_constraint(profile, get_settings().llm_output_constraint)}
+
+
+def _timings_recorder(profile: str):
+    def record(evaluated: int, cached: int) -> None:
+        metrics.observe_prompt_tokens(profile, evaluated, cached)
+
+    return record
+
+
+def _check_profile(profile: str) -> None:
     if profile not in PROFILES:
         raise ValueError(f"Unknown profile {profile}")
 
-    if mode == "mock":
-        response = mock_generate(profile, messages, temperature, max_tokens)
-    elif mode == "local":
-        base_url = get_base_url(settings)
-        if not is_server_available(base_url):
-            response = f"LLM backend unreachable at {base_url}"
-            audit_log(profile, "local_unreachable", messages, response)
-            return response
-        try:
-            response = post_completion(messages, temperature=temperature, max_tokens=max_tokens, base_url=base_url)
-        except Exception as exc:  # noqa: BLE001
-            response = f"LLM backend error at {base_url}: {exc}"
-            audit_log(profile, "local_error", messages, response)
-            return response
+
+def _circuit_open_response(profile: str, messages: List[dict], lease: Lease) -> str | None:
+    if lease.base_url is not None:
+        return None
+    base_url = lease.route.backends[0]
+    response = f"LLM backend unreachable at {base_url} (circuit open: {health_monitor.breaker(base_url).last_error})"
+    audit_log(profile, "local_unreachable", messages, response)
+    return response
+
+
+def _failure_response(profile: str, messages: List[dict], base_url: str, breaker, exc: Exception) -> str:
+    if isinstance(exc, _UNREACHABLE_ERRORS):
+        breaker.record_failure(f"{type(exc).__name__}: {exc}")
+        response = f"LLM backend unreachable at {base_url}: {exc}"
+        audit_log(profile, "local_unreachable", messages, response)
+        return response
+    if _is_server_fault(exc):
+        breaker.record_failure(f"{type(exc).__name__}: {exc}")
+    else:
+        breaker.record_success()
+    response = f"LLM backend error at {base_url}: {exc}"
+    audit_log(profile, "local_error", messages, response)
+    return response
+
+
+def _request_key(settings, profile, messages, temperature, max_tokens, stop_on_json=False) -> str:
+    model = resolve_route(profile, settings).model if settings.llm_mode == "local" else "mock"
+    return cache_key(profile, model, messages, temperature, max_tokens, stop_on_json)
+
+
+def _response_cache(settings) -> ResponseCache | None:
+    if not settings.llm_cache_enabled:
+        return None
+    return ResponseCache(
+        Path(settings.data_dir) / "cache" / RESPONSE_CACHE_DB,
+        max_entries=settings.llm_cache_max_entries,
+        ttl_s=settings.llm_cache_ttl_s,
+    )
+
+
+def _coalesced(profile: str, messages: List[dict], outcome: tuple[str, bool], shared: bool) -> tuple[str, bool]:
+    if shared:
+        metrics.llm_calls_coalesced += 1
+        audit_log(profile, "coalesced", messages, outcome[0])
+    return outcome
+
+
+def _coalesce_timeout(profile: str, messages: List[dict], timeout_s: float) -> str:
+    response = f"LLM request timed out after {timeout_s}s waiting for an identical in-flight call"
+    audit_log(profile, "coalesced_timeout", messages, response)
+    return response
+
+
+def _deadline_exceeded(profile: str, messages: List[dict]) -> None:
+    audit_log(profile, "local_timeout", messages, "deadline_exceeded")
+
+
+def _check_deadline(deadline: Deadline, exc: Exception, breaker) -> None:
+    """Re-raise a failure caused by the caller's spent budget as ``DeadlineExceeded``.
+
+    The backend is not blamed, but a half-open trial is released so the circuit is not stuck.
+    """
+    if isinstance(exc, DeadlineExceeded):
+        breaker.release_trial()
+        raise exc
+    if deadline.expired and isinstance(exc, _UNREACHABLE_ERRORS):
+        breaker.release_trial()
+        raise DeadlineExceeded("deadline_exceeded") from exc
+
+
+def _cached_response(cache: ResponseCache | None, key: str, profile: str, messages: List[dict]) -> str | None:
+    if cache is None:
+        return None
+    try:
+        response = cache.get(key)
+    except Exception:  # noqa: BLE001
+        logger.exception("LLM response cache lookup failed")
+        response = None
+    if response is None:
+        metrics.llm_cache_misses += 1
+        return None
+    metrics.llm_cache_hits += 1
+    audit_log(profile, "cache", messages, response)
+    return response
+
+
+def _store_response(cache: ResponseCache | None, key: str, profile: str, response: str) -> None:
+    if cache is None:
+        return
+    try:
+        cache.put(key, profile, response)
+    except Exception:  # noqa: BLE001
+        logger.exception("LLM response cache write failed")
+
+
+def generate(
+    profile: str,
+    messages: List[dict],
+    temperature: float = 0.2,
+    max_tokens: int = 256,
+    stop_on_json: bool = False,
+    use_cache: bool = True,
+    timeout_s: float | None = None,
+) -> str:
+    """Run one completion. Identical concurrent calls share one backend request; with
+    ``LLM_CACHE_ENABLED`` successful responses are cached unless ``use_cache`` is False.
+
+    ``timeout_s`` is the caller's total budget: every wait and HTTP request is capped by what
+    is left of it, and ``DeadlineExceeded`` is raised once it is spent.
+    """
+    settings = get_settings()
+    _check_profile(profile)
+    key = _request_key(settings, profile, messages, temperature, max_tokens, stop_on_json)
+    cache = _response_cache(settings) if use_cache else None
+    cached = _cached_response(cache, key, profile, messages)
+    if cached is not None:
+        return cached
+    deadline = Deadline.after(timeout_s)
+
+    def call() -> tuple[str, bool]:
+        return _generate(settings, profile, messages, temperature, max_tokens, stop_on_json, deadline)
+
+    shared = False
+    try:
+        if settings.llm_single_flight:
+            while True:
+                wait_s = deadline.cap(settings.llm_single_flight_timeout_s)
+                try:
+                    outcome, shared = single_flight.do(key, call, timeout_s=wait_s)
+                    break
+                except DeadlineExceeded:
+                    # A shared call cut short by its leader's deadline: retry under our own budget.
+                    if deadline.expired:
+                        raise
+                except TimeoutError as exc:
+                    if deadline.at is None:
+                        return _coalesce_timeout(profile, messages, wait_s)
+                    raise DeadlineExceeded("deadline_exceeded") from exc
+            response, ok = _coalesced(profile, messages, outcome, shared)
+        else:
+            response, ok = call()
+    except DeadlineExceeded:
+        _deadline_exceeded(profile, messages)
+        raise
+    if ok and not shared:
+        _store_response(cache, key, profile, response)
+    return response
+
+
+def _generate(settings, profile, messages, temperature, max_tokens, stop_on_json, deadline: Deadline) -> tuple[str, bool]:
+    mode = settings.llm_mode
+    if mode == "local" and settings.llm_stream:
+        outcome = {"ok": False}
+        deltas = _stream(profile, messages, temperature, max_tokens, outcome, deadline)
+        response = collect_text(deltas, stop_on_json=stop_on_json)
+        return response, outcome["ok"]
+    if mode == "local":
+        with dispatcher.lease(resolve_route(profile, settings), deadline) as lease:
+            blocked = _circuit_open_response(profile, messages, lease)
+            if blocked is not None:
+                return blocked, False
+            breaker = health_monitor.breaker(lease.base_url)
+            try:
+                response = post_completion(
+                    messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    base_url=lease.base_url,
+                    model=lease.model,
+                    extra=_payload_extra(profile, lease),
+                    on_timings=_timings_recorder(profile),
+                    timeout_s=deadline.remaining(),
+                )
+            except Exception as exc:  # noqa: BLE001
+                _check_deadline(deadline, exc, breaker)
+                return _failure_response(profile, messages, lease.base_url, breaker, exc), False
+            breaker.record_success()
     else:
         response = mock_generate(profile, messages, temperature, max_tokens)
 
     audit_log(profile, mode, messages, response)
+    return response, True
+
+
+async def agenerate(
+    profile: str,
+    messages: List[dict],
+    temperature: float = 0.2,
+    max_tokens: int = 256,
+    use_cache: bool = True,
+    timeout_s: float | None = None,
+) -> str:
+    """Coroutine counterpart of ``generate`` over the asyncio HTTP client."""
+    settings = get_settings()
+    _check_profile(profile)
+    key = _request_key(settings, profile, messages, temperature, max_tokens)
+    cache = _response_cache(settings) if use_cache else None
+    cached = _cached_response(cache, key, profile, messages)
+    if cached is not None:
+        return cached
+    deadline = Deadline.after(timeout_s)
+
+    async def call() -> tuple[str, bool]:
+        return await _agenerate(settings, profile, messages, temperature, max_tokens, deadline)
+
+    shared = False
+    try:
+        if settings.llm_single_flight:
+            while True:
+                wait_s = deadline.cap(settings.llm_single_flight_timeout_s)
+                try:
+                    outcome, shared = await single_flight.ado(key, call, timeout_s=wait_s)
+                    break
+                except DeadlineExceeded:
+                    # A shared call cut short by its leader's deadline: retry under our own budget.
+                    if deadline.expired:
+                        raise
+                except TimeoutError as exc:
+                    if deadline.at is None:
+                        return _coalesce_timeout(profile, messages, wait_s)
+                    raise DeadlineExceeded("deadline_exceeded") from exc
+            response, ok = _coalesced(profile, messages, outcome, shared)
+        else:
+            response, ok = await call()
+    except DeadlineExceeded:
+        _deadline_exceeded(profile, messages)
+        raise
+    if ok and not shared:
+        _store_response(cache, key, profile, response)
     return response
+
+
+async def _agenerate(settings, profile, messages, temperature, max_tokens, deadline: Deadline) -> tuple[str, bool]:
+    mode = settings.llm_mode
+    if mode == "local":
+        async with dispatcher.alease(resolve_route(profile, settings), deadline) as lease:
+            blocked = _circuit_open_response(profile, messages, lease)
+            if blocked is not None:
+                return blocked, False
+            breaker = health_monitor.breaker(lease.base_url)
+            try:
+                response = await apost_completion(
+                    messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    base_url=lease.base_url,
+                    model=lease.model,
+                    extra=_payload_extra(profile, lease),
+                    on_timings=_timings_recorder(profile),
+                    timeout_s=deadline.remaining(),
+                )
+            except Exception as exc:  # noqa: BLE001
+                _check_deadline(deadline, exc, breaker)
+                return _failure_response(profile, messages, lease.base_url, breaker, exc), False
+            breaker.record_success()
+    else:
+        response = mock_generate(profile, messages, temperature, max_tokens)
+
+    audit_log(profile, mode, messages, response)
+    return response, True
+
+
+def stream_generate(
+    profile: str, messages: List[dict], temperature: float = 0.2, max_tokens: int = 256
+) -> Iterator[str]:
+    """Yield response deltas as they arrive; mock mode and backend failures yield a single chunk.
+
+    Closing the generator early (e.g. once a full JSON object arrived) stops the server-side generation.
+    """
+    _check_profile(profile)
+    yield from _stream(profile, messages, temperature, max_tokens, {})
+
+
+def _stream(profile, messages, temperature, max_tokens, outcome: dict, deadline: Deadline = Deadline()) -> Iterator[str]:
+    settings = get_settings()
+    mode = settings.llm_mode
+    if mode != "local":
+        response = mock_generate(profile, messages, temperature, max_tokens)
+        audit_log(profile, mode, messages, response)
+        outcome["ok"] = True
+        yield response
+        return
+
+    with dispatcher.lease(resolve_route(profile, settings), deadline) as lease:
+        blocked = _circuit_open_response(profile, messages, lease)
+        if blocked is not None:
+            yield blocked
+            return
+        yield from _stream_backend(profile, messages, temperature, max_tokens, lease, outcome, deadline)
+
+
+def _stream_backend(
+    profile, messages, temperature, max_tokens, lease: Lease, outcome: dict, deadline: Deadline
+) -> Iterator[str]:
+    base_url = lease.base_url
+    breaker = health_monitor.breaker(base_url)
+    deltas = timed_deltas(
+        stream_completion(
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            base_url=base_url,
+            model=lease.model,
+            extra=_payload_extra(profile, lease),
+            on_timings=_timings_recorder(profile),
+            timeout_s=deadline.remaining(),
+        ),
+        profile,
+    )
+    parts: list[str] = []
+    failed = False
+    try:
+        while True:
+            try:
+                delta = next(deltas)
+            except StopIteration:
+                break
+            except Exception as exc:  # noqa: BLE001
+                failed = True
+                _check_deadline(deadline, exc, breaker)
+                response = _failure_response(profile, messages, base_url, breaker, exc)
+                if not parts:
+                    yield response
+                return
+            if deadline.expired:
+                # Tokens are still trickling in, but the caller's budget is spent.
+                failed = True
+                breaker.release_trial()
+                raise DeadlineExceeded("deadline_exceeded")
+            parts.append(delta)
+            yield delta
+    finally:
+        deltas.close()
+        if not failed:
+            outcome["ok"] = True
+            breaker.record_success()
+            audit_log(profile, "local", messages, "".join(parts))
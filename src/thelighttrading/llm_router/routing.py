@@ -0,0 +1,184 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator
+
+from ..config.settings import Settings
+from .deadline import Deadline, DeadlineExceeded
+from .health import CLOSED, health_monitor
+from .llama_http_client import get_base_url
+from .profiles import PROFILES
+
+DEFAULT_MODEL = "auto"
+
+
+@dataclass(frozen=True)
+class Route:
+    profile: str
+    backends: tuple[str, ...]
+    model: str = DEFAULT_MODEL
+    max_concurrency: int = 0
+    slot: int | None = None
+    cache_prompt: bool = True
+
+    def payload_hints(self) -> dict:
+        """llama.cpp prefix-cache hints: reuse the KV cache and pin the profile to one server slot."""
+        hints = {"cache_prompt": self.cache_prompt}
+        if self.slot is not None:
+            hints["id_slot"] = self.slot
+        return hints
+
+
+@dataclass(frozen=True)
+class Lease:
+    """A dispatch decision; ``base_url`` is None when every backend's circuit is open."""
+
+    route: Route
+    base_url: str | None
+
+    @property
+    def model(self) -> str:
+        return self.route.model
+
+
+def default_slot(profile: str, settings: Settings) -> int | None:
+    """Stable slot per profile (profile order modulo ``LLM_SERVER_SLOTS``); None leaves slot choice to the server."""
+    if settings.llm_server_slots <= 0 or profile not in PROFILES:
+        return None
+    return list(PROFILES).index(profile) % settings.llm_server_slots
+
+
+def resolve_route(profile: str, settings: Settings) -> Route:
+    """Route for ``profile`` from ``LLM_ROUTES``; unlisted profiles use the default backend with ``model: auto``.
+
+    ``LLM_ROUTES`` is JSON: ``{"brain_mistral": {"backends": ["http://host:8082"], "model": "...",
+    "max_concurrency": 1, "slot": 0}}``.
+    """
+    entry = (settings.llm_routes or {}).get(profile)
+    if entry is None:
+        return Route(
+            profile,
+            (get_base_url(settings),),
+            DEFAULT_MODEL,
+            settings.llm_profile_max_concurrency,
+            slot=default_slot(profile, settings),
+            cache_prompt=settings.llm_prompt_cache,
+        )
+    if not isinstance(entry, dict):
+        raise ValueError(f"invalid_llm_route:{profile}")
+    backends = entry.get("backends") or ([entry["base_url"]] if entry.get("base_url") else [get_base_url(settings)])
+    if isinstance(backends, str) or not all(isinstance(url, str) and url for url in backends):
+        raise ValueError(f"invalid_llm_route:{profile}")
+    return Route(
+        profile=profile,
+        backends=tuple(url.rstrip("/") for url in backends),
+        model=str(entry.get("model") or DEFAULT_MODEL),
+        max_concurrency=int(entry.get("max_concurrency", settings.llm_profile_max_concurrency)),
+        slot=int(entry["slot"]) if entry.get("slot") is not None else default_slot(profile, settings),
+        cache_prompt=bool(entry.get("cache_prompt", settings.llm_prompt_cache)),
+    )
+
+
+class Dispatcher:
+    """Least-outstanding-requests dispatch over each profile's backends, skipping open circuits,
+    with a per-profile concurrency cap (0 = unlimited)."""
+
+    def __init__(self):
+        self._outstanding: dict[str, int] = {}
+        self._dispatched: dict[str, int] = {}
+        self._limits: dict[str, tuple[int, threading.BoundedSemaphore]] = {}
+        self._lock = threading.Lock()
+
+    def outstanding(self, base_url: str) -> int:
+        with self._lock:
+            return self._outstanding.get(base_url.rstrip("/"), 0)
+
+    def _semaphore(self, route: Route) -> threading.BoundedSemaphore | None:
+        if route.max_concurrency <= 0:
+            return None
+        with self._lock:
+            limit = self._limits.get(route.profile)
+            if limit is None or limit[0] != route.max_concurrency:
+                limit = (route.max_concurrency, threading.BoundedSemaphore(route.max_concurrency))
+                self._limits[route.profile] = limit
+            return limit[1]
+
+    def _pick(self, route: Route) -> str | None:
+        with self._lock:
+            healthy = [url for url in route.backends if health_monitor.breaker(url).state == CLOSED]
+            if healthy:
+                # Ties go to the backend that has served the fewest requests so far.
+                base_url = min(healthy, key=lambda url: (self._outstanding.get(url, 0), self._dispatched.get(url, 0)))
+            else:
+                base_url = next((url for url in route.backends if health_monitor.breaker(url).allow_request()), None)
+            if base_url is not None:
+                self._outstanding[base_url] = self._outstanding.get(base_url, 0) + 1
+                self._dispatched[base_url] = self._dispatched.get(base_url, 0) + 1
+            return base_url
+
+    def _done(self, base_url: str | None) -> None:
+        if base_url is None:
+            return
+        with self._lock:
+            self._outstanding[base_url] -= 1
+
+    @contextmanager
+    def lease(self, route: Route, deadline: Deadline | None = None) -> Iterator[Lease]:
+        """Hold a dispatch slot; waiting for the concurrency cap raises ``DeadlineExceeded`` past ``deadline``."""
+        semaphore = self._semaphore(route)
+        if semaphore is not None:
+            remaining = deadline.remaining() if deadline is not None else None
+            if not semaphore.acquire(timeout=None if remaining is None else max(remaining, 0)):
+                raise DeadlineExceeded("deadline_exceeded")
+        try:
+            base_url = self._pick(route)
+            try:
+                yield Lease(route, base_url)
+            finally:
+                self._done(base_url)
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+    @asynccontextmanager
+    async def alease(self, route: Route, deadline: Deadline | None = None) -> AsyncIterator[Lease]:
+        semaphore = self._semaphore(route)
+        if semaphore is not None:
+            # Poll instead of blocking the event loop; cancellation cannot leak a permit.
+            while not semaphore.acquire(blocking=False):
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExceeded("deadline_exceeded")
+                await asyncio.sleep(0.005)
+        try:
+            base_url = self._pick(route)
+            try:
+                yield Lease(route, base_url)
+            finally:
+                self._done(base_url)
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+    def snapshot(self, routes: list[Route]) -> dict:
+        with self._lock:
+            outstanding = dict(self._outstanding)
+        return {
+            route.profile: {
+                "model": route.model,
+                "max_concurrency": route.max_concurrency,
+                "slot": route.slot,
+                "backends": [
+                    {
+                        "base_url": url,
+                        "state": health_monitor.breaker(url).state,
+                        "outstanding": outstanding.get(url, 0),
+                    }
+                    for url in route.backends
+                ],
+            }
+            for route in routes
+        }
+
+
+dispatcher = Dispatcher()
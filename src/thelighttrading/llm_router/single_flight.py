@@ -0,0 +1,100 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable
+
+
+class _Call:
+    __slots__ = ("future", "waiters")
+
+    def __init__(self):
+        self.future: Future = Future()
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces identical in-flight calls: the first caller for a key runs it and later
+    callers, from threads or coroutines, wait for that result instead of repeating the work.
+
+    ``do``/``ado`` return ``(result, shared)``; waiters raise ``TimeoutError`` after ``timeout_s``.
+    Waiters see the leader's own ``Exception``; if the leader is cancelled or interrupted they
+    raise ``RuntimeError("single_flight_leader_cancelled")`` instead.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key: str) -> tuple[_Call, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def _leave(self, call: _Call) -> None:
+        with self._lock:
+            call.waiters -= 1
+
+    def _finish(self, key: str, call: _Call, result: Any = None, error: Exception | None = None) -> None:
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        if error is not None:
+            call.future.set_exception(error)
+        else:
+            call.future.set_result(result)
+
+    def waiters(self, key: str | None = None) -> int:
+        """Callers currently waiting on ``key``, or on any in-flight call when ``key`` is None."""
+        with self._lock:
+            if key is None:
+                return sum(call.waiters for call in self._calls.values())
+            call = self._calls.get(key)
+            return call.waiters if call is not None else 0
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key: str, fn: Callable[[], Any], timeout_s: float | None = None) -> tuple[Any, bool]:
+        call, leader = self._join(key)
+        if not leader:
+            try:
+                return call.future.result(timeout=timeout_s), True
+            finally:
+                self._leave(call)
+        try:
+            result = fn()
+        except Exception as exc:
+            self._finish(key, call, error=exc)
+            raise
+        except BaseException:
+            self._finish(key, call, error=RuntimeError("single_flight_leader_cancelled"))
+            raise
+        self._finish(key, call, result=result)
+        return result, False
+
+    async def ado(
+        self, key: str, fn: Callable[[], Awaitable[Any]], timeout_s: float | None = None
+    ) -> tuple[Any, bool]:
+        call, leader = self._join(key)
+        if not leader:
+            try:
+                # shield: a timed-out waiter must not cancel the shared future for everyone else.
+                waiter = asyncio.shield(asyncio.wrap_future(call.future))
+                return await asyncio.wait_for(waiter, timeout_s), True
+            finally:
+                self._leave(call)
+        try:
+            result = await fn()
+        except Exception as exc:
+            self._finish(key, call, error=exc)
+            raise
+        except BaseException:
+            self._finish(key, call, error=RuntimeError("single_flight_leader_cancelled"))
+            raise
+        self._finish(key, call, result=result)
+        return result, False
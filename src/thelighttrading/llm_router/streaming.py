@@ -0,0 +1,117 @@
+import json
+import time
+from typing import Iterable, Iterator
+
+from ..observability.metrics import metrics
+
+
+class JSONCompletenessDetector:
+    """Incremental scanner that reports when the first top-level JSON object or array has closed."""
+
+    def __init__(self):
+        self._parts: list[str] = []
+        self._consumed = 0
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self.end: int | None = None
+
+    @property
+    def complete(self) -> bool:
+        return self.end is not None
+
+    @property
+    def text(self) -> str:
+        text = "".join(self._parts)
+        return text[: self.end] if self.end is not None else text
+
+    def feed(self, delta: str) -> bool:
+        if self.end is not None:
+            return True
+        self._parts.append(delta)
+        for offset, char in enumerate(delta):
+            if not self._started:
+                if char in "{[":
+                    self._started = True
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.end = self._consumed + offset + 1
+                    break
+        self._consumed += len(delta)
+        return self.end is not None
+
+
+def iter_sse_deltas(response, on_event=None) -> Iterator[str]:
+    """Yield content deltas from an OpenAI-style ``stream: true`` chat completion response.
+
+    ``on_event`` sees every decoded event, e.g. to pick up the final chunk's server timings.
+    """
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        try:
+            event = json.loads(data)
+        except json.JSONDecodeError:
+            continue
+        if on_event is not None:
+            on_event(event)
+        for choice in event.get("choices") or []:
+            delta = (choice.get("delta") or {}).get("content")
+            if delta:
+                yield delta
+
+
+def timed_deltas(deltas: Iterable[str], profile: str) -> Iterator[str]:
+    """Pass deltas through, recording time-to-first-token and tokens/sec for ``profile``."""
+    started = time.perf_counter()
+    first_at = None
+    tokens = 0
+    iterator = iter(deltas)
+    try:
+        for delta in iterator:
+            if first_at is None:
+                first_at = time.perf_counter()
+            tokens += 1
+            yield delta
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+        if first_at is not None:
+            metrics.observe_llm_stream(profile, first_at - started, tokens, time.perf_counter() - first_at)
+
+
+def collect_text(deltas: Iterable[str], stop_on_json: bool = False) -> str:
+    """Join deltas, optionally closing the stream as soon as a complete JSON value has arrived."""
+    detector = JSONCompletenessDetector() if stop_on_json else None
+    parts = []
+    iterator = iter(deltas)
+    try:
+        for delta in iterator:
+            if detector is None:
+                parts.append(delta)
+            elif detector.feed(delta):
+                return detector.text
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+    return detector.text if detector is not None else "".join(parts)
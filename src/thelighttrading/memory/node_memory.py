@@ -1,5 +1,7 @@
+import hashlib
 import json
 import sqlite3
+import time
 from pathlib import Path
 from ..config.settings import get_settings
 
@@ -21,6 +23,17 @@ def _get_conn():
         )
         """
     )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS node_results (
+            input_hash TEXT PRIMARY KEY,
+            node_id TEXT,
+            ts REAL,
+            output_json TEXT
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS node_results_node_ts ON node_results (node_id, ts)")
     return conn
 
 
@@ -67,3 +80,40 @@ def fetch_by_key(node_id: str, key: str, n: int = 10) -> list[dict]:
     rows = cur.fetchall()
     conn.close()
     return [json.loads(r[0]) for r in rows]
+
+
+def input_hash(payload: dict) -> str:
+    """Content address of a node invocation (sha256 of canonical JSON)."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def store_result(node_id: str, key: str, output: dict, ts: float, ttl_s: float = 0.0, max_entries: int = 0) -> None:
+    """Store ``output`` under ``key``, then drop rows older than ``ttl_s`` and keep at most
+    ``max_entries`` newest rows for ``node_id`` (each limit applies only when > 0)."""
+    conn = _get_conn()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO node_results (input_hash, node_id, ts, output_json) VALUES (?, ?, ?, ?)",
+            (key, node_id, ts, json.dumps(output)),
+        )
+        if ttl_s > 0:
+            conn.execute("DELETE FROM node_results WHERE ts < ?", (time.time() - ttl_s,))
+        if max_entries > 0:
+            conn.execute(
+                "DELETE FROM node_results WHERE input_hash IN ("
+                "SELECT input_hash FROM node_results WHERE node_id=? ORDER BY ts DESC LIMIT -1 OFFSET ?)",
+                (node_id, max_entries),
+            )
+    conn.close()
+
+
+def recall_result(key: str, ttl_s: float = 0.0) -> dict | None:
+    """Output stored under ``key``; entries older than ``ttl_s`` (when > 0) are ignored."""
+    conn = _get_conn()
+    cur = conn.execute("SELECT ts, output_json FROM node_results WHERE input_hash=?", (key,))
+    row = cur.fetchone()
+    conn.close()
+    if not row or (ttl_s > 0 and time.time() - row[0] > ttl_s):
+        return None
+    return json.loads(row[1])
@@ -0,0 +1,133 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Iterable
+
+from ..config.settings import get_settings
+from ..observability.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING = 1024
+BATCH_SIZE = 64
+
+
+def _fsync_dir(directory: Path) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # not supported on this platform
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_atomic(items: Iterable[tuple[Path, bytes]], fsync: bool = True) -> int:
+    """Write every (path, data) via a temp file and rename, in order; the last write to a path wins.
+
+    With ``fsync`` each temp file is synced before the renames and each touched directory is
+    synced once afterwards, so a batch costs one directory sync per directory instead of one
+    per file. Returns the number of files written.
+    """
+    latest: dict[Path, bytes] = {}
+    for path, data in items:
+        latest.pop(Path(path), None)
+        latest[Path(path)] = data
+    staged = []
+    for path, data in latest.items():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with tmp_path.open("wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        staged.append((tmp_path, path))
+    for tmp_path, path in staged:
+        os.replace(tmp_path, path)
+    if fsync:
+        for directory in {path.parent for path in latest}:
+            _fsync_dir(directory)
+    return len(latest)
+
+
+class WriteBehindWriter:
+    """Background writer for run artefacts: callers enqueue already-serialised bytes and return.
+
+    A single worker drains the queue in batches through ``write_atomic``. ``flush`` waits until
+    everything queued so far is on disk; ``submit`` blocks once ``max_pending`` files are queued.
+    ``fsync=None`` follows ``ARTEFACT_FSYNC`` as of each ``submit``; the worker thread never reads settings.
+    """
+
+    def __init__(self, max_pending: int = MAX_PENDING, batch_size: int = BATCH_SIZE, fsync: bool | None = None):
+        self.max_pending = max(1, max_pending)
+        self.batch_size = max(1, batch_size)
+        self.fsync = fsync
+        self._pending: deque[tuple[Path, bytes, bool]] = deque()
+        self._busy = False
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+        self._cond = threading.Condition()
+
+    def submit(self, items: Iterable[tuple[Path, str | bytes]]) -> None:
+        fsync = self.fsync if self.fsync is not None else get_settings().artefact_fsync
+        encoded = [(Path(path), data.encode("utf-8") if isinstance(data, str) else data, fsync) for path, data in items]
+        with self._cond:
+            self._cond.wait_for(lambda: len(self._pending) < self.max_pending)
+            self._pending.extend(encoded)
+            metrics.artefact_queue_depth = len(self._pending)
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="artefact-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self, timeout_s: float | None = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout_s)
+
+    def stop(self, timeout_s: float | None = 10.0) -> None:
+        self.flush(timeout_s)
+        with self._cond:
+            self._stopping = True
+            thread = self._thread
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(timeout_s)
+        with self._cond:
+            if self._thread is thread:
+                self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._stopping)
+                if not self._pending:
+                    return
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                self._busy = True
+                metrics.artefact_queue_depth = len(self._pending)
+                self._cond.notify_all()
+            started = time.perf_counter()
+            try:
+                fsync = any(item_fsync for _, _, item_fsync in batch)
+                written = write_atomic([(path, data) for path, data, _ in batch], fsync=fsync)
+                metrics.observe_artefact_write(written, time.perf_counter() - started)
+            except Exception:  # noqa: BLE001
+                metrics.observe_artefact_write(0, time.perf_counter() - started, failed=len(batch))
+                logger.exception("Artefact write failed")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+
+artefact_writer = WriteBehindWriter()
+atexit.register(artefact_writer.stop)
@@ -24,10 +24,19 @@ class BaseNode:
         self.name = name
         self.profile = profile
 
-    def run(self, messages: list[dict]) -> NodeResult:
+    def run(self, messages: list[dict], timeout_s: float | None = None) -> NodeResult:
         ts_start = time.time()
-        raw = router.generate(self.profile, messages)
+        raw = router.generate(self.profile, messages, stop_on_json=True, timeout_s=timeout_s)
+        return self._finish(raw, ts_start)
+
+    async def arun(self, messages: list[dict], timeout_s: float | None = None) -> NodeResult:
+        ts_start = time.time()
+        raw = await router.agenerate(self.profile, messages, timeout_s=timeout_s)
+        return self._finish(raw, ts_start)
+
+    def _finish(self, raw: str, ts_start: float) -> NodeResult:
         output = self.postprocess(raw)
+        metrics.observe_llm_output(self.profile, "error" not in output)
         ts_end = time.time()
         metrics.observe_llm_latency(ts_end - ts_start)
         remember(self.id, "last", output, ts_end)
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass, field
-from typing import Dict, List, Tuple
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple
 
 
 @dataclass
@@ -12,6 +14,8 @@ class NodeSpec:
     class_path: str | None = None
     inputs_from: List[str] = field(default_factory=list)
     enabled: bool = True
+    system_prompt: str | None = None
+    timeout_s: float | None = None
 
 
 @dataclass
@@ -21,6 +25,107 @@ class GraphSpec:
     version: str = "v1"
 
 
+@dataclass(frozen=True)
+class PromptBuilder:
+    """Builds a node's messages from the outputs named in its ``inputs_from``.
+
+    The static system prompt comes first and run-specific content last, so llama.cpp can
+    reuse the cached prefix. Nodes without inputs get the run's headlines.
+    """
+
+    system_prompt: str | None
+    inputs_from: Tuple[str, ...]
+
+    def __call__(self, outputs: Mapping[str, dict], headlines: list[str] | None) -> list[dict]:
+        if not self.inputs_from:
+            content = "\n".join(headlines or []) or "Mock headlines"
+        elif len(self.inputs_from) == 1:
+            content = json.dumps(outputs.get(self.inputs_from[0], {}), sort_keys=True)
+        else:
+            content = json.dumps({src: outputs.get(src, {}) for src in self.inputs_from}, sort_keys=True)
+        messages = [{"role": "system", "content": self.system_prompt}] if self.system_prompt else []
+        messages.append({"role": "user", "content": content})
+        return messages
+
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    """Immutable schedule compiled from a ``GraphSpec``.
+
+    ``dependencies`` and ``dependants`` only cover enabled nodes; disabled nodes are listed
+    in ``pruned`` and never scheduled.
+    """
+
+    version: str
+    order: Tuple[str, ...]
+    levels: Tuple[Tuple[str, ...], ...]
+    dependencies: Mapping[str, frozenset[str]]
+    dependants: Mapping[str, Tuple[str, ...]]
+    pruned: frozenset[str]
+    prompts: Mapping[str, PromptBuilder]
+
+
+def compile_graph(spec: GraphSpec) -> ExecutionPlan:
+    """Validate ``spec`` and compile it into an ``ExecutionPlan``.
+
+    Dependencies are the union of ``edges`` and each node's ``inputs_from``. Raises
+    ``ValueError`` for edges or inputs naming unknown nodes and for cycles.
+    """
+    upstream: Dict[str, List[str]] = {node_id: [] for node_id in spec.nodes}
+    for src, dst in spec.edges:
+        if src not in spec.nodes or dst not in spec.nodes:
+            raise ValueError(f"invalid_graph_edge:{src}->{dst}")
+        if src not in upstream[dst]:
+            upstream[dst].append(src)
+    for node_id, node in spec.nodes.items():
+        for src in node.inputs_from:
+            if src not in spec.nodes:
+                raise ValueError(f"invalid_graph_input:{node_id}<-{src}")
+            if src not in upstream[node_id]:
+                upstream[node_id].append(src)
+
+    # Kahn's algorithm one level at a time; nodes keep their declaration order within a level.
+    remaining = {node_id: len(srcs) for node_id, srcs in upstream.items()}
+    downstream: Dict[str, List[str]] = {node_id: [] for node_id in spec.nodes}
+    for node_id, srcs in upstream.items():
+        for src in srcs:
+            downstream[src].append(node_id)
+    levels: List[Tuple[str, ...]] = []
+    level = [node_id for node_id, count in remaining.items() if count == 0]
+    while level:
+        levels.append(tuple(level))
+        settled = set()
+        for node_id in level:
+            for dst in downstream[node_id]:
+                remaining[dst] -= 1
+                if remaining[dst] == 0:
+                    settled.add(dst)
+        level = [node_id for node_id in spec.nodes if node_id in settled]
+    order = tuple(node_id for level in levels for node_id in level)
+    if len(order) != len(spec.nodes):
+        cycle = sorted(node_id for node_id in spec.nodes if node_id not in order)
+        raise ValueError(f"graph_cycle:{','.join(cycle)}")
+
+    pruned = frozenset(node_id for node_id, node in spec.nodes.items() if not node.enabled)
+    active = [node_id for node_id in order if node_id not in pruned]
+    dependencies = {node_id: frozenset(src for src in upstream[node_id] if src not in pruned) for node_id in active}
+    dependants = {
+        node_id: tuple(dst for dst in active if node_id in dependencies[dst]) for node_id in active
+    }
+    prompts = {
+        node_id: PromptBuilder(node.system_prompt, tuple(node.inputs_from)) for node_id, node in spec.nodes.items()
+    }
+    return ExecutionPlan(
+        version=spec.version,
+        order=order,
+        levels=tuple(levels),
+        dependencies=MappingProxyType(dependencies),
+        dependants=MappingProxyType(dependants),
+        pruned=pruned,
+        prompts=MappingProxyType(prompts),
+    )
+
+
 def default_graph_spec() -> GraphSpec:
     nodes = {
         "news": NodeSpec(
@@ -29,6 +134,7 @@ def default_graph_spec() -> GraphSpec:
             class_path="thelighttrading.nodes.news_node.NewsNode",
             profile="news_llama",
             inputs_from=[],
+            system_prompt="Summarize headlines",
         ),
         "parser": NodeSpec(
             id="parser",
@@ -36,6 +142,7 @@ def default_graph_spec() -> GraphSpec:
             class_path="thelighttrading.nodes.parser_node.ParserNode",
             profile="parser_qwen",
             inputs_from=["news"],
+            system_prompt="Parse summary",
         ),
         "brain": NodeSpec(
             id="brain",
@@ -43,6 +150,7 @@ def default_graph_spec() -> GraphSpec:
             class_path="thelighttrading.nodes.brain_node.BrainNode",
             profile="brain_mistral",
             inputs_from=["parser"],
+            system_prompt="Strategize",
         ),
         "watchdog": NodeSpec(
             id="watchdog",
@@ -50,6 +158,7 @@ def default_graph_spec() -> GraphSpec:
             class_path="thelighttrading.nodes.watchdog_node.WatchdogNode",
             profile="watchdog_phi",
             inputs_from=["brain"],
+            system_prompt="Risk check",
         ),
         "packet": NodeSpec(
             id="packet",
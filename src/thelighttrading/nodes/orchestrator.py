@@ -1,25 +1,49 @@
 import importlib
 import json
+import math
+import threading
 import time
 import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List
 
-from .graph import GraphSpec, NodeSpec, default_graph_spec
+from .base import BaseNode, NodeResult
+from .graph import GraphSpec, NodeSpec, compile_graph, default_graph_spec
 from .registry import NodeRegistry
 from ..config.settings import get_settings
 from ..inputs.news_ingest import read_headlines_from_file
+from ..llm_router.deadline import Deadline, DeadlineExceeded
+from ..llm_router.routing import resolve_route
+from ..memory.node_memory import input_hash, recall_result, remember, store_result
+from ..memory.write_behind import artefact_writer, write_atomic
 from ..observability.metrics import metrics
 from ..policy import evaluate_strategy, PolicyDecision
-from ..protocols.reporting import build_execution_report, persist_report
+from ..protocols.reporting import build_execution_report, report_path
 from ..protocols.schemas import Strategy
 
 
+def _parse_deadline_s(deadline_s) -> float | None:
+    """``deadline_s`` as a positive number of seconds; bad input (e.g. from the API) is a ValueError."""
+    if deadline_s is None:
+        return None
+    try:
+        value = float(deadline_s)
+    except (TypeError, ValueError):
+        raise ValueError("invalid_deadline_s") from None
+    if isinstance(deadline_s, bool) or not math.isfinite(value) or value <= 0:
+        raise ValueError("invalid_deadline_s")
+    return value
+
+
 class Orchestrator:
     def __init__(self, graph_spec: GraphSpec | None = None):
         self.graph_spec = graph_spec or default_graph_spec()
+        self.plan = compile_graph(self.graph_spec)
+        self._position = {node_id: index for index, node_id in enumerate(self.plan.order)}
         self.nodes = self._initialize_nodes(self.graph_spec.nodes)
+        self._persist_lock = threading.Lock()
 
     def _initialize_nodes(self, nodes: Dict[str, NodeSpec]):
         instances = {}
@@ -39,25 +63,6 @@ class Orchestrator:
             instances[node_id] = instance
         return instances
 
-    def _topological_order(self) -> List[str]:
-        edges = list(self.graph_spec.edges)
-        incoming = {node_id: 0 for node_id in self.graph_spec.nodes}
-        adjacency: Dict[str, List[str]] = {node_id: [] for node_id in self.graph_spec.nodes}
-        for src, dst in edges:
-            adjacency[src].append(dst)
-            incoming[dst] += 1
-
-        queue = [nid for nid, deg in incoming.items() if deg == 0]
-        order: List[str] = []
-        while queue:
-            current = queue.pop(0)
-            order.append(current)
-            for neighbor in adjacency[current]:
-                incoming[neighbor] -= 1
-                if incoming[neighbor] == 0:
-                    queue.append(neighbor)
-        return order
-
     def _resolve_headlines(self, headlines: str | list[str] | None, headlines_path: str | None = None) -> list[str]:
         if headlines_path:
             inputs_dir = Path(get_settings().data_dir) / "inputs"
@@ -78,25 +83,7 @@ class Orchestrator:
         return read_headlines_from_file(default_path)
 
     def _build_messages(self, node_id: str, outputs: Dict[str, dict], headlines: list[str] | None):
-        if node_id == "news":
-            content = "\n".join(headlines or []) or "Mock headlines"
-            return [{"role": "user", "content": content}]
-        if node_id == "parser":
-            return [
-                {"role": "system", "content": "Parse summary"},
-                {"role": "user", "content": json.dumps(outputs.get("news", {}))},
-            ]
-        if node_id == "brain":
-            return [
-                {"role": "system", "content": "Strategize"},
-                {"role": "user", "content": json.dumps(outputs.get("parser", {}))},
-            ]
-        if node_id == "watchdog":
-            return [
-                {"role": "system", "content": "Risk check"},
-                {"role": "user", "content": json.dumps(outputs.get("brain", {}))},
-            ]
-        return []
+        return self.plan.prompts[node_id](outputs, headlines)
 
     def _policy_record(self, error: bool, policy_decision: PolicyDecision | None) -> dict:
         ts = time.time()
@@ -111,12 +98,189 @@ class Orchestrator:
             "output": decision_payload,
         }
 
+    def _skipped_record(self, node_id: str) -> dict:
+        ts = time.time()
+        return {
+            "id": node_id,
+            "name": getattr(self.nodes[node_id], "name", node_id),
+            "status": "skipped",
+            "ts_start": ts,
+            "ts_end": ts,
+            "output": {},
+        }
+
+    def _execute_node(
+        self,
+        node_id: str,
+        outputs: Dict[str, dict],
+        headlines: list[str],
+        policy_decision: PolicyDecision | None,
+        deadline: Deadline,
+        limits: Dict[str, threading.BoundedSemaphore] | None = None,
+    ) -> tuple[NodeResult, str]:
+        """Run one node; returns its result and record status ("ok", or "cached" when memoized)."""
+        if node_id == "packet":
+            brain_entries = outputs.get("brain", {}).get("entries", [])
+            watchdog_output = outputs.get("watchdog", {})
+            result = self.nodes[node_id].run(watchdog_output, brain_entries, policy_decision or PolicyDecision(False, ["no_policy"]))
+            return result, "ok"
+        messages = self._build_messages(node_id, outputs, headlines)
+        settings = get_settings()
+        if not settings.orchestrator_memoize:
+            return self._run_llm_node(node_id, messages, deadline, limits), "ok"
+
+        key = self._memo_key(node_id, messages)
+        ts_start = time.time()
+        cached = recall_result(key, settings.orchestrator_memo_ttl_s)
+        if cached is not None:
+            ts_end = time.time()
+            node = self.nodes[node_id]
+            if isinstance(node, BaseNode):
+                # A memo hit is still this node's latest output, as if it had run.
+                remember(node.id, "last", cached, ts_end)
+            return NodeResult(node_id=node_id, output=cached, ts_start=ts_start, ts_end=ts_end), "cached"
+        result = self._run_llm_node(node_id, messages, deadline, limits)
+        if "error" not in result.output:
+            store_result(
+                node_id,
+                key,
+                result.output,
+                result.ts_end,
+                ttl_s=settings.orchestrator_memo_ttl_s,
+                max_entries=settings.orchestrator_memo_max_entries,
+            )
+        return result, "ok"
+
+    def _run_llm_node(
+        self,
+        node_id: str,
+        messages: list[dict],
+        deadline: Deadline,
+        limits: Dict[str, threading.BoundedSemaphore] | None = None,
+    ) -> NodeResult:
+        node = self.nodes[node_id]
+        semaphore = (limits or {}).get(getattr(node, "profile", node_id))
+        if semaphore is not None:
+            remaining = deadline.remaining()
+            if not semaphore.acquire(timeout=None if remaining is None else max(remaining, 0)):
+                raise DeadlineExceeded("deadline_exceeded")
+        try:
+            if isinstance(node, BaseNode):
+                return node.run(messages, timeout_s=deadline.remaining())
+            return node.run(messages)
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+    def _node_deadline(self, node_id: str, run_deadline: Deadline) -> Deadline:
+        """The earlier of the node's own timeout (from now) and the run deadline."""
+        node_deadline = Deadline.after(self.graph_spec.nodes[node_id].timeout_s)
+        candidates = [d.at for d in (node_deadline, run_deadline) if d.at is not None]
+        return Deadline(min(candidates) if candidates else None)
+
+    def _memo_key(self, node_id: str, messages: list[dict]) -> str:
+        settings = get_settings()
+        profile = getattr(self.nodes[node_id], "profile", node_id)
+        model = resolve_route(profile, settings).model if settings.llm_mode == "local" else "mock"
+        return input_hash(
+            {
+                "graph_version": self.graph_spec.version,
+                "node_id": node_id,
+                "profile": profile,
+                "model": model,
+                "messages": messages,
+            }
+        )
+
+    def _evaluate_policy(self, strategy_output: dict) -> tuple[PolicyDecision, dict]:
+        ts_start = time.time()
+        try:
+            policy_decision = evaluate_strategy(Strategy.model_validate(strategy_output))
+            status = "ok"
+        except Exception as exc:  # noqa: BLE001
+            policy_decision = PolicyDecision(False, [f"error:{exc}"])
+            status = "error"
+        record = {
+            "id": "policy",
+            "name": "PolicyEngine",
+            "status": status,
+            "ts_start": ts_start,
+            "ts_end": time.time(),
+            "output": policy_decision.__dict__,
+        }
+        return policy_decision, record
+
     def _new_run_id(self) -> str:
         ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
         short_uuid = uuid.uuid4().hex[:8]
         return f"run_{ts}_{short_uuid}"
 
-    def run_pipeline(self, headlines: str | list[str] | None = None, headlines_path: str | None = None) -> dict:
+    def run_pipeline(
+        self,
+        headlines: str | list[str] | None = None,
+        headlines_path: str | None = None,
+        deadline_s: float | None = None,
+    ) -> dict:
+        """Run the graph, starting each node as soon as its inputs are settled.
+
+        After an error no further nodes are started (nodes already in flight finish);
+        ``nodes`` in the run record always follow the topological order. Each node's LLM call
+        gets the earlier of ``NodeSpec.timeout_s`` and the run deadline (``deadline_s``, default
+        ``ORCHESTRATOR_RUN_DEADLINE_S``); a node that overruns it is recorded as ``timeout`` and
+        its dependants are skipped.
+        """
+        return self._run(headlines, headlines_path, _parse_deadline_s(deadline_s))
+
+    def run_batch(self, headline_sets: list, deadline_s: float | None = None) -> dict:
+        """Run the graph once per headline set, overlapping the runs.
+
+        Runs execute concurrently (up to ``ORCHESTRATOR_BATCH_MAX_RUNS``) while every profile
+        admits at most ``ORCHESTRATOR_BATCH_PROFILE_CONCURRENCY`` node calls at a time, so
+        stages pipeline across runs: run N+1's news node works while run N's brain is in
+        flight. Returns the run records in input order plus a throughput summary.
+        """
+        if not isinstance(headline_sets, list):
+            raise ValueError("invalid_headline_sets")
+        deadline_s = _parse_deadline_s(deadline_s)
+        settings = get_settings()
+        per_profile = max(1, settings.orchestrator_batch_profile_concurrency)
+        profile_limits = {
+            getattr(node, "profile", node_id): threading.BoundedSemaphore(per_profile)
+            for node_id, node in self.nodes.items()
+        }
+        started = time.time()
+        if headline_sets:
+            with ThreadPoolExecutor(max_workers=max(1, min(len(headline_sets), settings.orchestrator_batch_max_runs))) as pool:
+                runs = list(
+                    pool.map(lambda headlines: self._run(headlines, None, deadline_s, profile_limits), headline_sets)
+                )
+        else:
+            runs = []
+        wall_s = time.time() - started
+
+        statuses: Dict[str, int] = {}
+        for run in runs:
+            statuses[run["status"]] = statuses.get(run["status"], 0) + 1
+        run_seconds = [
+            max((node["ts_end"] for node in run["nodes"]), default=run["created_at"]) - run["created_at"] for run in runs
+        ]
+        summary = {
+            "runs": len(runs),
+            "statuses": statuses,
+            "wall_s": wall_s,
+            "runs_per_s": len(runs) / wall_s if wall_s > 0 else 0.0,
+            "run_s_avg": sum(run_seconds) / len(run_seconds) if run_seconds else 0.0,
+            "speedup": sum(run_seconds) / wall_s if wall_s > 0 else 0.0,
+        }
+        return {"runs": runs, "summary": summary}
+
+    def _run(
+        self,
+        headlines: str | list[str] | None,
+        headlines_path: str | None,
+        deadline_s: float | None,
+        profile_limits: Dict[str, threading.BoundedSemaphore] | None = None,
+    ) -> dict:
         run_id = self._new_run_id()
         created_at = time.time()
         outputs: Dict[str, dict] = {}
@@ -127,121 +291,158 @@ class Orchestrator:
 
         resolved_headlines = self._resolve_headlines(headlines, headlines_path)
 
-        order = self._topological_order()
+        plan = self.plan
+        settings = get_settings()
+        if deadline_s is None and settings.orchestrator_run_deadline_s > 0:
+            deadline_s = settings.orchestrator_run_deadline_s
+        run_deadline = Deadline.after(deadline_s)
+        records: Dict[str, List[dict]] = {}
+        running: Dict[Future, str] = {}
+        started: Dict[str, tuple[float, Deadline]] = {}
+        cut: set[str] = set()  # timed-out nodes and their skipped dependants
         stop_due_to_error = False
+        waiting = {node_id: len(deps) for node_id, deps in plan.dependencies.items()}
+        if "brain" in waiting and "packet" in waiting:
+            waiting["packet"] += 1  # also waits for the policy step
+        ready = [node_id for node_id in plan.order if waiting.get(node_id) == 0]
 
-        for node_id in order:
-            spec = self.graph_spec.nodes[node_id]
-            if not spec.enabled:
-                ts = time.time()
-                run_nodes.append(
-                    {
-                        "id": node_id,
-                        "name": getattr(self.nodes[node_id], "name", node_id),
-                        "status": "skipped",
-                        "ts_start": ts,
-                        "ts_end": ts,
-                        "output": {},
-                    }
-                )
-                outputs[node_id] = {}
-                if node_id == "brain":
-                    run_nodes.append(self._policy_record(True, None))
-                continue
-
-            if stop_due_to_error:
-                ts = time.time()
-                run_nodes.append(
-                    {
-                        "id": node_id,
-                        "name": getattr(self.nodes[node_id], "name", node_id),
-                        "status": "skipped",
-                        "ts_start": ts,
-                        "ts_end": ts,
-                        "output": {},
-                    }
-                )
-                outputs[node_id] = {}
-                if node_id == "brain":
-                    run_nodes.append(self._policy_record(True, None))
-                continue
-
-            try:
-                if node_id == "packet":
-                    brain_entries = outputs.get("brain", {}).get("entries", [])
-                    watchdog_output = outputs.get("watchdog", {})
-                    packet_result = self.nodes[node_id].run(watchdog_output, brain_entries, policy_decision or PolicyDecision(False, ["no_policy"]))
-                    outputs[node_id] = packet_result.output
-                    run_nodes.append(
-                        {
-                            "id": node_id,
-                            "name": self.nodes[node_id].name,
-                            "status": "ok",
-                            "ts_start": packet_result.ts_start,
-                            "ts_end": packet_result.ts_end,
-                            "output": packet_result.output,
-                        }
+        def settle(node_id: str) -> None:
+            dependants = plan.dependants.get(node_id, ())
+            if node_id == "policy":
+                dependants = ("packet",) if "packet" in waiting else ()
+            for dst in dependants:
+                waiting[dst] -= 1
+                if waiting[dst] == 0:
+                    ready.append(dst)
+
+        def skip(node_id: str) -> None:
+            records[node_id] = [self._skipped_record(node_id)]
+            outputs[node_id] = {}
+            if node_id == "brain":
+                records["policy"] = [self._policy_record(True, None)]
+                if node_id not in plan.pruned:
+                    settle("policy")
+            if node_id not in plan.pruned:
+                settle(node_id)
+
+        def fail(node_id: str, status: str, error: str) -> None:
+            ts_start = started[node_id][0]
+            outputs[node_id] = {}
+            records[node_id] = [
+                {
+                    "id": node_id,
+                    "name": getattr(self.nodes[node_id], "name", node_id),
+                    "status": status,
+                    "ts_start": ts_start,
+                    "ts_end": time.time(),
+                    "output": {},
+                    "error": error,
+                }
+            ]
+            if node_id == "brain":
+                records["policy"] = [self._policy_record(True, None)]
+                settle("policy")
+            settle(node_id)
+
+        for node_id in plan.pruned:
+            skip(node_id)
+
+        # Not a with-block: shutting down must not wait for nodes abandoned after a timeout.
+        pool = ThreadPoolExecutor(max_workers=max(1, settings.orchestrator_max_workers))
+        try:
+            while ready or running:
+                # Skipping a node can make its dependants ready, so drain until nothing is left.
+                while ready:
+                    ready.sort(key=self._position.__getitem__)
+                    node_id = ready.pop(0)
+                    if stop_due_to_error or run_deadline.expired or plan.dependencies[node_id] & cut:
+                        if not stop_due_to_error:
+                            cut.add(node_id)
+                        skip(node_id)
+                        continue
+                    deadline = self._node_deadline(node_id, run_deadline)
+                    started[node_id] = (time.time(), deadline)
+                    future = pool.submit(
+                        self._execute_node,
+                        node_id,
+                        dict(outputs),
+                        resolved_headlines,
+                        policy_decision,
+                        deadline,
+                        profile_limits,
                     )
-                else:
-                    messages = self._build_messages(node_id, outputs, resolved_headlines)
-                    result = self.nodes[node_id].run(messages)
-                    metrics.llm_calls_total += 1
+                    running[future] = node_id
+                if not running:
+                    break
+
+                deadlines = [started[nid][1].remaining() for nid in running.values() if nid in started]
+                deadlines = [remaining for remaining in deadlines if remaining is not None]
+                finished, _ = wait(
+                    running,
+                    timeout=max(min(deadlines), 0) if deadlines else None,
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in [f for f in running if f not in finished]:
+                    node_id = running[future]
+                    if node_id in started and started[node_id][1].expired:
+                        # The node overran its budget; abandon it and skip its dependants.
+                        running.pop(future)
+                        cut.add(node_id)
+                        fail(node_id, "timeout", "deadline_exceeded")
+                for future in sorted(finished, key=lambda f: self._position.get(running[f], -1)):
+                    node_id = running.pop(future)
+                    if node_id == "policy":
+                        policy_decision, record = future.result()
+                        if record["status"] == "error":
+                            status_summary = "error"
+                        records["policy"] = [record]
+                        settle("policy")
+                        continue
+                    try:
+                        result, node_status = future.result()
+                    except DeadlineExceeded:
+                        cut.add(node_id)
+                        fail(node_id, "timeout", "deadline_exceeded")
+                        continue
+                    except Exception as exc:  # noqa: BLE001
+                        status_summary = "error"
+                        stop_due_to_error = True
+                        fail(node_id, "error", str(exc))
+                        continue
+                    if node_status == "cached":
+                        metrics.nodes_cached += 1
+                    elif node_id != "packet":
+                        metrics.llm_calls_total += 1
                     outputs[node_id] = result.output
-                    run_nodes.append(
+                    records[node_id] = [
                         {
                             "id": node_id,
                             "name": self.nodes[node_id].name,
-                            "status": "ok",
+                            "status": node_status,
                             "ts_start": result.ts_start,
                             "ts_end": result.ts_end,
                             "output": result.output,
                         }
-                    )
-
+                    ]
                     if node_id == "brain":
-                        policy_ts_start = time.time()
-                        try:
-                            strategy = Strategy.model_validate(result.output)
-                            policy_decision = evaluate_strategy(strategy)
-                            policy_status = "ok"
-                        except Exception as exc:  # noqa: BLE001
-                            policy_decision = PolicyDecision(False, [f"error:{exc}"])
-                            policy_status = "error"
-                            status_summary = "error"
-                        policy_ts_end = time.time()
-                        run_nodes.append(
-                            {
-                                "id": "policy",
-                                "name": "PolicyEngine",
-                                "status": policy_status,
-                                "ts_start": policy_ts_start,
-                                "ts_end": policy_ts_end,
-                                "output": policy_decision.__dict__,
-                            }
-                        )
-                if node_id == "watchdog" and outputs.get("watchdog", {}).get("block"):
-                    status_summary = status_summary or "ok"
-            except Exception as exc:  # noqa: BLE001
-                ts = time.time()
-                status_summary = "error"
-                stop_due_to_error = True
-                outputs[node_id] = {}
-                run_nodes.append(
-                    {
-                        "id": node_id,
-                        "name": getattr(self.nodes[node_id], "name", node_id),
-                        "status": "error",
-                        "ts_start": ts,
-                        "ts_end": time.time(),
-                        "output": {},
-                        "error": str(exc),
-                    }
-                )
-                if node_id == "brain":
-                    run_nodes.append(self._policy_record(True, None))
+                        # Policy only needs the strategy, so it runs alongside the watchdog.
+                        running[pool.submit(self._evaluate_policy, result.output)] = "policy"
+                    settle(node_id)
+        finally:
+            pool.shutdown(wait=False)
+
+        timed_out = [node_id for node_id in plan.order if records.get(node_id, [{}])[0].get("status") == "timeout"]
+        metrics.nodes_timed_out += len(timed_out)
+        if timed_out and status_summary != "error":
+            status_summary = "timeout"
+
+        for node_id in plan.order:
+            run_nodes.extend(records.get(node_id, []))
+            if node_id == "brain":
+                run_nodes.extend(records.get("policy", []))
 
         packet_output = outputs.get("packet", {})
-        if status_summary != "error":
+        if status_summary == "ok":
             blocked = (outputs.get("watchdog", {}) or {}).get("block") or (policy_decision and not policy_decision.allow)
             status_summary = "blocked" if blocked else status_summary
 
@@ -260,24 +461,28 @@ class Orchestrator:
         if status_summary == "blocked":
             metrics.runs_blocked += 1
 
-        data_root = Path(get_settings().data_dir)
-        state_dir = data_root / "state" / "runs"
-        state_dir.mkdir(parents=True, exist_ok=True)
-        with (state_dir / f"{run_id}.json").open("w", encoding="utf-8") as f:
-            json.dump(run_record, f, indent=2)
-        state_root = data_root / "state"
-        state_root.mkdir(parents=True, exist_ok=True)
-        with (state_root / "last_run.txt").open("w", encoding="utf-8") as f:
-            f.write(run_id)
+        with self._persist_lock:
+            self._persist(run_id, run_record, packet_output)
+        return run_record
 
+    def _persist(self, run_id: str, run_record: dict, packet_output: dict) -> None:
+        """Serialise each artefact once and hand it to the write-behind queue (or write it now
+        with ``ARTEFACT_WRITE_BEHIND=false``); ``last_run.txt`` goes last so it never points at
+        a run whose files are not on disk yet."""
+        settings = get_settings()
+        state_root = Path(settings.data_dir) / "state"
         report = build_execution_report(run_record)
-        persist_report(run_id, report)
-
-        with (state_root / "last_packet.json").open("w", encoding="utf-8") as f:
-            json.dump(packet_output, f, indent=2)
-        with (state_root / "last_report.json").open("w", encoding="utf-8") as f:
-            json.dump(report.model_dump(), f, indent=2)
-        with (state_root / "last_run.json").open("w", encoding="utf-8") as f:
-            json.dump(run_record, f, indent=2)
-
-        return run_record
+        run_json = json.dumps(run_record)
+        report_json = json.dumps(report.model_dump())
+        artefacts = [
+            (state_root / "runs" / f"{run_id}.json", run_json),
+            (report_path(run_id), report_json),
+            (state_root / "last_packet.json", json.dumps(packet_output)),
+            (state_root / "last_report.json", report_json),
+            (state_root / "last_run.json", run_json),
+            (state_root / "last_run.txt", run_id),
+        ]
+        if settings.artefact_write_behind:
+            artefact_writer.submit(artefacts)
+        else:
+            write_atomic([(path, data.encode("utf-8")) for path, data in artefacts], fsync=settings.artefact_fsync)
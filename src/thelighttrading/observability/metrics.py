@@ -11,7 +11,26 @@ class Metrics:
     runs_blocked: int = 0
     llm_calls_total: int = 0
     executions_total: int = 0
+    news_files_reparsed_total: int = 0
+    embed_texts_total: int = 0
+    embed_texts_failed: int = 0
+    query_cache_hits: int = 0
+    query_cache_misses: int = 0
+    llm_cache_hits: int = 0
+    llm_cache_misses: int = 0
+    llm_calls_coalesced: int = 0
+    nodes_cached: int = 0
+    nodes_timed_out: int = 0
+    http_requests_total: int = 0
+    http_connections_opened: int = 0
+    artefact_queue_depth: int = 0
     _llm_latency_buckets: Dict[str, int] = field(default_factory=lambda: {"lt1": 0, "lt3": 0, "lt10": 0, "gt10": 0})
+    _llm_streams: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    _prompt_tokens: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    _llm_outputs: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    _artefact_writes: Dict[str, float] = field(
+        default_factory=lambda: {"batches": 0, "files": 0, "failed": 0, "write_s_total": 0.0, "write_s_last": 0.0}
+    )
 
     def observe_llm_latency(self, seconds: float) -> None:
         if seconds < 1:
@@ -23,6 +42,79 @@ class Metrics:
         else:
             self._llm_latency_buckets["gt10"] += 1
 
+    def observe_llm_stream(self, profile: str, ttft_s: float, tokens: int, decode_s: float) -> None:
+        stats = self._llm_streams.setdefault(
+            profile, {"streams": 0, "tokens": 0, "ttft_s_total": 0.0, "ttft_s_last": 0.0, "decode_s_total": 0.0}
+        )
+        stats["streams"] += 1
+        stats["tokens"] += tokens
+        stats["ttft_s_total"] += ttft_s
+        stats["ttft_s_last"] = ttft_s
+        stats["decode_s_total"] += decode_s
+
+    def llm_stream_stats(self) -> dict:
+        out = {}
+        for profile, stats in self._llm_streams.items():
+            decode_s = stats["decode_s_total"]
+            out[profile] = {
+                "streams": int(stats["streams"]),
+                "tokens": int(stats["tokens"]),
+                "ttft_ms_avg": 1000 * stats["ttft_s_total"] / stats["streams"],
+                "ttft_ms_last": 1000 * stats["ttft_s_last"],
+                "tokens_per_s": stats["tokens"] / decode_s if decode_s > 0 else 0.0,
+            }
+        return out
+
+    def observe_prompt_tokens(self, profile: str, evaluated: int, cached: int) -> None:
+        stats = self._prompt_tokens.setdefault(profile, {"calls": 0, "evaluated": 0, "cached": 0})
+        stats["calls"] += 1
+        stats["evaluated"] += evaluated
+        stats["cached"] += cached
+
+    def prompt_token_stats(self) -> dict:
+        out = {}
+        for profile, stats in self._prompt_tokens.items():
+            total = stats["evaluated"] + stats["cached"]
+            out[profile] = {**stats, "cache_hit_rate": stats["cached"] / total if total else 0.0}
+        return out
+
+    def observe_llm_output(self, profile: str, valid: bool) -> None:
+        stats = self._llm_outputs.setdefault(profile, {"total": 0, "invalid": 0})
+        stats["total"] += 1
+        if not valid:
+            stats["invalid"] += 1
+
+    def invalid_output_stats(self) -> dict:
+        return {
+            profile: {**stats, "invalid_rate": stats["invalid"] / stats["total"]}
+            for profile, stats in self._llm_outputs.items()
+        }
+
+    def observe_artefact_write(self, files: int, seconds: float, failed: int = 0) -> None:
+        stats = self._artefact_writes
+        stats["batches"] += 1
+        stats["files"] += files
+        stats["failed"] += failed
+        stats["write_s_total"] += seconds
+        stats["write_s_last"] = seconds
+
+    def artefact_write_stats(self) -> dict:
+        stats = self._artefact_writes
+        batches = int(stats["batches"])
+        return {
+            "queue_depth": self.artefact_queue_depth,
+            "batches": batches,
+            "files": int(stats["files"]),
+            "failed": int(stats["failed"]),
+            "write_ms_avg": 1000 * stats["write_s_total"] / batches if batches else 0.0,
+            "write_ms_last": 1000 * stats["write_s_last"],
+        }
+
+    def http_connection_reuse_rate(self) -> float:
+        if not self.http_requests_total:
+            return 0.0
+        return max(0.0, 1.0 - self.http_connections_opened / self.http_requests_total)
+
     def snapshot(self) -> dict:
         return {
             "runs_total": self.runs_total,
@@ -30,7 +122,24 @@ class Metrics:
             "runs_blocked": self.runs_blocked,
             "llm_calls_total": self.llm_calls_total,
             "executions_total": self.executions_total,
+            "news_files_reparsed_total": self.news_files_reparsed_total,
+            "embed_texts_total": self.embed_texts_total,
+            "embed_texts_failed": self.embed_texts_failed,
+            "query_cache_hits": self.query_cache_hits,
+            "query_cache_misses": self.query_cache_misses,
+            "llm_cache_hits": self.llm_cache_hits,
+            "llm_cache_misses": self.llm_cache_misses,
+            "llm_calls_coalesced": self.llm_calls_coalesced,
+            "nodes_cached": self.nodes_cached,
+            "nodes_timed_out": self.nodes_timed_out,
+            "http_requests_total": self.http_requests_total,
+            "http_connections_opened": self.http_connections_opened,
+            "http_connection_reuse_rate": self.http_connection_reuse_rate(),
             "llm_latency_buckets": dict(self._llm_latency_buckets),
+            "llm_streams": self.llm_stream_stats(),
+            "llm_prompt_tokens": self.prompt_token_stats(),
+            "llm_invalid_output": self.invalid_output_stats(),
+            "artefact_writes": self.artefact_write_stats(),
         }
 
 
@@ -0,0 +1,231 @@
+import math
+import time
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+from .retrieval import Vector, VectorIndex, _normalize_rows, _score_matrix, _top_k_rows
+
+IVF_STATE_NAME = "ivf_state.npz"
+KMEANS_SAMPLE_PER_LIST = 256
+
+
+def default_nlist(count: int) -> int:
+    return max(1, int(math.sqrt(count)))
+
+
+def _assign(matrix: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+    assignments = np.empty(matrix.shape[0], dtype=np.int32)
+    for start in range(0, matrix.shape[0], chunk):
+        block = np.asarray(matrix[start : start + chunk], dtype=np.float32)
+        assignments[start : start + chunk] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def train_centroids(matrix: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means over L2-normalised rows, trained on a bounded sample."""
+    rng = np.random.default_rng(seed)
+    count = matrix.shape[0]
+    nlist = max(1, min(nlist, count))
+    sample_size = min(count, nlist * KMEANS_SAMPLE_PER_LIST)
+    sample_rows = np.sort(rng.choice(count, size=sample_size, replace=False))
+    sample = _normalize_rows(np.asarray(matrix[sample_rows], dtype=np.float32))
+    centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        counts = np.bincount(assignments, minlength=nlist)
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = sample[rng.choice(sample_size, size=int(empty.sum()), replace=True)]
+        centroids = _normalize_rows(sums)
+    return centroids
+
+
+class IVFIndex(VectorIndex):
+    """IVF-flat cosine index: rows are bucketed by nearest centroid and only
+    the ``nprobe`` closest buckets are scanned per query."""
+
+    def __init__(self, centroids: np.ndarray, nprobe: int = 8):
+        super().__init__(centroids.shape[1])
+        self.centroids = centroids
+        self.nprobe = nprobe
+        self.assignments = np.empty(0, dtype=np.int32)
+        self._lists: list[np.ndarray] | None = None
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[str],
+        matrix: np.ndarray,
+        centroids: np.ndarray,
+        assignments: np.ndarray | None = None,
+        nprobe: int = 8,
+        scales: np.ndarray | None = None,
+    ) -> "IVFIndex":
+        index = cls(centroids, nprobe=nprobe)
+        index.ids = list(ids)
+        index._matrix = matrix
+        index._scales = scales
+        index.assignments = assignments if assignments is not None else _assign(matrix, centroids)
+        return index
+
+    @property
+    def nlist(self) -> int:
+        return self.centroids.shape[0]
+
+    def add(self, ids: Sequence[str], embeddings: Sequence[Vector] | np.ndarray) -> None:
+        if not len(ids):
+            return
+        super().add(ids, embeddings)
+        matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), self.dims)
+        self.assignments = np.concatenate([self.assignments, _assign(matrix, self.centroids)])
+        self._lists = None
+
+    def _inverted_lists(self) -> list[np.ndarray]:
+        if self._lists is None:
+            order = np.argsort(self.assignments, kind="stable")
+            bounds = np.cumsum(np.bincount(self.assignments, minlength=self.nlist))
+            self._lists = np.split(order, bounds[:-1])
+        return self._lists
+
+    def search(
+        self,
+        query_embedding: Vector,
+        top_k: int = 5,
+        rows: np.ndarray | None = None,
+        nprobe: int | None = None,
+    ) -> list[tuple[str, float]]:
+        if len(query_embedding) != self.dims or not self.ids:
+            return []
+        if rows is not None:
+            # A pre-filtered candidate set (e.g. a time window) is already small: scan it exactly.
+            return super().search(query_embedding, top_k, rows=rows)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0:
+            return super().search(query_embedding, top_k)
+        query = query / norm
+        nprobe = max(1, min(nprobe or self.nprobe, self.nlist))
+        probes = _top_k_rows(self.centroids @ query, nprobe)
+        lists = self._inverted_lists()
+        rows = np.sort(np.concatenate([lists[probe] for probe in probes]))
+        if rows.size == 0:
+            return []
+        scales = self._scales[rows] if self._scales is not None else None
+        scores = _score_matrix(self._matrix[rows], query, scales)
+        best = _top_k_rows(scores, top_k)
+        return [(self.ids[rows[pos]], float(scores[pos])) for pos in best]
+
+
+def load_or_train_ivf(
+    index_dir: Path,
+    ids: Sequence[str],
+    content_hashes: Sequence[str],
+    matrix: np.ndarray,
+    nlist: int = 0,
+    nprobe: int = 8,
+    retrain_growth: float = 4.0,
+    scales: np.ndarray | None = None,
+) -> IVFIndex:
+    """Reuse persisted centroids and row assignments, assigning only new or changed rows.
+
+    Centroids are retrained when none exist, the dimension changed, or the
+    corpus grew by ``retrain_growth`` since the last training.
+    """
+    state_path = Path(index_dir) / IVF_STATE_NAME
+    state = None
+    if state_path.exists():
+        try:
+            with np.load(state_path, allow_pickle=False) as data:
+                state = {key: data[key] for key in data.files}
+        except Exception:  # noqa: BLE001
+            state = None
+
+    count = len(ids)
+    target_nlist = nlist or default_nlist(count)
+    centroids = state["centroids"] if state else None
+    needs_training = (
+        centroids is None
+        or centroids.shape[1] != matrix.shape[1]
+        or (nlist and centroids.shape[0] != min(nlist, count))
+        or count > retrain_growth * int(state["trained_size"])
+    )
+
+    if needs_training:
+        centroids = train_centroids(matrix, target_nlist)
+        assignments = _assign(matrix, centroids)
+        trained_size = count
+        changed = True
+    else:
+        trained_size = int(state["trained_size"])
+        known = {
+            (doc_id, content_hash): int(list_id)
+            for doc_id, content_hash, list_id in zip(state["ids"], state["content_hashes"], state["assignments"])
+        }
+        assignments = np.empty(count, dtype=np.int32)
+        missing = []
+        for row, key in enumerate(zip(ids, content_hashes)):
+            list_id = known.get(key)
+            if list_id is None:
+                missing.append(row)
+            else:
+                assignments[row] = list_id
+        if missing:
+            assignments[missing] = _assign(np.asarray(matrix[missing]), centroids)
+        changed = bool(missing) or len(known) != count
+
+    if changed:
+        tmp_path = state_path.with_name(state_path.stem + ".tmp.npz")
+        np.savez(
+            tmp_path,
+            centroids=centroids,
+            ids=np.asarray(ids, dtype=str),
+            content_hashes=np.asarray(content_hashes, dtype=str),
+            assignments=assignments,
+            trained_size=np.asarray(trained_size),
+        )
+        tmp_path.replace(state_path)
+
+    return IVFIndex.build(ids, matrix, centroids, assignments=assignments, nprobe=nprobe, scales=scales)
+
+
+def benchmark_recall(
+    matrix: np.ndarray,
+    queries: np.ndarray,
+    top_k: int = 10,
+    nlist: int = 0,
+    nprobe: int = 8,
+) -> dict:
+    """Compare IVF search against exact search: mean recall@k and per-query latency."""
+    matrix = _normalize_rows(np.asarray(matrix, dtype=np.float32))
+    ids = [str(row) for row in range(matrix.shape[0])]
+    exact = VectorIndex.from_matrix(ids, matrix, normalized=True)
+    centroids = train_centroids(matrix, nlist or default_nlist(len(ids)))
+    ivf = IVFIndex.build(ids, matrix, centroids, nprobe=nprobe)
+
+    recalls = []
+    exact_s = 0.0
+    ivf_s = 0.0
+    for query in queries:
+        start = time.perf_counter()
+        truth = {doc_id for doc_id, _ in exact.search(query, top_k)}
+        exact_s += time.perf_counter() - start
+        start = time.perf_counter()
+        found = {doc_id for doc_id, _ in ivf.search(query, top_k)}
+        ivf_s += time.perf_counter() - start
+        recalls.append(len(truth & found) / len(truth) if truth else 1.0)
+
+    query_count = max(len(queries), 1)
+    return {
+        "docs": len(ids),
+        "queries": len(queries),
+        "top_k": top_k,
+        "nlist": ivf.nlist,
+        "nprobe": nprobe,
+        "recall_at_k": float(np.mean(recalls)) if recalls else 1.0,
+        "exact_ms_per_query": exact_s * 1000 / query_count,
+        "ivf_ms_per_query": ivf_s * 1000 / query_count,
+    }
@@ -0,0 +1,286 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+
+from .retrieval import dequantize_rows, quantize_rows
+
+SIDECAR_NAME = "embeddings.meta.json"
+STORE_VERSION = 1
+MATRIX_NAMES = {"float32": "embeddings.f32", "float16": "embeddings.f16", "int8": "embeddings.i8"}
+SCALES_NAME = "embeddings.scale.f32"
+
+
+def _write_json_atomic(path: Path, payload: dict) -> None:
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def _normalize(vector: Sequence[float]) -> np.ndarray:
+    row = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(row))
+    return row / norm if norm else row
+
+
+class EmbeddingStore:
+    """Row-per-document embedding matrix on disk plus a compact id/hash/metadata sidecar.
+
+    Rows are stored L2-normalised, so the memory-mapped matrix can be scored
+    directly by cosine retrieval without a copy. ``dtype`` selects float32,
+    float16 or int8 rows; int8 keeps one float32 scale per row in a second file.
+    An existing store in another dtype is converted in place on open.
+    """
+
+    def __init__(self, index_dir: Path, model: str | None = None, dtype: str = "float32"):
+        if dtype not in MATRIX_NAMES:
+            raise ValueError(f"unsupported_embedding_dtype: {dtype}")
+        self.index_dir = Path(index_dir)
+        self.model = model
+        self.dtype = dtype
+        self.matrix_path = self.index_dir / MATRIX_NAMES[dtype]
+        self.scales_path = self.index_dir / SCALES_NAME
+        self.sidecar_path = self.index_dir / SIDECAR_NAME
+        self.dims: int | None = None
+        self.ids: list[str] = []
+        self.content_hashes: list[str] = []
+        self.metadata: list[dict[str, Any]] = []
+        self._rows: dict[str, int] = {}
+        self._matrix: np.memmap | None = None
+        self._scales: np.memmap | None = None
+        self._dirty = False
+        self.loaded_from_disk = False
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def _itemsize(self) -> int:
+        return np.dtype(self.dtype).itemsize
+
+    @property
+    def _quantized_scales(self) -> bool:
+        return self.dtype == "int8"
+
+    def _load(self) -> None:
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        sidecar = None
+        if self.sidecar_path.exists():
+            try:
+                with self.sidecar_path.open("r", encoding="utf-8") as f:
+                    sidecar = json.load(f)
+            except Exception:  # noqa: BLE001
+                sidecar = None
+        if not sidecar or sidecar.get("version") != STORE_VERSION:
+            self.reset()
+            return
+        if self.model is not None and sidecar.get("model") != self.model:
+            self.reset()
+            return
+        self.dims = sidecar.get("dims")
+        self.ids = list(sidecar.get("ids", []))
+        self.content_hashes = list(sidecar.get("content_hashes", []))
+        self.metadata = list(sidecar.get("metadata", []))
+        stored_dtype = sidecar.get("dtype", "float32")
+        if stored_dtype not in MATRIX_NAMES or not self._files_match(stored_dtype):
+            self.reset()
+            return
+        if stored_dtype != self.dtype:
+            self._convert_from(stored_dtype)
+        self._rows = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self.loaded_from_disk = True
+
+    def _files_match(self, dtype: str) -> bool:
+        rows = len(self.ids)
+        matrix_path = self.index_dir / MATRIX_NAMES[dtype]
+        if not matrix_path.exists() or matrix_path.stat().st_size != rows * (self.dims or 0) * np.dtype(dtype).itemsize:
+            return False
+        if dtype == "int8":
+            return self.scales_path.exists() and self.scales_path.stat().st_size == rows * 4
+        return True
+
+    def _convert_from(self, stored_dtype: str) -> None:
+        rows = len(self.ids)
+        old_path = self.index_dir / MATRIX_NAMES[stored_dtype]
+        matrix = np.zeros((0, self.dims or 0), dtype=np.float32)
+        if rows and self.dims:
+            data = np.fromfile(old_path, dtype=stored_dtype).reshape(rows, self.dims)
+            scales = np.fromfile(self.scales_path, dtype=np.float32) if stored_dtype == "int8" else None
+            matrix = dequantize_rows(data, scales)
+        data, scales = quantize_rows(matrix, self.dtype)
+        data.tofile(self.matrix_path)
+        if scales is not None:
+            scales.tofile(self.scales_path)
+        elif stored_dtype == "int8":
+            self.scales_path.unlink(missing_ok=True)
+        old_path.unlink(missing_ok=True)
+        self._dirty = True
+
+    def reset(self, dims: int | None = None) -> None:
+        self.dims = dims
+        self.ids = []
+        self.content_hashes = []
+        self.metadata = []
+        self._rows = {}
+        self._release_matrix()
+        for name in MATRIX_NAMES.values():
+            (self.index_dir / name).unlink(missing_ok=True)
+        self.scales_path.unlink(missing_ok=True)
+        self.matrix_path.write_bytes(b"")
+        if self._quantized_scales:
+            self.scales_path.write_bytes(b"")
+        self._dirty = True
+
+    def _release_matrix(self) -> None:
+        for mapped in (self._matrix, self._scales):
+            if mapped is not None:
+                mapped.flush()
+        self._matrix = None
+        self._scales = None
+
+    @property
+    def nbytes(self) -> int:
+        rows = len(self.ids)
+        return rows * (self.dims or 0) * self._itemsize + (rows * 4 if self._quantized_scales else 0)
+
+    def row(self, doc_id: str) -> int | None:
+        return self._rows.get(doc_id)
+
+    def content_hash(self, doc_id: str) -> str | None:
+        row = self._rows.get(doc_id)
+        return self.content_hashes[row] if row is not None else None
+
+    def matrix(self) -> np.ndarray:
+        if not self.ids or not self.dims:
+            return np.empty((0, self.dims or 0), dtype=self.dtype)
+        if self._matrix is None or self._matrix.shape[0] != len(self.ids):
+            self._matrix = np.memmap(self.matrix_path, dtype=self.dtype, mode="r+", shape=(len(self.ids), self.dims))
+        return self._matrix
+
+    def scales(self) -> np.ndarray | None:
+        """Per-row int8 scales (``None`` for float stores)."""
+        if not self._quantized_scales:
+            return None
+        if not self.ids:
+            return np.empty(0, dtype=np.float32)
+        if self._scales is None or self._scales.shape[0] != len(self.ids):
+            self._scales = np.memmap(self.scales_path, dtype=np.float32, mode="r+", shape=(len(self.ids),))
+        return self._scales
+
+    def upsert(
+        self,
+        doc_id: str,
+        content_hash: str,
+        vector: Sequence[float],
+        metadata: dict[str, Any] | None = None,
+    ) -> None:
+        if self.dims is None:
+            self.dims = len(vector)
+        if len(vector) != self.dims:
+            raise ValueError(f"embedding_dims_mismatch: expected {self.dims}, got {len(vector)}")
+        data, scales = quantize_rows(_normalize(vector).reshape(1, -1), self.dtype)
+        row = self._rows.get(doc_id)
+        if row is None:
+            self._release_matrix()
+            with self.matrix_path.open("ab") as f:
+                f.write(data.tobytes())
+            if scales is not None:
+                with self.scales_path.open("ab") as f:
+                    f.write(scales.tobytes())
+            self._rows[doc_id] = len(self.ids)
+            self.ids.append(doc_id)
+            self.content_hashes.append(content_hash)
+            self.metadata.append(metadata or {})
+        else:
+            self.matrix()[row] = data[0]
+            if scales is not None:
+                self.scales()[row] = scales[0]
+            self.content_hashes[row] = content_hash
+            self.metadata[row] = metadata or {}
+        self._dirty = True
+
+    def remove(self, doc_ids: Sequence[str]) -> int:
+        """Drop rows by moving the last row into each freed slot, then truncate the files."""
+        removed = 0
+        for doc_id in doc_ids:
+            row = self._rows.pop(doc_id, None)
+            if row is None:
+                continue
+            last = len(self.ids) - 1
+            if row != last:
+                matrix = self.matrix()
+                matrix[row] = matrix[last]
+                scales = self.scales()
+                if scales is not None:
+                    scales[row] = scales[last]
+                self.ids[row] = self.ids[last]
+                self.content_hashes[row] = self.content_hashes[last]
+                self.metadata[row] = self.metadata[last]
+                self._rows[self.ids[row]] = row
+            self.ids.pop()
+            self.content_hashes.pop()
+            self.metadata.pop()
+            removed += 1
+        if removed:
+            self._release_matrix()
+            os.truncate(self.matrix_path, len(self.ids) * (self.dims or 0) * self._itemsize)
+            if self._quantized_scales:
+                os.truncate(self.scales_path, len(self.ids) * 4)
+            self._dirty = True
+        return removed
+
+    def flush(self) -> None:
+        for mapped in (self._matrix, self._scales):
+            if mapped is not None:
+                mapped.flush()
+        if not self._dirty:
+            return
+        _write_json_atomic(
+            self.sidecar_path,
+            {
+                "version": STORE_VERSION,
+                "model": self.model,
+                "dtype": self.dtype,
+                "dims": self.dims,
+                "ids": self.ids,
+                "content_hashes": self.content_hashes,
+                "metadata": self.metadata,
+            },
+        )
+        self._dirty = False
+
+
+def migrate_json_index(index_dir: Path, store: EmbeddingStore) -> int:
+    """One-shot import of the legacy ``<doc_id>.json`` files into ``store``.
+
+    Only runs against a freshly created store. Legacy files are removed once
+    read; returns the number of migrated documents.
+    """
+    if store.loaded_from_disk:
+        return 0
+    index_dir = Path(index_dir)
+    legacy_paths = [path for path in sorted(index_dir.glob("*.json")) if path.name != SIDECAR_NAME]
+    if not legacy_paths:
+        return 0
+    migrated = 0
+    for path in legacy_paths:
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:  # noqa: BLE001
+            continue
+        if not isinstance(data, dict) or "embedding" not in data:
+            continue
+        doc_id = data.get("id") or path.stem
+        embedding = data.get("embedding")
+        content_hash = data.get("content_hash")
+        if embedding and content_hash and store.row(doc_id) is None and len(embedding) == (store.dims or len(embedding)):
+            store.upsert(doc_id, content_hash, embedding, data.get("metadata") or {})
+            migrated += 1
+        path.unlink(missing_ok=True)
+    store.flush()
+    return migrated
@@ -0,0 +1,138 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Iterable
+
+LEXICAL_NAME = "lexical.json"
+LEXICAL_VERSION = 1
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def _valid_row(row) -> bool:
+    """A persisted ``[content_hash, {term: tf}]`` row; anything else is skipped on load."""
+    if not isinstance(row, list) or len(row) != 2:
+        return False
+    content_hash, terms = row
+    return (
+        isinstance(content_hash, str)
+        and isinstance(terms, dict)
+        and all(isinstance(tf, int) and not isinstance(tf, bool) and tf > 0 for tf in terms.values())
+    )
+
+
+class LexicalIndex:
+    """BM25 inverted index over doc title and content, updated per doc by content hash."""
+
+    def __init__(self, path: Path | None = None, k1: float = 1.5, b: float = 0.75):
+        self.path = Path(path) if path else None
+        self.k1 = k1
+        self.b = b
+        self.doc_hashes: dict[str, str] = {}
+        self.doc_terms: dict[str, dict[str, int]] = {}
+        self.doc_lengths: dict[str, int] = {}
+        self.postings: dict[str, dict[str, int]] = {}
+        self._total_length = 0
+        self._dirty = False
+        if self.path and self.path.exists():
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[dict]) -> "LexicalIndex":
+        index = cls()
+        for doc in documents:
+            index.upsert(doc["id"], doc.get("content_hash", ""), f"{doc.get('title', '')}\n{doc.get('content', '')}")
+        return index
+
+    def _load(self) -> None:
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:  # noqa: BLE001
+            return
+        if not isinstance(data, dict) or data.get("version") != LEXICAL_VERSION:
+            return
+        docs = data.get("docs")
+        skipped = 0
+        for doc_id, row in docs.items() if isinstance(docs, dict) else ():
+            if not _valid_row(row):
+                skipped += 1
+                continue
+            content_hash, terms = row
+            self._add(doc_id, content_hash, terms)
+        # Skipped docs have no hash, so the next sync re-indexes them and flush rewrites the file.
+        self._dirty = skipped > 0
+
+    def content_hash(self, doc_id: str) -> str | None:
+        return self.doc_hashes.get(doc_id)
+
+    def _add(self, doc_id: str, content_hash: str, terms: dict[str, int]) -> None:
+        self.doc_hashes[doc_id] = content_hash
+        self.doc_terms[doc_id] = terms
+        length = sum(terms.values())
+        self.doc_lengths[doc_id] = length
+        self._total_length += length
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        self._dirty = True
+
+    def remove(self, doc_id: str) -> None:
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self.doc_hashes.pop(doc_id, None)
+        self._total_length -= self.doc_lengths.pop(doc_id, 0)
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+        self._dirty = True
+
+    def upsert(self, doc_id: str, content_hash: str, text: str) -> None:
+        self.remove(doc_id)
+        self._add(doc_id, content_hash, dict(Counter(tokenize(text))))
+
+    def search(self, query: str, top_k: int = 5, candidates: set[str] | None = None) -> list[tuple[str, float]]:
+        count = len(self.doc_terms)
+        if not count or top_k <= 0:
+            return []
+        avgdl = self._total_length / count or 1.0
+        scores: dict[str, float] = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1.0 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                if candidates is not None and doc_id not in candidates:
+                    continue
+                norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths[doc_id] / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:top_k]
+
+    def flush(self) -> None:
+        if not self._dirty or not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "version": LEXICAL_VERSION,
+            "docs": {doc_id: [self.doc_hashes[doc_id], terms] for doc_id, terms in self.doc_terms.items()},
+        }
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
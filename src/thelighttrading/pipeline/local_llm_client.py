@@ -1,6 +1,14 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 
 from ..config.settings import Settings
+from ..llm_router.http_pool import get_session, http_timeout
+from ..llm_router.llama_http_client import prompt_token_stats
+from ..llm_router.streaming import collect_text, iter_sse_deltas, timed_deltas
+from ..observability.metrics import metrics
 
 
 def _base_url(settings: Settings) -> str:
@@ -8,11 +16,12 @@ def _base_url(settings: Settings) -> str:
 
 
 def embed_texts(texts: list[str], settings: Settings, timeout_s: int = 30) -> list[list[float]]:
-    url = f"{_base_url(settings).rstrip('/')}/v1/embeddings"
+    base_url = _base_url(settings)
+    url = f"{base_url.rstrip('/')}/v1/embeddings"
     payload = {"input": texts}
     if settings.llm_embed_model_path:
         payload["model"] = settings.llm_embed_model_path
-    response = requests.post(url, json=payload, timeout=timeout_s)
+    response = get_session(base_url).post(url, json=payload, timeout=http_timeout(timeout_s))
     response.raise_for_status()
     data = response.json()
     embeddings = []
@@ -23,24 +32,112 @@ def embed_texts(texts: list[str], settings: Settings, timeout_s: int = 30) -> li
     return embeddings
 
 
+def _embed_batch_with_retries(
+    texts: list[str],
+    settings: Settings,
+    retries: int,
+    timeout_s: int,
+    server_down: threading.Event,
+) -> list[list[float]] | None:
+    for attempt in range(retries + 1):
+        if server_down.is_set():
+            return None
+        try:
+            return embed_texts(texts, settings, timeout_s=timeout_s)
+        except requests.ConnectionError:
+            if attempt == retries:
+                # Nothing is listening: fail the remaining batches fast instead of retrying each one.
+                server_down.set()
+        except Exception:  # noqa: BLE001
+            pass
+        if attempt < retries:
+            time.sleep(0.5 * (2**attempt))
+    return None
+
+
+def embed_texts_batched(
+    texts: list[str],
+    settings: Settings,
+    batch_size: int | None = None,
+    max_in_flight: int | None = None,
+    retries: int | None = None,
+    timeout_s: int = 30,
+) -> list[list[float] | None]:
+    """Embed ``texts`` in fixed-size batches with a bounded number of concurrent requests.
+
+    Each batch is retried on its own; the result keeps input order and holds
+    ``None`` for texts whose batch still failed after all retries.
+    """
+    batch_size = max(1, batch_size or settings.llm_embed_batch_size)
+    max_in_flight = max(1, max_in_flight or settings.llm_embed_max_in_flight)
+    retries = settings.llm_embed_retries if retries is None else max(0, retries)
+    batches = [texts[start : start + batch_size] for start in range(0, len(texts), batch_size)]
+    if not batches:
+        return []
+    server_down = threading.Event()
+    with ThreadPoolExecutor(max_workers=min(max_in_flight, len(batches))) as pool:
+        results = list(
+            pool.map(lambda batch: _embed_batch_with_retries(batch, settings, retries, timeout_s, server_down), batches)
+        )
+    embeddings: list[list[float] | None] = []
+    for batch, vectors in zip(batches, results):
+        embeddings.extend(vectors if vectors is not None else [None] * len(batch))
+    return embeddings
+
+
+def tokenize_count(text: str, settings: Settings, timeout_s: int = 5) -> int:
+    """Token count from the llama.cpp server's /tokenize endpoint."""
+    base_url = _base_url(settings)
+    response = get_session(base_url).post(
+        f"{base_url.rstrip('/')}/tokenize", json={"content": text}, timeout=http_timeout(timeout_s)
+    )
+    response.raise_for_status()
+    return len(response.json().get("tokens", []))
+
+
+def _record_prompt_tokens(data: dict) -> None:
+    stats = prompt_token_stats(data)
+    if stats is not None:
+        metrics.observe_prompt_tokens("rag", *stats)
+
+
+def _stream_chat(url: str, payload: dict, base_url: str, timeout_s: int):
+    response = get_session(base_url).post(
+        url, json={**payload, "stream": True}, timeout=http_timeout(timeout_s), stream=True
+    )
+    try:
+        response.raise_for_status()
+        yield from iter_sse_deltas(response, on_event=_record_prompt_tokens)
+    finally:
+        response.close()
+
+
 def chat_completion(
     messages: list[dict],
     settings: Settings,
     temperature: float = 0.2,
     max_tokens: int = 512,
     timeout_s: int = 60,
+    extra: dict | None = None,
 ) -> str:
-    url = f"{_base_url(settings).rstrip('/')}/v1/chat/completions"
+    base_url = _base_url(settings)
+    url = f"{base_url.rstrip('/')}/v1/chat/completions"
     payload = {
         "messages": messages,
         "temperature": temperature,
         "max_tokens": max_tokens,
+        "cache_prompt": settings.llm_prompt_cache,
     }
     if settings.llm_chat_model_path:
         payload["model"] = settings.llm_chat_model_path
-    response = requests.post(url, json=payload, timeout=timeout_s)
+    if extra:
+        payload.update(extra)
+    if settings.llm_stream:
+        return collect_text(timed_deltas(_stream_chat(url, payload, base_url, timeout_s), "rag"), stop_on_json=True)
+    response = get_session(base_url).post(url, json=payload, timeout=http_timeout(timeout_s))
     response.raise_for_status()
     data = response.json()
+    _record_prompt_tokens(data)
     choices = data.get("choices", [])
     if not choices:
         raise ValueError("missing_choices")
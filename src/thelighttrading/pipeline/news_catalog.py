@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+CATALOG_NAME = "news_catalog.json"
+CATALOG_VERSION = 3
+
+
+def _load_json(path: Path) -> dict | None:
+    if not path.exists():
+        return None
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:  # noqa: BLE001
+        return None
+
+
+def doc_text(doc: dict[str, Any]) -> str:
+    return f"{doc.get('title', '')}\n{doc.get('content', '')}".strip()
+
+
+def hash_content(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def parse_timestamp(value: Any) -> float | None:
+    """Epoch seconds from an epoch number or an ISO-8601 string (``Z`` allowed, naive means UTC)."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def parse_news_file(path: Path) -> dict[str, Any] | None:
+    data = _load_json(path)
+    if not data:
+        return None
+    doc = {
+        "id": data.get("id") or path.stem,
+        "title": data.get("title") or "",
+        "content": data.get("content") or "",
+        "source": data.get("source") or "",
+        "created_at": data.get("created_at") or None,
+        "path": str(path),
+    }
+    doc["content_hash"] = hash_content(doc_text(doc))
+    doc["created_ts"] = parse_timestamp(doc["created_at"])
+    return doc
+
+
+@dataclass
+class CatalogRefresh:
+    docs: list[dict[str, Any]]
+    files: int = 0
+    reparsed: int = 0
+    evicted_ids: list[str] = field(default_factory=list)
+
+
+class NewsCatalog:
+    """Persisted manifest of parsed news files keyed by path, invalidated by (mtime_ns, size)."""
+
+    def __init__(self, catalog_path: Path):
+        self.catalog_path = Path(catalog_path)
+        self.entries: dict[str, dict[str, Any]] = {}
+        self._dirty = False
+        data = _load_json(self.catalog_path)
+        if isinstance(data, dict) and data.get("version") == CATALOG_VERSION:
+            self.entries = dict(data.get("files", {}))
+
+    def refresh(self, news_dir: Path) -> CatalogRefresh:
+        news_dir = Path(news_dir)
+        stats: dict[str, os.stat_result] = {}
+        if news_dir.exists():
+            with os.scandir(news_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".json") and entry.is_file():
+                        stats[entry.path] = entry.stat()
+
+        previous_ids = {entry["doc"]["id"] for entry in self.entries.values() if entry.get("doc")}
+        reparsed = 0
+        for path in list(self.entries):
+            if path not in stats:
+                del self.entries[path]
+                self._dirty = True
+
+        for path, stat in stats.items():
+            entry = self.entries.get(path)
+            if entry and entry.get("mtime_ns") == stat.st_mtime_ns and entry.get("size") == stat.st_size:
+                continue
+            reparsed += 1
+            self.entries[path] = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "doc": parse_news_file(Path(path)),
+            }
+            self._dirty = True
+
+        docs = [dict(self.entries[path]["doc"]) for path in sorted(self.entries) if self.entries[path].get("doc")]
+        current_ids = {doc["id"] for doc in docs}
+        return CatalogRefresh(
+            docs=docs,
+            files=len(stats),
+            reparsed=reparsed,
+            evicted_ids=sorted(previous_ids - current_ids),
+        )
+
+    def flush(self) -> None:
+        if not self._dirty:
+            return
+        self.catalog_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.catalog_path.with_suffix(self.catalog_path.suffix + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump({"version": CATALOG_VERSION, "files": self.entries}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.catalog_path)
+        self._dirty = False
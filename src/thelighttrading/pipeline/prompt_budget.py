@@ -0,0 +1,142 @@
+import json
+import math
+import re
+from typing import Any, Callable
+
+CHARS_PER_TOKEN = 3.5
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def approx_tokens(text: str) -> int:
+    """Conservative token estimate (~3.5 characters per token) for when no tokenizer is at hand."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+class TokenCounter:
+    """Counts tokens with ``tokenize_fn`` (e.g. the server's /tokenize) and falls back to
+    ``approx_tokens`` for good once it fails."""
+
+    def __init__(self, tokenize_fn: Callable[[str], int] | None = None):
+        self._tokenize = tokenize_fn
+        self._cache: dict[str, int] = {}
+        self.fallback = False
+
+    @property
+    def name(self) -> str:
+        return "server" if self._tokenize is not None and not self.fallback else "approx"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._tokenize is None or self.fallback:
+            return approx_tokens(text)
+        cached = self._cache.get(text)
+        if cached is not None:
+            return cached
+        try:
+            tokens = int(self._tokenize(text))
+        except Exception:  # noqa: BLE001
+            self.fallback = True
+            return approx_tokens(text)
+        self._cache[text] = tokens
+        return tokens
+
+
+def count_messages(messages: list[dict], counter: TokenCounter) -> int:
+    return sum(counter.count(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def _cut_words(text: str, max_tokens: int, counter: TokenCounter) -> str:
+    words = text.split()
+    lo, hi = 0, len(words)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if counter.count(" ".join(words[:mid])) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return " ".join(words[:lo])
+
+
+def trim_to_tokens(text: str, max_tokens: int, counter: TokenCounter) -> str:
+    """Longest prefix of whole sentences within ``max_tokens``; a single over-long first
+    sentence is cut at a word boundary instead."""
+    text = " ".join((text or "").split())
+    if max_tokens <= 0 or not text:
+        return ""
+    if counter.count(text) <= max_tokens:
+        return text
+    kept: list[str] = []
+    used = 0
+    for sentence in _SENTENCE_RE.split(text):
+        cost = counter.count(sentence) + (1 if kept else 0)
+        if used + cost > max_tokens:
+            break
+        kept.append(sentence)
+        used += cost
+    if kept:
+        return " ".join(kept)
+    return _cut_words(text, max_tokens, counter)
+
+
+def _score(doc: dict) -> float:
+    score = doc.get("score")
+    return float(score) if score is not None else float("-inf")
+
+
+def assemble_context(
+    ranked_docs: list[dict[str, Any]],
+    build_messages: Callable[[list[dict[str, Any]]], list[dict]],
+    budget_tokens: int,
+    counter: TokenCounter,
+    snippet_max_tokens: int = 200,
+) -> tuple[list[dict], list[dict[str, Any]], dict[str, Any]]:
+    """Greedily fill the prompt with the highest-scoring documents until ``budget_tokens``.
+
+    Each snippet is capped at ``snippet_max_tokens`` and trimmed at sentence boundaries;
+    documents that no longer fit are dropped. Returns (messages, snippets, stats).
+    """
+    remaining = budget_tokens - count_messages(build_messages([]), counter)
+    snippets: list[dict[str, Any]] = []
+    trimmed = 0
+    dropped = 0
+    for doc in sorted(ranked_docs, key=_score, reverse=True):
+        entry = {
+            "id": doc.get("id"),
+            "title": doc.get("title"),
+            "source": doc.get("source"),
+            "created_at": doc.get("created_at"),
+            "snippet": "",
+            "score": doc.get("score"),
+        }
+        overhead = counter.count(json.dumps(entry)) + 1
+        content = " ".join((doc.get("content") or "").split())
+        allowance = min(snippet_max_tokens, remaining - overhead)
+        text = trim_to_tokens(content, allowance, counter)
+        entry["snippet"] = text
+        cost = counter.count(json.dumps(entry)) + 1
+        if text and cost > remaining:
+            # JSON escaping can cost more than the raw text; shrink once by the overshoot.
+            text = trim_to_tokens(text, allowance - (cost - remaining), counter)
+            entry["snippet"] = text
+            cost = counter.count(json.dumps(entry)) + 1
+        if cost > remaining or (content and not text):
+            dropped += 1
+            continue
+        if text != content:
+            trimmed += 1
+        snippets.append(entry)
+        remaining -= cost
+
+    messages = build_messages(snippets)
+    stats = {
+        "prompt_tokens": count_messages(messages, counter),
+        "budget_tokens": budget_tokens,
+        "tokenizer": counter.name,
+        "docs_included": len(snippets),
+        "docs_trimmed": trimmed,
+        "docs_dropped": dropped,
+    }
+    return messages, snippets, stats
@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+def normalize_query(text: str) -> str:
+    return " ".join((text or "").split()).casefold()
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _valid_row(row) -> bool:
+    """A persisted ``[model, text, stored_at, vector]`` row; anything else is skipped on load."""
+    if not isinstance(row, list) or len(row) != 4:
+        return False
+    model, text, stored_at, vector = row
+    return (
+        isinstance(model, str)
+        and isinstance(text, str)
+        and _is_number(stored_at)
+        and isinstance(vector, list)
+        and all(_is_number(value) for value in vector)
+    )
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU of query embeddings with a TTL, keyed by (embed model, normalised query).
+
+    With a ``path``, ``put`` rewrites the file at most once per ``persist_interval_s``; call
+    ``flush`` (e.g. at shutdown) to write whatever is still pending.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_s: float = 3600.0,
+        path: Path | None = None,
+        persist_interval_s: float = 5.0,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl_s = ttl_s
+        self.path = Path(path) if path else None
+        self.persist_interval_s = persist_interval_s
+        self._entries: OrderedDict[tuple[str, str], tuple[float, list[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._persisted_at = float("-inf")
+        if self.path and self.path.exists():
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load(self) -> None:
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                rows = json.load(f)
+        except Exception:  # noqa: BLE001
+            return
+        now = time.time()
+        for row in rows if isinstance(rows, list) else []:
+            if not _valid_row(row):
+                continue
+            model, text, stored_at, vector = row
+            if now - stored_at < self.ttl_s:
+                self._entries[(model, text)] = (stored_at, vector)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def flush(self) -> None:
+        """Write pending entries to ``path``; serialising happens outside the lookup lock."""
+        if not self.path:
+            return
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                rows = [[*key, *entry] for key, entry in self._entries.items()]
+                self._dirty = False
+                self._persisted_at = time.monotonic()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(rows, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+
+    def _mark_dirty(self) -> bool:
+        """Record unsaved changes (caller holds the lock); True when a debounced write is due."""
+        self._dirty = True
+        return time.monotonic() - self._persisted_at >= self.persist_interval_s
+
+    def get(self, model: str, text: str) -> list[float] | None:
+        key = (model, normalize_query(text))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, vector = entry
+            if time.time() - stored_at >= self.ttl_s:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return vector
+
+    def put(self, model: str, text: str, vector: list[float]) -> None:
+        key = (model, normalize_query(text))
+        with self._lock:
+            self._entries[key] = (time.time(), list(vector))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            due = self._mark_dirty()
+        if due:
+            self.flush()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._mark_dirty()
+        self.flush()
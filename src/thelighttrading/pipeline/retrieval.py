@@ -1,9 +1,17 @@
 import math
+import time
 from typing import Iterable, Sequence
 
+import numpy as np
+
+from .lexical import LexicalIndex
+
 
 Vector = Sequence[float]
 
+EMBEDDING_DTYPES = ("float32", "float16", "int8")
+SCORE_CHUNK_ROWS = 8192
+
 
 def cosine_similarity(vec_a: Vector, vec_b: Vector) -> float:
     if not vec_a or not vec_b:
@@ -22,13 +30,275 @@ def cosine_similarity(vec_a: Vector, vec_b: Vector) -> float:
     return dot / (math.sqrt(norm_a) * math.sqrt(norm_b))
 
 
-def rank_documents(query_embedding: Vector, documents: Iterable[dict], top_k: int = 5) -> list[dict]:
-    scored = []
-    for doc in documents:
-        embedding = doc.get("embedding")
-        if not embedding:
-            continue
-        score = cosine_similarity(query_embedding, embedding)
-        scored.append({**doc, "score": score})
-    scored.sort(key=lambda item: item.get("score", 0.0), reverse=True)
-    return scored[: max(top_k, 0)]
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    return matrix / norms
+
+
+def quantize_rows(matrix: np.ndarray, dtype: str) -> tuple[np.ndarray, np.ndarray | None]:
+    """Encode rows as ``dtype``; int8 uses one float32 scale per row (max-abs / 127)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if dtype == "float32":
+        return matrix, None
+    if dtype == "float16":
+        return matrix.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(matrix).max(axis=1) / 127.0 if matrix.size else np.empty(0, dtype=np.float32)
+        scales[scales == 0.0] = 1.0
+        return np.round(matrix / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+    raise ValueError(f"unsupported_embedding_dtype: {dtype}")
+
+
+def dequantize_rows(data: np.ndarray, scales: np.ndarray | None = None) -> np.ndarray:
+    matrix = np.asarray(data, dtype=np.float32)
+    return matrix * scales[:, None] if scales is not None else matrix
+
+
+def _score_matrix(matrix: np.ndarray, query: np.ndarray, scales: np.ndarray | None = None) -> np.ndarray:
+    """``matrix @ query`` for float32 or quantised rows, upcasting quantised rows in bounded chunks."""
+    if matrix.dtype == np.float32:
+        scores = np.asarray(matrix @ query, dtype=np.float32)
+    else:
+        scores = np.empty(matrix.shape[0], dtype=np.float32)
+        for start in range(0, matrix.shape[0], SCORE_CHUNK_ROWS):
+            block = matrix[start : start + SCORE_CHUNK_ROWS]
+            scores[start : start + SCORE_CHUNK_ROWS] = block.astype(np.float32) @ query
+    if scales is not None:
+        scores *= scales
+    return scores
+
+
+def _top_k_rows(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Return row positions of the best ``top_k`` scores, best first, ties by position."""
+    if top_k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if top_k < scores.size:
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        # argpartition does not keep ties stable; widen to every row tied with the cut-off score.
+        cutoff = scores[candidates].min()
+        candidates = np.flatnonzero(scores >= cutoff)
+    else:
+        candidates = np.arange(scores.size)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:top_k]
+
+
+class VectorIndex:
+    """Exact cosine index backed by one L2-normalised matrix (float32, float16 or scaled int8)."""
+
+    def __init__(self, dims: int):
+        self.dims = dims
+        self.ids: list[str] = []
+        self._matrix = np.empty((0, dims), dtype=np.float32)
+        self._scales: np.ndarray | None = None
+        self._positions: dict[str, int] | None = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self._matrix.nbytes + (self._scales.nbytes if self._scales is not None else 0))
+
+    @classmethod
+    def from_matrix(
+        cls,
+        ids: Sequence[str],
+        matrix: np.ndarray,
+        normalized: bool = False,
+        scales: np.ndarray | None = None,
+    ) -> "VectorIndex":
+        index = cls(matrix.shape[1])
+        index.ids = list(ids)
+        index._matrix = matrix if normalized else _normalize_rows(np.asarray(matrix, dtype=np.float32))
+        index._scales = scales
+        return index
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[dict], dims: int) -> "VectorIndex":
+        ids = []
+        vectors = []
+        for doc in documents:
+            embedding = doc.get("embedding")
+            if not embedding or len(embedding) != dims:
+                continue
+            ids.append(doc["id"])
+            vectors.append(embedding)
+        index = cls(dims)
+        index.add(ids, vectors)
+        return index
+
+    def add(self, ids: Sequence[str], embeddings: Sequence[Vector] | np.ndarray) -> None:
+        if not len(ids):
+            return
+        matrix = _normalize_rows(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), self.dims))
+        data, scales = quantize_rows(matrix, np.dtype(self._matrix.dtype).name)
+        self._matrix = np.vstack([self._matrix, data])
+        if self._scales is not None:
+            self._scales = np.concatenate([self._scales, scales])
+        self.ids.extend(ids)
+
+    def positions(self, ids: Iterable[str]) -> np.ndarray:
+        if self._positions is None or len(self._positions) != len(self.ids):
+            self._positions = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        return np.asarray([self._positions[doc_id] for doc_id in ids if doc_id in self._positions], dtype=np.int64)
+
+    def search(self, query_embedding: Vector, top_k: int = 5, rows: np.ndarray | None = None) -> list[tuple[str, float]]:
+        """Best ``top_k`` (id, cosine) pairs, optionally scoring only the given candidate ``rows``."""
+        if len(query_embedding) != self.dims or not self.ids:
+            return []
+        if rows is None:
+            rows = np.arange(len(self.ids))
+            matrix = self._matrix
+            scales = self._scales
+        else:
+            rows = np.sort(np.asarray(rows, dtype=np.int64))
+            matrix = self._matrix[rows]
+            scales = self._scales[rows] if self._scales is not None else None
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0:
+            scores = np.zeros(len(rows), dtype=np.float32)
+        else:
+            scores = _score_matrix(matrix, query / norm, scales)
+        best = _top_k_rows(scores, top_k)
+        return [(self.ids[rows[pos]], float(scores[pos])) for pos in best]
+
+
+class TimeIndex:
+    """Document positions sorted by ``created_ts`` so a time window is two bisections."""
+
+    def __init__(self, timestamps: Sequence[float | None], ids: Sequence[str] | None = None):
+        values = np.asarray([np.nan if ts is None else ts for ts in timestamps], dtype=np.float64)
+        known = np.flatnonzero(~np.isnan(values))
+        self._order = known[np.argsort(values[known], kind="stable")]
+        self._sorted = values[self._order]
+        self._ids = list(ids) if ids is not None else None
+
+    @classmethod
+    def from_documents(cls, documents: Sequence[dict]) -> "TimeIndex":
+        return cls([doc.get("created_ts") for doc in documents], [doc.get("id") for doc in documents])
+
+    def window(self, since: float | None = None, until: float | None = None) -> np.ndarray:
+        """Positions with ``since <= created_ts <= until``; undated docs are never inside a window."""
+        start = 0 if since is None else int(np.searchsorted(self._sorted, since, side="left"))
+        end = len(self._sorted) if until is None else int(np.searchsorted(self._sorted, until, side="right"))
+        return np.sort(self._order[start:end])
+
+    def window_ids(self, since: float | None = None, until: float | None = None) -> list[str]:
+        """Document ids inside the window; needs an index built with ``ids``."""
+        if self._ids is None:
+            raise ValueError("time_index_without_ids")
+        return [self._ids[pos] for pos in self.window(since, until)]
+
+
+def apply_recency_decay(
+    hits: Sequence[tuple[str, float]],
+    timestamps: dict[str, float | None],
+    half_life_s: float,
+    now: float,
+) -> list[tuple[str, float]]:
+    """Scale each score by ``0.5 ** (age / half_life_s)`` and re-sort; undated docs get no boost or penalty."""
+    decayed = []
+    for doc_id, score in hits:
+        ts = timestamps.get(doc_id)
+        factor = 0.5 ** (max(now - ts, 0.0) / half_life_s) if ts is not None else 1.0
+        decayed.append((doc_id, score * factor))
+    decayed.sort(key=lambda item: item[1], reverse=True)
+    return decayed
+
+
+def benchmark_quantization(matrix: np.ndarray, queries: np.ndarray, top_k: int = 10, dtype: str = "int8") -> dict:
+    """Recall@k of exact search over ``dtype`` rows against float32, plus index memory."""
+    matrix = _normalize_rows(np.asarray(matrix, dtype=np.float32))
+    ids = [str(row) for row in range(matrix.shape[0])]
+    reference = VectorIndex.from_matrix(ids, matrix, normalized=True)
+    data, scales = quantize_rows(matrix, dtype)
+    quantized = VectorIndex.from_matrix(ids, data, normalized=True, scales=scales)
+    recalls = []
+    for query in queries:
+        truth = {doc_id for doc_id, _ in reference.search(query, top_k)}
+        found = {doc_id for doc_id, _ in quantized.search(query, top_k)}
+        recalls.append(len(truth & found) / len(truth) if truth else 1.0)
+    recall = float(np.mean(recalls)) if recalls else 1.0
+    return {
+        "dtype": dtype,
+        "top_k": top_k,
+        "recall_at_k": recall,
+        "recall_delta": recall - 1.0,
+        "float32_bytes": reference.nbytes,
+        "bytes": quantized.nbytes,
+        "compression": reference.nbytes / max(quantized.nbytes, 1),
+    }
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[tuple[str, float]]], k: int = 60) -> list[tuple[str, float]]:
+    fused: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, (doc_id, _score) in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def rank_documents(
+    query_embedding: Vector | None,
+    documents: Iterable[dict],
+    top_k: int = 5,
+    index: VectorIndex | None = None,
+    mode: str = "vector",
+    query_text: str = "",
+    lexical_index: LexicalIndex | None = None,
+    fusion_depth: int = 50,
+    since: float | None = None,
+    until: float | None = None,
+    recency_half_life_s: float | None = None,
+    now: float | None = None,
+    time_index: TimeIndex | None = None,
+) -> list[dict]:
+    """Rank ``documents`` by cosine similarity (``vector``), BM25 (``lexical``) or
+    reciprocal rank fusion of both (``hybrid``).
+
+    ``since``/``until`` (epoch seconds, matched against ``created_ts``) restrict
+    the candidates before scoring; ``recency_half_life_s`` decays scores by age.
+    Pass a prebuilt ``time_index`` over ``documents`` to avoid re-sorting them per query.
+    """
+    documents = list(documents)
+    top_k = max(top_k, 0)
+    decay = bool(recency_half_life_s and recency_half_life_s > 0)
+    depth = top_k if mode == "vector" and not decay else max(top_k, fusion_depth)
+
+    candidate_ids = None
+    if since is not None or until is not None:
+        if time_index is None:
+            time_index = TimeIndex.from_documents(documents)
+        candidate_ids = time_index.window_ids(since, until)
+
+    rankings = []
+    if mode in {"vector", "hybrid"} and query_embedding is not None:
+        if index is None:
+            index = VectorIndex.from_documents(documents, dims=len(query_embedding))
+        rows = index.positions(candidate_ids) if candidate_ids is not None else None
+        rankings.append(index.search(query_embedding, top_k=depth, rows=rows))
+    if mode in {"lexical", "hybrid"}:
+        if lexical_index is None:
+            lexical_index = LexicalIndex.from_documents(documents)
+        candidates = set(candidate_ids) if candidate_ids is not None else None
+        rankings.append(lexical_index.search(query_text, top_k=depth, candidates=candidates))
+
+    if mode == "hybrid":
+        hits = reciprocal_rank_fusion(rankings)
+    else:
+        hits = rankings[0] if rankings else []
+
+    by_id = {doc.get("id"): doc for doc in documents}
+    if decay:
+        timestamps = {doc_id: by_id[doc_id].get("created_ts") for doc_id, _ in hits if doc_id in by_id}
+        hits = apply_recency_decay(hits, timestamps, recency_half_life_s, time.time() if now is None else now)
+
+    ranked = []
+    for doc_id, score in hits[:top_k]:
+        doc = by_id.get(doc_id)
+        if doc is not None:
+            ranked.append({**doc, "score": score})
+    return ranked
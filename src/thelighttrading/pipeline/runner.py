@@ -1,3 +1,4 @@
+import atexit
 import hashlib
 import json
 import time
@@ -8,9 +9,25 @@ from typing import Any
 import shutil
 
 from ..config.settings import get_settings
+from ..llm_router.constraints import output_constraint
+from ..observability.metrics import metrics
 from ..policy import load_policy_text
-from .local_llm_client import chat_completion, embed_texts
-from .retrieval import rank_documents
+from ..protocols.schemas import PipelineDecision
+from .ann import load_or_train_ivf
+from .embedding_store import EmbeddingStore, migrate_json_index
+from .lexical import LEXICAL_NAME, LexicalIndex
+from .local_llm_client import chat_completion, embed_texts, embed_texts_batched, tokenize_count
+from .news_catalog import NewsCatalog, doc_text, hash_content, parse_timestamp
+from .prompt_budget import TokenCounter, assemble_context
+from .query_cache import QueryEmbeddingCache
+from .retrieval import TimeIndex, VectorIndex, rank_documents
+
+RETRIEVAL_MODES = {"vector", "lexical", "hybrid"}
+
+_query_cache: QueryEmbeddingCache | None = None
+_query_cache_config: tuple | None = None
+_time_index: TimeIndex | None = None
+_time_index_key: tuple | None = None
 
 
 def _repo_root() -> Path:
@@ -34,20 +51,6 @@ def _deterministic_embedding(text: str, dims: int = 8) -> list[float]:
     return values
 
 
-def _hash_content(text: str) -> str:
-    return hashlib.sha256(text.encode("utf-8")).hexdigest()
-
-
-def _load_json(path: Path) -> dict | None:
-    if not path.exists():
-        return None
-    try:
-        with path.open("r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:  # noqa: BLE001
-        return None
-
-
 def _seed_news_samples(news_dir: Path) -> None:
     if any(news_dir.glob("*.json")):
         return
@@ -61,86 +64,166 @@ def _seed_news_samples(news_dir: Path) -> None:
             shutil.copy2(sample, dest)
 
 
-def _load_documents(news_dir: Path) -> list[dict[str, Any]]:
-    docs = []
-    for path in sorted(news_dir.glob("*.json")):
-        data = _load_json(path)
-        if not data:
-            continue
-        doc_id = data.get("id") or path.stem
-        title = data.get("title") or ""
-        content = data.get("content") or ""
-        source = data.get("source") or ""
-        created_at = data.get("created_at") or None
-        docs.append(
-            {
-                "id": doc_id,
-                "title": title,
-                "content": content,
-                "source": source,
-                "created_at": created_at,
-                "path": str(path),
-            }
-        )
-    return docs
+def _embedding_model_id(mode: str) -> str:
+    if mode == "mock":
+        return "deterministic_sha256"
+    return get_settings().llm_embed_model_path or "auto"
 
 
-def _ensure_embeddings(docs: list[dict[str, Any]], index_dir: Path, mode: str) -> list[dict[str, Any]]:
+def _doc_metadata(doc: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "title": doc.get("title"),
+        "source": doc.get("source"),
+        "created_at": doc.get("created_at"),
+    }
+
+
+def _ensure_embeddings(docs: list[dict[str, Any]], store: EmbeddingStore, mode: str) -> dict[str, list[float]]:
+    """Embed new or changed docs into ``store``.
+
+    Returns fallback vectors for docs the embedding server could not embed;
+    these are used for this run only and are never persisted.
+    """
     settings = get_settings()
-    index_dir.mkdir(parents=True, exist_ok=True)
-    embeddings_map: dict[str, list[float]] = {}
+    updates: list[tuple[dict[str, Any], list[float]]] = []
+    fallback: dict[str, list[float]] = {}
 
     texts_to_embed = []
-    doc_ids_to_embed = []
+    docs_to_embed = []
 
     for doc in docs:
-        doc_id = doc["id"]
-        content = f"{doc.get('title', '')}\n{doc.get('content', '')}".strip()
-        content_hash = _hash_content(content)
-        index_path = index_dir / f"{doc_id}.json"
-        index_data = _load_json(index_path)
-        if index_data and index_data.get("content_hash") == content_hash:
-            embedding = index_data.get("embedding")
-            if embedding:
-                embeddings_map[doc_id] = embedding
-                continue
+        content = doc_text(doc)
+        if store.content_hash(doc["id"]) == doc["content_hash"]:
+            continue
         if mode == "mock":
-            embeddings_map[doc_id] = _deterministic_embedding(content)
+            updates.append((doc, _deterministic_embedding(content)))
         else:
             texts_to_embed.append(content)
-            doc_ids_to_embed.append(doc_id)
-        doc["content_hash"] = content_hash
+            docs_to_embed.append(doc)
 
     if texts_to_embed:
-        try:
-            vectors = embed_texts(texts_to_embed, settings)
-            for doc_id, vector in zip(doc_ids_to_embed, vectors):
-                embeddings_map[doc_id] = vector
-        except Exception:  # noqa: BLE001
-            for doc_id, content in zip(doc_ids_to_embed, texts_to_embed):
-                embeddings_map[doc_id] = _deterministic_embedding(content)
+        vectors = embed_texts_batched(texts_to_embed, settings)
+        for doc, content, vector in zip(docs_to_embed, texts_to_embed, vectors):
+            if vector:
+                updates.append((doc, vector))
+            else:
+                fallback[doc["id"]] = _deterministic_embedding(content)
+        metrics.embed_texts_total += len(texts_to_embed)
+        metrics.embed_texts_failed += len(fallback)
+
+    updates = [(doc, vector) for doc, vector in updates if vector]
+    if store.dims and any(len(vector) != store.dims for _, vector in updates):
+        # The embedding model changed dimension: start over rather than mix vector spaces.
+        store.reset()
+        return _ensure_embeddings(docs, store, mode)
+
+    for doc, vector in updates:
+        store.upsert(doc["id"], doc["content_hash"], vector, _doc_metadata(doc))
+    store.flush()
+    return fallback
+
+
+def _get_query_cache() -> QueryEmbeddingCache | None:
+    global _query_cache, _query_cache_config
+    settings = get_settings()
+    if settings.query_cache_size <= 0:
+        return None
+    path = Path(settings.data_dir) / "state" / "query_cache.json" if settings.query_cache_persist else None
+    config = (settings.query_cache_size, settings.query_cache_ttl_s, path, settings.query_cache_persist_interval_s)
+    if _query_cache is None or _query_cache_config != config:
+        _flush_query_cache()
+        _query_cache = QueryEmbeddingCache(
+            settings.query_cache_size,
+            settings.query_cache_ttl_s,
+            path,
+            persist_interval_s=settings.query_cache_persist_interval_s,
+        )
+        _query_cache_config = config
+    return _query_cache
 
-    for doc in docs:
-        doc_id = doc["id"]
-        embedding = embeddings_map.get(doc_id)
-        if not embedding:
-            continue
-        doc["embedding"] = embedding
-        index_path = index_dir / f"{doc_id}.json"
-        index_payload = {
-            "id": doc_id,
-            "content_hash": doc.get("content_hash") or _hash_content(doc.get("content", "")),
-            "embedding": embedding,
-            "metadata": {
-                "title": doc.get("title"),
-                "source": doc.get("source"),
-                "created_at": doc.get("created_at"),
-            },
-        }
-        with index_path.open("w", encoding="utf-8") as f:
-            json.dump(index_payload, f, indent=2)
 
-    return docs
+def _flush_query_cache() -> None:
+    if _query_cache is not None:
+        _query_cache.flush()
+
+
+atexit.register(_flush_query_cache)
+
+
+def _embed_query(query_text: str, mode: str) -> list[float]:
+    if mode == "mock":
+        return _deterministic_embedding(query_text)
+    cache = _get_query_cache()
+    model = _embedding_model_id(mode)
+    if cache is not None:
+        cached = cache.get(model, query_text)
+        if cached is not None:
+            metrics.query_cache_hits += 1
+            return cached
+        metrics.query_cache_misses += 1
+    try:
+        vector = embed_texts([query_text], get_settings())[0]
+    except Exception:  # noqa: BLE001
+        return _deterministic_embedding(query_text)
+    if cache is not None and vector:
+        cache.put(model, query_text, vector)
+    return vector
+
+
+def _sync_lexical_index(docs: list[dict[str, Any]], lexical: LexicalIndex) -> None:
+    current_ids = set()
+    for doc in docs:
+        current_ids.add(doc["id"])
+        if lexical.content_hash(doc["id"]) != doc["content_hash"]:
+            lexical.upsert(doc["id"], doc["content_hash"], doc_text(doc))
+    for doc_id in [doc_id for doc_id in lexical.doc_terms if doc_id not in current_ids]:
+        lexical.remove(doc_id)
+    lexical.flush()
+
+
+def _build_index(docs: list[dict[str, Any]], store: EmbeddingStore, fallback: dict[str, list[float]]) -> VectorIndex | None:
+    ids = [doc["id"] for doc in docs if store.row(doc["id"]) is not None]
+    rows = [store.row(doc_id) for doc_id in ids]
+    index = None
+    if ids:
+        settings = get_settings()
+        matrix = store.matrix()
+        scales = store.scales()
+        if rows != list(range(len(store))):
+            matrix = matrix[rows]
+            scales = scales[rows] if scales is not None else None
+        if settings.retrieval_index == "ivf":
+            index = load_or_train_ivf(
+                store.index_dir,
+                ids,
+                [store.content_hashes[row] for row in rows],
+                matrix,
+                nlist=settings.retrieval_ivf_nlist,
+                nprobe=settings.retrieval_ivf_nprobe,
+                scales=scales,
+            )
+        else:
+            index = VectorIndex.from_matrix(ids, matrix, normalized=True, scales=scales)
+    for doc_id, vector in fallback.items():
+        if index is None:
+            index = VectorIndex(len(vector))
+        if len(vector) == index.dims:
+            index.add([doc_id], [vector])
+    return index
+
+
+def _get_time_index(docs: list[dict[str, Any]], catalog_path: Path) -> TimeIndex:
+    """Reuse the sorted time index until the news catalog is rewritten (or replaced by another process)."""
+    global _time_index, _time_index_key
+    try:
+        stat = catalog_path.stat()
+        key = (str(catalog_path), stat.st_mtime_ns, stat.st_size, len(docs))
+    except OSError:
+        key = None
+    if _time_index is None or key is None or _time_index_key != key:
+        _time_index = TimeIndex.from_documents(docs)
+        _time_index_key = key
+    return _time_index
 
 
 def _build_prompt(query: str, snippets: list[dict[str, Any]], policy_text: str) -> list[dict[str, str]]:
@@ -148,12 +231,13 @@ def _build_prompt(query: str, snippets: list[dict[str, Any]], policy_text: str)
         "You are a trading decision engine. Reply ONLY with JSON that matches this schema: "
         "{summary: string, signals: [{name: string, direction: bullish|bearish|neutral, confidence: 0-1}], "
         "action: {type: HOLD|SIMULATE|EXECUTE, reason: string}, risk: {level: low|medium|high, notes: string}}. "
-        "Do not include markdown or extra keys."
+        "Do not include markdown or extra keys.\n"
+        f"Policy: {policy_text}"
     )
+    # Static schema and policy lead; per-run documents and query follow so the server can reuse the prefix cache.
     user_payload = {
-        "query": query,
         "documents": snippets,
-        "policy": policy_text,
+        "query": query,
     }
     return [
         {"role": "system", "content": system},
@@ -202,9 +286,43 @@ def _log_pipeline(log_path: Path, message: str) -> None:
         f.write(f"[{timestamp}] {message}\n")
 
 
-def run_pipeline(query: str, top_k: int = 5) -> dict[str, Any]:
+def _resolve_window(
+    since: float | str | None,
+    until: float | str | None,
+    max_age_s: float | None,
+    now: float,
+) -> tuple[float | None, float | None]:
+    since_ts = parse_timestamp(since)
+    until_ts = parse_timestamp(until)
+    if since is not None and since_ts is None:
+        raise ValueError("invalid_since")
+    if until is not None and until_ts is None:
+        raise ValueError("invalid_until")
+    if max_age_s is not None:
+        age_floor = now - float(max_age_s)
+        since_ts = age_floor if since_ts is None else max(since_ts, age_floor)
+    return since_ts, until_ts
+
+
+def run_pipeline(
+    query: str,
+    top_k: int = 5,
+    retrieval_mode: str | None = None,
+    since: float | str | None = None,
+    until: float | str | None = None,
+    max_age_s: float | None = None,
+    recency_half_life_s: float | None = None,
+) -> dict[str, Any]:
     settings = get_settings()
     mode = settings.llm_mode
+    retrieval_mode = retrieval_mode or settings.retrieval_mode
+    if retrieval_mode not in RETRIEVAL_MODES:
+        raise ValueError(f"invalid_retrieval_mode: {retrieval_mode}")
+    now = time.time()
+    since_ts, until_ts = _resolve_window(since, until, max_age_s, now)
+    if recency_half_life_s is None:
+        recency_half_life_s = settings.retrieval_recency_half_life_s
+    recency_half_life_s = float(recency_half_life_s)
     data_root = Path(settings.data_dir)
     log_root = Path(settings.log_dir)
     state_dir = data_root / "state"
@@ -215,35 +333,66 @@ def run_pipeline(query: str, top_k: int = 5) -> dict[str, Any]:
 
     _seed_news_samples(news_dir)
 
-    docs = _load_documents(news_dir)
-    docs = _ensure_embeddings(docs, index_dir, mode)
+    catalog = NewsCatalog(state_dir / "news_catalog.json")
+    refresh = catalog.refresh(news_dir)
+    catalog.flush()
+    metrics.news_files_reparsed_total += refresh.reparsed
+    docs = refresh.docs
 
-    query_text = query or ""
-    if mode == "mock":
-        query_embedding = _deterministic_embedding(query_text)
-    else:
-        try:
-            query_embedding = embed_texts([query_text], settings)[0]
-        except Exception:  # noqa: BLE001
-            query_embedding = _deterministic_embedding(query_text)
-
-    ranked = rank_documents(query_embedding, docs, top_k=top_k)
-    snippets = []
-    for doc in ranked:
-        content = doc.get("content", "")
-        snippet = content[:280]
-        snippets.append(
-            {
-                "id": doc.get("id"),
-                "title": doc.get("title"),
-                "source": doc.get("source"),
-                "created_at": doc.get("created_at"),
-                "snippet": snippet,
-                "score": doc.get("score"),
-            }
-        )
+    for doc in docs:
+        doc.setdefault("content_hash", hash_content(doc_text(doc)))
+        doc.setdefault("created_ts", parse_timestamp(doc.get("created_at")))
+
+    lexical = None
+    if retrieval_mode in {"lexical", "hybrid"}:
+        lexical = LexicalIndex(index_dir / LEXICAL_NAME)
+        _sync_lexical_index(docs, lexical)
 
+    query_text = query or ""
+    index = None
+    query_embedding = None
+    if retrieval_mode in {"vector", "hybrid"}:
+        store = EmbeddingStore(index_dir, model=_embedding_model_id(mode), dtype=settings.retrieval_embedding_dtype)
+        migrate_json_index(index_dir, store)
+        current_ids = {doc["id"] for doc in docs}
+        store.remove([doc_id for doc_id in store.ids if doc_id not in current_ids])
+        fallback = _ensure_embeddings(docs, store, mode)
+        index = _build_index(docs, store, fallback)
+
+        query_embedding = _embed_query(query_text, mode)
+        if index is None:
+            query_embedding = None
+
+    time_index = None
+    if since_ts is not None or until_ts is not None:
+        time_index = _get_time_index(docs, catalog.catalog_path)
+
+    ranked = rank_documents(
+        query_embedding,
+        docs,
+        top_k=top_k,
+        index=index,
+        mode=retrieval_mode,
+        query_text=query_text,
+        lexical_index=lexical,
+        since=since_ts,
+        until=until_ts,
+        recency_half_life_s=recency_half_life_s,
+        now=now,
+        time_index=time_index,
+    )
     policy_text = load_policy_text()
+    if mode != "mock" and settings.rag_tokenizer == "server":
+        counter = TokenCounter(lambda text: tokenize_count(text, settings))
+    else:
+        counter = TokenCounter()
+    messages, snippets, prompt_stats = assemble_context(
+        ranked,
+        lambda selected: _build_prompt(query_text, selected, policy_text),
+        budget_tokens=settings.rag_context_tokens - settings.rag_max_tokens,
+        counter=counter,
+        snippet_max_tokens=settings.rag_snippet_max_tokens,
+    )
     decision = None
     if mode == "mock":
         decision = {
@@ -255,12 +404,18 @@ def run_pipeline(query: str, top_k: int = 5) -> dict[str, Any]:
             "risk": {"level": "low", "notes": "mock_mode"},
         }
     else:
-        messages = _build_prompt(query_text, snippets, policy_text)
         try:
-            response = chat_completion(messages, settings)
+            response = chat_completion(
+                messages,
+                settings,
+                max_tokens=settings.rag_max_tokens,
+                extra=output_constraint(PipelineDecision, settings.llm_output_constraint),
+            )
         except Exception:  # noqa: BLE001
             response = ""
-        decision = _parse_decision(response) or _fallback_decision("invalid_model_output")
+        decision = _parse_decision(response)
+        metrics.observe_llm_output("rag", decision is not None)
+        decision = decision or _fallback_decision("invalid_model_output")
 
     decision = _enforce_signing_policy(decision)
 
@@ -272,8 +427,16 @@ def run_pipeline(query: str, top_k: int = 5) -> dict[str, Any]:
         "mode": mode,
         "query": query_text,
         "top_k": top_k,
+        "retrieval_mode": retrieval_mode,
+        "time_window": {"since": since_ts, "until": until_ts, "recency_half_life_s": recency_half_life_s or None},
         "selected_docs": snippets,
+        "prompt": prompt_stats,
         "decision": decision,
+        "catalog": {
+            "files": refresh.files,
+            "reparsed": refresh.reparsed,
+            "evicted": len(refresh.evicted_ids),
+        },
     }
 
     report_path = reports_dir / f"{run_id}.json"
@@ -4,6 +4,7 @@ from pathlib import Path
 from .schemas import ExecutionReport
 from .signing import compute_hash, sign_packet, derive_public_key
 from ..config.settings import get_settings
+from ..memory.write_behind import write_atomic
 
 
 def _report_body(report: ExecutionReport) -> dict:
@@ -52,10 +53,11 @@ def build_execution_report(run_record: dict, status_override: str | None = None)
     return report
 
 
+def report_path(run_id: str) -> Path:
+    return Path(get_settings().data_dir) / "state" / "reports" / f"{run_id}.json"
+
+
 def persist_report(run_id: str, report: ExecutionReport) -> Path:
-    reports_dir = Path(get_settings().data_dir) / "state" / "reports"
-    reports_dir.mkdir(parents=True, exist_ok=True)
-    report_path = reports_dir / f"{run_id}.json"
-    with report_path.open("w", encoding="utf-8") as f:
-        json.dump(report.model_dump(), f, indent=2)
-    return report_path
+    path = report_path(run_id)
+    write_atomic([(path, json.dumps(report.model_dump(), indent=2).encode("utf-8"))], fsync=get_settings().artefact_fsync)
+    return path
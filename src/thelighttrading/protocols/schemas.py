@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field, field_validator
 
 
@@ -65,6 +65,29 @@ class WatchdogDecision(BaseModel):
     risk: str
 
 
+class DecisionSignal(BaseModel):
+    name: str
+    direction: Literal["bullish", "bearish", "neutral"]
+    confidence: float = Field(ge=0, le=1)
+
+
+class DecisionAction(BaseModel):
+    type: Literal["HOLD", "SIMULATE", "EXECUTE"]
+    reason: str
+
+
+class DecisionRisk(BaseModel):
+    level: Literal["low", "medium", "high"]
+    notes: str
+
+
+class PipelineDecision(BaseModel):
+    summary: str
+    signals: List[DecisionSignal] = Field(default_factory=list)
+    action: DecisionAction
+    risk: DecisionRisk
+
+
 class ExecutionReport(BaseModel):
     report_version: str = "v1"
     run_id: str
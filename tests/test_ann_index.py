@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from thelighttrading.config.settings import get_settings
+from thelighttrading.pipeline.ann import IVF_STATE_NAME, IVFIndex, benchmark_recall, load_or_train_ivf, train_centroids
+from thelighttrading.pipeline.retrieval import VectorIndex, _normalize_rows
+from thelighttrading.pipeline.runner import run_pipeline
+
+
+def _clustered(count: int, dims: int = 16, seed: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, dims))
+    data = centers[rng.integers(0, 20, size=count)] + 0.2 * rng.normal(size=(count, dims))
+    return _normalize_rows(data.astype(np.float32))
+
+
+def test_ivf_full_probe_matches_exact():
+    matrix = _clustered(2000)
+    ids = [f"d{row}" for row in range(len(matrix))]
+    centroids = train_centroids(matrix, 16)
+    ivf = IVFIndex.build(ids, matrix, centroids, nprobe=16)
+    exact = VectorIndex.from_matrix(ids, matrix, normalized=True)
+    query = matrix[5] + 0.05
+
+    assert [doc_id for doc_id, _ in ivf.search(query, 10)] == [doc_id for doc_id, _ in exact.search(query, 10)]
+
+
+def test_benchmark_reports_recall():
+    matrix = _clustered(3000)
+    result = benchmark_recall(matrix, matrix[:20] + 0.01, top_k=5, nlist=20, nprobe=4)
+    assert result["nlist"] == 20
+    assert 0.8 <= result["recall_at_k"] <= 1.0
+
+
+def test_ivf_state_reused_and_extended(tmp_path):
+    matrix = _clustered(500)
+    ids = [f"d{row}" for row in range(len(matrix))]
+    first = load_or_train_ivf(tmp_path, ids, ids, matrix, nlist=8)
+    assert (tmp_path / IVF_STATE_NAME).exists()
+
+    extra = _clustered(10, seed=9)
+    second = load_or_train_ivf(tmp_path, ids + ["new"], ids + ["new"], np.vstack([matrix, extra[:1]]), nlist=8)
+    np.testing.assert_array_equal(first.centroids, second.centroids)
+    np.testing.assert_array_equal(first.assignments, second.assignments[:-1])
+    assert second.search(extra[0], 1)[0][0] == "new"
+
+
+def test_pipeline_ivf_mode_matches_exact(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "mock")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("LOG_DIR", str(tmp_path / "logs"))
+    get_settings.cache_clear()
+    exact = run_pipeline("energy", top_k=3)
+
+    monkeypatch.setenv("RETRIEVAL_INDEX", "ivf")
+    monkeypatch.setenv("RETRIEVAL_IVF_NPROBE", "64")
+    get_settings.cache_clear()
+    approx = run_pipeline("energy", top_k=3)
+
+    assert [d["id"] for d in approx["selected_docs"]] == [d["id"] for d in exact["selected_docs"]]
+    for got, want in zip(approx["selected_docs"], exact["selected_docs"]):
+        assert got["score"] == pytest.approx(want["score"], abs=1e-6)
+    get_settings.cache_clear()
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from thelighttrading.config.settings import get_settings
+from thelighttrading.llm_router import router
+from thelighttrading.llm_router.async_http import close_async_clients, get_async_client
+from thelighttrading.llm_router.health import health_monitor
+from thelighttrading.nodes.news_node import NewsNode
+from thelighttrading.observability.metrics import metrics
+
+
+class _ChatHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        content = payload["messages"][-1]["content"].upper()
+        body = json.dumps({"choices": [{"message": {"content": content}}]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        return
+
+
+@pytest.fixture
+def local_llm(monkeypatch, tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ChatHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("LLM_MODE", "local")
+    monkeypatch.setenv("LLM_PORT", str(server.server_address[1]))
+    monkeypatch.setenv("LOG_DIR", str(tmp_path))
+    monkeypatch.setenv("LLM_HEALTH_REFRESH_S", "0")
+    get_settings.cache_clear()
+    health_monitor.reset()
+    yield tmp_path
+    server.shutdown()
+    server.server_close()
+    health_monitor.reset()
+    get_settings.cache_clear()
+
+
+def test_agenerate_mock_matches_generate(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "mock")
+    monkeypatch.setenv("LOG_DIR", str(tmp_path))
+    get_settings.cache_clear()
+    messages = [{"role": "user", "content": "test"}]
+
+    out = asyncio.run(router.agenerate("parser_qwen", messages))
+    assert out == router.generate("parser_qwen", messages)
+    record = json.loads((Path(tmp_path) / "audit.jsonl").read_text().splitlines()[0])
+    assert record["mode"] == "mock"
+    with pytest.raises(ValueError):
+        asyncio.run(router.agenerate("nope", messages))
+    get_settings.cache_clear()
+
+
+def test_agenerate_overlaps_calls_on_one_loop(local_llm):
+    async def main():
+        try:
+            opened_before = metrics.http_connections_opened
+            prompts = [f"headline {i}" for i in range(6)]
+            outputs = await asyncio.gather(
+                *(router.agenerate("news_llama", [{"role": "user", "content": p}]) for p in prompts)
+            )
+            opened = metrics.http_connections_opened - opened_before
+            again = await router.agenerate("news_llama", [{"role": "user", "content": "again"}])
+            assert metrics.http_connections_opened - opened_before == opened  # idle connection reused
+            return prompts, outputs, again
+        finally:
+            close_async_clients()
+
+    prompts, outputs, again = asyncio.run(main())
+    assert outputs == [p.upper() for p in prompts]
+    assert again == "AGAIN"
+    records = [json.loads(line) for line in (local_llm / "audit.jsonl").read_text().splitlines()]
+    assert {record["mode"] for record in records} == {"local"}
+
+
+def test_agenerate_unreachable(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "local")
+    monkeypatch.setenv("LLM_PORT", "9996")
+    monkeypatch.setenv("LOG_DIR", str(tmp_path))
+    monkeypatch.setenv("LLM_HEALTH_REFRESH_S", "0")
+    get_settings.cache_clear()
+    health_monitor.reset()
+
+    result = asyncio.run(router.agenerate("news_llama", [{"role": "user", "content": "hi"}]))
+    assert "unreachable" in result
+    record = json.loads((Path(tmp_path) / "audit.jsonl").read_text().splitlines()[-1])
+    assert record["mode"] == "local_unreachable"
+    health_monitor.reset()
+    get_settings.cache_clear()
+
+
+def test_node_arun(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "mock")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("LOG_DIR", str(tmp_path / "logs"))
+    get_settings.cache_clear()
+    node = NewsNode()
+    messages = [{"role": "user", "content": "Market up"}]
+
+    result = asyncio.run(node.arun(messages))
+    assert result.node_id == node.id
+    assert result.output == node.run(messages).output
+    get_settings.cache_clear()
+
+
+def test_client_is_per_loop():
+    async def grab():
+        return get_async_client("http://127.0.0.1:1/")
+
+    first = asyncio.run(grab())
+    second = asyncio.run(grab())
+    assert first is not second
+    assert first.host == "127.0.0.1" and first.port == 1
@@ -0,0 +1,150 @@
+import json
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+from thelighttrading.config.settings import get_settings
+from thelighttrading.llm_router import health, router
+from thelighttrading.llm_router.deadline import DeadlineExceeded
+from thelighttrading.llm_router.health import CircuitBreaker, health_monitor
+
+
+def test_breaker_opens_then_half_opens(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(health.time, "time", lambda: clock[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=5)
+
+    breaker.record_failure("refused")
+    assert breaker.state == health.CLOSED and breaker.allow_request()
+    breaker.record_failure("refused")
+    assert breaker.state == health.OPEN
+    assert not breaker.allow_request()
+
+    clock[0] += 5
+    assert breaker.allow_request()
+    assert breaker.state == health.HALF_OPEN
+    assert not breaker.allow_request()  # only one trial call at a time
+
+    breaker.record_failure("still down")
+    assert breaker.state == health.OPEN
+    clock[0] += 5
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.snapshot()["state"] == health.CLOSED
+    assert breaker.failures == 0
+
+
+def test_generate_fails_fast_while_open(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "local")
+    monkeypatch.setenv("LLM_PORT", "9998")
+    monkeypatch.setenv("LOG_DIR", str(tmp_path))
+    monkeypatch.setenv("LLM_HEALTH_REFRESH_S", "0")
+    get_settings.cache_clear()
+    health_monitor.reset()
+
+    calls = []
+
+    def refused(*_args, **_kwargs):
+        calls.append(1)
+        raise requests.ConnectionError("connection refused")
+
+    monkeypatch.setattr(router, "post_completion", refused)
+    messages = [{"role": "user", "content": "hi"}]
+    for _ in range(3):
+        assert "unreachable" in router.generate("news_llama", messages)
+
+    assert len(calls) == 2  # third call short-circuits without touching the network
+    assert health_monitor.breaker("http://127.0.0.1:9998").state == health.OPEN
+    records = [json.loads(line) for line in (Path(tmp_path) / "audit.jsonl").read_text().splitlines()]
+    assert {record["mode"] for record in records} == {"local_unreachable"}
+
+    monkeypatch.setattr(router, "post_completion", lambda *_a, **_k: "ok")
+    breaker = health_monitor.breaker("http://127.0.0.1:9998")
+    breaker.opened_at -= breaker.reset_timeout_s
+    assert router.generate("news_llama", messages) == "ok"
+    assert breaker.state == health.CLOSED
+
+    health_monitor.reset()
+    get_settings.cache_clear()
+
+
+def test_llm_health_reads_cached_state(monkeypatch):
+    from thelighttrading.api import routes
+
+    monkeypatch.setenv("LLM_MODE", "local")
+    monkeypatch.setenv("LLM_PORT", "9997")
+    monkeypatch.setenv("LLM_HEALTH_REFRESH_S", "0")
+    get_settings.cache_clear()
+    health_monitor.reset()
+
+    def no_probe(*_args, **_kwargs):
+        raise AssertionError("health endpoint must not probe synchronously")
+
+    monkeypatch.setattr(health, "get_server_health", no_probe)
+    breaker = health_monitor.breaker("http://127.0.0.1:9997")
+    breaker.record_failure("ConnectionError: refused")
+    breaker.record_failure("ConnectionError: refused")
+
+    data = routes.llm_health()
+    assert data["ok"] is False
+    assert data["circuit"]["state"] == "open"
+    assert "refused" in data["reason"]
+
+    health_monitor.reset()
+    get_settings.cache_clear()
+
+
+def test_llm_health_probes_an_unchecked_backend(monkeypatch):
+    from thelighttrading.api import routes
+
+    monkeypatch.setenv("LLM_MODE", "local")
+    monkeypatch.setenv("LLM_PORT", "9996")
+    monkeypatch.setenv("LLM_HEALTH_REFRESH_S", "0")
+    get_settings.cache_clear()
+    health_monitor.reset()
+
+    data = routes.llm_health()  # nothing listens on 9996
+    assert data["ok"] is False
+    assert data["circuit"]["checked_at"] is not None
+    assert data["circuit"]["failures"] == 1 and data["circuit"]["state"] == "closed"
+    assert data["reason"]
+
+    monkeypatch.setattr(health, "get_server_health", lambda _url: (True, None))
+    health_monitor.probe("http://127.0.0.1:9996")
+    assert routes.llm_health()["ok"] is True
+
+    health_monitor.reset()
+    get_settings.cache_clear()
+
+
+def test_timed_out_trial_does_not_wedge_half_open(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "local")
+    monkeypatch.setenv("LLM_PORT", "9994")
+    monkeypatch.setenv("LOG_DIR", str(tmp_path))
+    monkeypatch.setenv("LLM_HEALTH_REFRESH_S", "0")
+    monkeypatch.setenv("LLM_CIRCUIT_RESET_S", "0")
+    monkeypatch.setenv("LLM_SINGLE_FLIGHT", "false")
+    get_settings.cache_clear()
+    health_monitor.reset()
+    breaker = health_monitor.breaker("http://127.0.0.1:9994")
+    breaker.record_failure("down")
+    breaker.record_failure("down")
+    assert breaker.state == health.OPEN
+
+    def slow(*_args, timeout_s=None, **_kwargs):
+        time.sleep(timeout_s)
+        raise requests.ReadTimeout("read timed out")
+
+    monkeypatch.setattr(router, "post_completion", slow)
+    messages = [{"role": "user", "content": "hi"}]
+    with pytest.raises(DeadlineExceeded):
+        router.generate("news_llama", messages, timeout_s=0.05)
+    assert breaker.state == health.HALF_OPEN
+
+    monkeypatch.setattr(router, "post_completion", lambda *_a, **_k: "ok")
+    assert router.generate("news_llama", messages) == "ok"
+    assert breaker.state == health.CLOSED
+    health_monitor.reset()
+    get_settings.cache_clear()
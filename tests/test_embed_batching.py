@@ -0,0 +1,52 @@
+import threading
+
+import requests
+
+from thelighttrading.config.settings import Settings
+from thelighttrading.pipeline import local_llm_client
+
+
+def _settings() -> Settings:
+    return Settings(llm_embed_batch_size=2, llm_embed_max_in_flight=2, llm_embed_retries=1)
+
+
+def test_batches_retry_and_partial_success(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+    flaky = {"c": 1}
+
+    def fake_embed(texts, settings, timeout_s=30):
+        with lock:
+            calls.append(list(texts))
+            if "bad" in texts:
+                raise requests.Timeout("slow batch")
+            if "c" in texts and flaky["c"]:
+                flaky["c"] -= 1
+                raise requests.HTTPError("503")
+        return [[float(len(text))] for text in texts]
+
+    monkeypatch.setattr(local_llm_client, "embed_texts", fake_embed)
+    monkeypatch.setattr(local_llm_client.time, "sleep", lambda _s: None)
+
+    result = local_llm_client.embed_texts_batched(["a", "bb", "c", "dd", "bad", "e"], _settings())
+
+    assert result == [[1.0], [2.0], [1.0], [2.0], None, None]
+    assert all(len(batch) <= 2 for batch in calls)
+    assert calls.count(["bad", "e"]) == 2
+
+
+def test_connection_refused_fails_fast(monkeypatch):
+    calls = []
+
+    def refused(texts, settings, timeout_s=30):
+        calls.append(texts)
+        raise requests.ConnectionError("refused")
+
+    monkeypatch.setattr(local_llm_client, "embed_texts", refused)
+    monkeypatch.setattr(local_llm_client.time, "sleep", lambda _s: None)
+    settings = Settings(llm_embed_batch_size=1, llm_embed_max_in_flight=1, llm_embed_retries=1)
+
+    result = local_llm_client.embed_texts_batched([str(i) for i in range(20)], settings)
+
+    assert result == [None] * 20
+    assert len(calls) == 2
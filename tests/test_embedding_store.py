@@ -0,0 +1,70 @@
+import json
+
+import numpy as np
+import pytest
+
+from thelighttrading.config.settings import get_settings
+from thelighttrading.pipeline.embedding_store import EmbeddingStore, migrate_json_index
+from thelighttrading.pipeline.runner import run_pipeline
+
+
+def test_store_appends_and_overwrites_rows(tmp_path):
+    store = EmbeddingStore(tmp_path, model="m")
+    store.upsert("a", "h1", [3.0, 4.0])
+    store.upsert("b", "h2", [0.0, 2.0])
+    store.flush()
+
+    reopened = EmbeddingStore(tmp_path, model="m")
+    assert reopened.ids == ["a", "b"]
+    assert reopened.content_hash("a") == "h1"
+    np.testing.assert_allclose(reopened.matrix()[0], [0.6, 0.8], rtol=1e-6)
+
+    reopened.upsert("a", "h3", [1.0, 0.0])
+    reopened.flush()
+    again = EmbeddingStore(tmp_path, model="m")
+    assert again.content_hash("a") == "h3"
+    np.testing.assert_allclose(again.matrix(), [[1.0, 0.0], [0.0, 1.0]], rtol=1e-6)
+
+    with pytest.raises(ValueError):
+        again.upsert("c", "h4", [1.0, 2.0, 3.0])
+    assert len(EmbeddingStore(tmp_path, model="other")) == 0
+
+
+def test_migrate_json_index(tmp_path):
+    legacy = {"id": "doc1", "content_hash": "abc", "embedding": [1.0, 1.0], "metadata": {"title": "T"}}
+    (tmp_path / "doc1.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+    store = EmbeddingStore(tmp_path, model="m")
+    assert migrate_json_index(tmp_path, store) == 1
+    assert not (tmp_path / "doc1.json").exists()
+    assert EmbeddingStore(tmp_path, model="m").metadata == [{"title": "T"}]
+
+
+def test_pipeline_reuses_store_between_runs(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "mock")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("LOG_DIR", str(tmp_path / "logs"))
+    get_settings.cache_clear()
+
+    first = run_pipeline("energy supply", top_k=2)
+    index_dir = tmp_path / "data" / "state" / "index"
+    sidecar_mtime = (index_dir / "embeddings.meta.json").stat().st_mtime_ns
+    second = run_pipeline("energy supply", top_k=2)
+
+    assert [d["id"] for d in first["selected_docs"]] == [d["id"] for d in second["selected_docs"]]
+    assert (index_dir / "embeddings.meta.json").stat().st_mtime_ns == sidecar_mtime
+    assert sorted(p.name for p in index_dir.iterdir()) == ["embeddings.f32", "embeddings.meta.json"]
+    get_settings.cache_clear()
+
+
+def test_store_remove_compacts_rows(tmp_path):
+    store = EmbeddingStore(tmp_path, model="m")
+    for doc_id, vector in [("a", [1.0, 0.0]), ("b", [0.0, 1.0]), ("c", [1.0, 1.0])]:
+        store.upsert(doc_id, doc_id, vector)
+    assert store.remove(["a", "missing"]) == 1
+    store.flush()
+
+    reopened = EmbeddingStore(tmp_path, model="m")
+    assert reopened.ids == ["c", "b"]
+    assert reopened.content_hash("c") == "c"
+    np.testing.assert_allclose(reopened.matrix()[1], [0.0, 1.0], rtol=1e-6)
@@ -0,0 +1,59 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from thelighttrading.config.settings import get_settings
+from thelighttrading.llm_router import http_pool, llama_http_client
+from thelighttrading.observability.metrics import metrics
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply({"data": []})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._reply({"choices": [{"message": {"content": "ok"}}]})
+
+    def log_message(self, *_args):
+        return
+
+
+@pytest.fixture
+def llm_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    get_settings.cache_clear()
+    http_pool.close_sessions()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    http_pool.close_sessions()
+    server.shutdown()
+    server.server_close()
+    get_settings.cache_clear()
+
+
+def test_calls_reuse_one_keepalive_connection(llm_server):
+    requests_before = metrics.http_requests_total
+    opened_before = metrics.http_connections_opened
+
+    for _ in range(3):
+        assert llama_http_client.get_server_health(llm_server) == (True, None)
+        assert llama_http_client.post_completion([{"role": "user", "content": "hi"}], base_url=llm_server) == "ok"
+
+    assert metrics.http_requests_total - requests_before == 6
+    assert metrics.http_connections_opened - opened_before == 1
+    assert http_pool.get_session(llm_server) is http_pool.get_session(llm_server + "/")
+    assert metrics.snapshot()["http_connection_reuse_rate"] > 0
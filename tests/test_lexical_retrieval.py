@@ -0,0 +1,90 @@
+import json
+
+from thelighttrading.config.settings import get_settings
+from thelighttrading.pipeline import runner
+from thelighttrading.pipeline.lexical import LexicalIndex
+from thelighttrading.pipeline.retrieval import rank_documents, reciprocal_rank_fusion
+
+
+DOCS = [
+    {"id": "a", "title": "XOM beats estimates", "content": "Exxon reported strong refining margins."},
+    {"id": "b", "title": "Chip demand", "content": "NVDA and AMD guide higher on data center demand."},
+    {"id": "c", "title": "Macro", "content": "Rates steady as inflation cools."},
+]
+
+
+def test_bm25_matches_exact_tickers(tmp_path):
+    index = LexicalIndex.from_documents(DOCS)
+    assert index.search("NVDA guidance", top_k=1)[0][0] == "b"
+    assert index.search("unknown words", top_k=3) == []
+
+    path = tmp_path / "lexical.json"
+    persisted = LexicalIndex(path)
+    for doc in DOCS:
+        persisted.upsert(doc["id"], "h", f"{doc['title']}\n{doc['content']}")
+    persisted.remove("a")
+    persisted.flush()
+    reloaded = LexicalIndex(path)
+    assert sorted(reloaded.doc_terms) == ["b", "c"]
+    assert "xom" not in reloaded.postings
+
+
+def test_reciprocal_rank_fusion_prefers_agreement():
+    fused = reciprocal_rank_fusion([[("a", 0.9), ("b", 0.8)], [("b", 5.0), ("c", 1.0)]])
+    assert fused[0][0] == "b"
+
+
+def test_hybrid_rank_documents_uses_both_signals():
+    docs = [dict(doc, embedding=vector) for doc, vector in zip(DOCS, [[1.0, 0.0], [0.0, 1.0], [0.9, 0.1]])]
+    ranked = rank_documents([1.0, 0.0], docs, top_k=2, mode="hybrid", query_text="NVDA")
+    assert {doc["id"] for doc in ranked} == {"a", "b"}
+
+
+def test_lexical_mode_skips_embedding_calls(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "local")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("LOG_DIR", str(tmp_path / "logs"))
+    get_settings.cache_clear()
+
+    def fail_embed(*_args, **_kwargs):
+        raise AssertionError("embedding endpoint must not be called")
+
+    monkeypatch.setattr(runner, "embed_texts", fail_embed)
+    monkeypatch.setattr(runner, "embed_texts_batched", fail_embed)
+    monkeypatch.setattr(runner, "chat_completion", lambda *_args, **_kwargs: "")
+
+    news_dir = tmp_path / "data" / "state" / "news"
+    news_dir.mkdir(parents=True)
+    for doc in DOCS:
+        (news_dir / f"{doc['id']}.json").write_text(json.dumps(doc), encoding="utf-8")
+
+    result = runner.run_pipeline("XOM refining", top_k=1, retrieval_mode="lexical")
+
+    assert result["retrieval_mode"] == "lexical"
+    assert [doc["id"] for doc in result["selected_docs"]] == ["a"]
+    assert (tmp_path / "data" / "state" / "index" / "lexical.json").exists()
+    get_settings.cache_clear()
+
+
+def test_malformed_index_rows_are_rebuilt(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "mock")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("LOG_DIR", str(tmp_path / "logs"))
+    get_settings.cache_clear()
+
+    news_dir = tmp_path / "data" / "state" / "news"
+    news_dir.mkdir(parents=True)
+    for doc in DOCS:
+        (news_dir / f"{doc['id']}.json").write_text(json.dumps(doc), encoding="utf-8")
+    index_path = tmp_path / "data" / "state" / "index" / "lexical.json"
+    index_path.parent.mkdir(parents=True)
+    rows = {"a": ["h"], "b": ["h", {"nvda": "many"}], "c": None, "gone": ["h", {"old": 1}]}
+    index_path.write_text(json.dumps({"version": 1, "docs": rows}), encoding="utf-8")
+
+    loaded = LexicalIndex(index_path)
+    assert sorted(loaded.doc_terms) == ["gone"]
+
+    result = runner.run_pipeline("XOM refining", top_k=1, retrieval_mode="lexical")
+    assert [doc["id"] for doc in result["selected_docs"]] == ["a"]
+    assert sorted(json.loads(index_path.read_text())["docs"]) == ["a", "b", "c"]
+    get_settings.cache_clear()
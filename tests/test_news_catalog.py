@@ -0,0 +1,61 @@
+import json
+import os
+
+from thelighttrading.config.settings import get_settings
+from thelighttrading.pipeline.embedding_store import EmbeddingStore
+from thelighttrading.pipeline.news_catalog import NewsCatalog
+from thelighttrading.pipeline.runner import run_pipeline
+
+
+def _write_news(path, doc_id, title):
+    path.write_text(json.dumps({"id": doc_id, "title": title, "content": f"{title} body"}), encoding="utf-8")
+
+
+def test_catalog_reparses_only_changed_files(tmp_path):
+    news_dir = tmp_path / "news"
+    news_dir.mkdir()
+    _write_news(news_dir / "a.json", "a", "Alpha")
+    _write_news(news_dir / "b.json", "b", "Beta")
+    catalog_path = tmp_path / "news_catalog.json"
+
+    catalog = NewsCatalog(catalog_path)
+    first = catalog.refresh(news_dir)
+    catalog.flush()
+    assert first.reparsed == 2
+    assert [doc["id"] for doc in first.docs] == ["a", "b"]
+
+    second = NewsCatalog(catalog_path).refresh(news_dir)
+    assert second.reparsed == 0
+    assert second.docs == first.docs
+
+    _write_news(news_dir / "a.json", "a", "Alpha updated")
+    stat = (news_dir / "a.json").stat()
+    os.utime(news_dir / "a.json", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    (news_dir / "b.json").unlink()
+    third = NewsCatalog(catalog_path).refresh(news_dir)
+    assert third.reparsed == 1
+    assert third.evicted_ids == ["b"]
+    assert [doc["title"] for doc in third.docs] == ["Alpha updated"]
+
+
+def test_pipeline_evicts_deleted_news_from_index(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "mock")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("LOG_DIR", str(tmp_path / "logs"))
+    get_settings.cache_clear()
+
+    first = run_pipeline("market", top_k=5)
+    assert first["catalog"]["reparsed"] == first["catalog"]["files"] > 0
+    second = run_pipeline("market", top_k=5)
+    assert second["catalog"]["reparsed"] == 0
+
+    state_dir = tmp_path / "data" / "state"
+    victim = sorted((state_dir / "news").glob("*.json"))[0]
+    victim_id = json.loads(victim.read_text(encoding="utf-8")).get("id") or victim.stem
+    victim.unlink()
+    third = run_pipeline("market", top_k=5)
+
+    assert third["catalog"]["evicted"] == 1
+    assert victim_id not in EmbeddingStore(state_dir / "index").ids
+    assert victim_id not in [doc["id"] for doc in third["selected_docs"]]
+    get_settings.cache_clear()
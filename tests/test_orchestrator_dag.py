@@ -0,0 +1,285 @@
+import time
+
+import pytest
+
+from thelighttrading.config.settings import get_settings
+from thelighttrading.memory.node_memory import fetch_last_n, fetch_latest, recall_result, store_result
+from thelighttrading.nodes.base import NodeResult
+from thelighttrading.nodes.graph import GraphSpec, NodeSpec, compile_graph, default_graph_spec
+from thelighttrading.nodes.orchestrator import Orchestrator
+from thelighttrading.nodes.registry import NodeRegistry
+
+
+class _SlowNode:
+    delay = 0.3
+    fail: set[str] = set()
+
+    def __init__(self):
+        self.id = "slow"
+        self.name = "SlowNode"
+        self.profile = "slow"
+
+    def run(self, messages):
+        ts_start = time.time()
+        time.sleep(self.delay)
+        if self.profile in self.fail:
+            raise RuntimeError(f"{self.profile} failed")
+        return NodeResult(node_id=self.profile, output={"node": self.profile}, ts_start=ts_start, ts_end=time.time())
+
+
+@pytest.fixture(autouse=True)
+def env(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "mock")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("LOG_DIR", str(tmp_path / "logs"))
+    get_settings.cache_clear()
+    NodeRegistry.register("slow", _SlowNode)
+    _SlowNode.fail = set()
+    yield
+    get_settings.cache_clear()
+
+
+def _diamond() -> GraphSpec:
+    nodes = {
+        "a": NodeSpec(id="a", node_type="slow", profile="a"),
+        "b": NodeSpec(id="b", node_type="slow", profile="b"),
+        "c": NodeSpec(id="c", node_type="slow", profile="c", inputs_from=["a", "b"]),
+    }
+    return GraphSpec(nodes=nodes, edges=[("a", "c"), ("b", "c")], version="diamond")
+
+
+def test_independent_nodes_run_concurrently():
+    started = time.perf_counter()
+    run = Orchestrator(_diamond()).run_pipeline("mock news")
+    elapsed = time.perf_counter() - started
+
+    assert [n["id"] for n in run["nodes"]] == ["a", "b", "c"]
+    assert all(n["status"] == "ok" for n in run["nodes"])
+    assert elapsed < 3 * _SlowNode.delay
+    a, b, c = run["nodes"]
+    assert c["ts_start"] >= max(a["ts_end"], b["ts_end"])
+
+
+def test_sequential_when_single_worker(monkeypatch):
+    monkeypatch.setenv("ORCHESTRATOR_MAX_WORKERS", "1")
+    get_settings.cache_clear()
+    started = time.perf_counter()
+    run = Orchestrator(_diamond()).run_pipeline("mock news")
+    assert time.perf_counter() - started >= 3 * _SlowNode.delay
+    assert [n["id"] for n in run["nodes"]] == ["a", "b", "c"]
+
+
+def test_error_skips_unstarted_nodes():
+    _SlowNode.fail = {"a"}
+    run = Orchestrator(_diamond()).run_pipeline("mock news")
+
+    statuses = {n["id"]: n["status"] for n in run["nodes"]}
+    assert statuses == {"a": "error", "b": "ok", "c": "skipped"}
+    assert run["status"] == "error"
+
+
+def test_default_graph_record_order():
+    run = Orchestrator().run_pipeline("mock news")
+    assert [n["id"] for n in run["nodes"]] == ["news", "parser", "brain", "policy", "watchdog", "packet"]
+    assert run["policy_decision"] is not None
+    assert run["status"] in {"ok", "blocked"}
+
+
+def test_plan_levels_and_validation():
+    plan = compile_graph(default_graph_spec())
+    assert plan.levels == (("news",), ("parser",), ("brain",), ("watchdog",), ("packet",))
+    assert plan.dependencies["packet"] == {"watchdog", "brain"}
+    assert plan.dependants["brain"] == ("watchdog", "packet")
+    assert compile_graph(_diamond()).levels == (("a", "b"), ("c",))
+
+    cyclic = _diamond()
+    cyclic.edges.append(("c", "a"))
+    with pytest.raises(ValueError, match="graph_cycle:a,c"):
+        Orchestrator(cyclic)
+    broken = _diamond()
+    broken.edges.append(("a", "missing"))
+    with pytest.raises(ValueError, match="invalid_graph_edge"):
+        compile_graph(broken)
+
+
+def test_disabled_nodes_are_pruned():
+    spec = _diamond()
+    spec.nodes["b"].enabled = False
+    plan = compile_graph(spec)
+    assert plan.pruned == {"b"}
+    assert plan.dependencies["c"] == {"a"}
+
+    run = Orchestrator(spec).run_pipeline("mock news")
+    assert [(n["id"], n["status"]) for n in run["nodes"]] == [("a", "ok"), ("b", "skipped"), ("c", "ok")]
+
+
+def test_prompts_follow_inputs_from():
+    spec = _diamond()
+    spec.nodes["c"].system_prompt = "Combine"
+    plan = compile_graph(spec)
+    messages = plan.prompts["c"]({"a": {"x": 1}, "b": {"y": 2}}, ["h"])
+    assert messages == [
+        {"role": "system", "content": "Combine"},
+        {"role": "user", "content": '{"a": {"x": 1}, "b": {"y": 2}}'},
+    ]
+    assert plan.prompts["a"]({}, ["h1", "h2"]) == [{"role": "user", "content": "h1\nh2"}]
+
+
+def test_unchanged_inputs_reuse_node_outputs(monkeypatch):
+    from thelighttrading.llm_router import router
+
+    calls = []
+    original = router.mock_generate
+
+    def counting(profile, messages, temperature, max_tokens):
+        calls.append(profile)
+        return original(profile, messages, temperature, max_tokens)
+
+    monkeypatch.setattr(router, "mock_generate", counting)
+    orch = Orchestrator()
+
+    first = orch.run_pipeline(["Oil rallies"])
+    assert len(calls) == 4
+    second = orch.run_pipeline(["Oil rallies"])
+    statuses = {n["id"]: n["status"] for n in second["nodes"]}
+    assert statuses == {"news": "cached", "parser": "cached", "brain": "cached", "policy": "ok", "watchdog": "cached", "packet": "ok"}
+    assert len(calls) == 4
+    assert second["packet"]["intents"] == first["packet"]["intents"]
+    assert fetch_latest("parser") == second["nodes"][1]["output"]
+    assert len(fetch_last_n("parser", 10)) == 2
+
+    # New headlines rerun the news node; its output is unchanged, so the rest stays cached.
+    third = orch.run_pipeline(["Oil slides"])
+    assert calls[4:] == ["news_llama"]
+    assert [n["status"] for n in third["nodes"]][:3] == ["ok", "cached", "cached"]
+
+    monkeypatch.setenv("ORCHESTRATOR_MEMOIZE", "false")
+    get_settings.cache_clear()
+    orch.run_pipeline(["Oil rallies"])
+    assert len(calls) == 9
+
+
+def test_memoized_outputs_are_pruned_on_write():
+    for i in range(4):
+        store_result("a", f"a{i}", {"i": i}, ts=100.0 + i, max_entries=2)
+    store_result("b", "b0", {"i": 0}, ts=100.0, max_entries=2)
+    assert [recall_result(f"a{i}") for i in range(4)] == [None, None, {"i": 2}, {"i": 3}]
+    assert recall_result("b0") == {"i": 0}
+
+    store_result("b", "b1", {"i": 1}, ts=time.time(), ttl_s=60)
+    assert recall_result("b0") is None and recall_result("a3") is None
+    assert recall_result("b1") == {"i": 1}
+
+
+def test_node_timeout_skips_dependants(monkeypatch):
+    monkeypatch.setenv("ORCHESTRATOR_MEMOIZE", "false")
+    get_settings.cache_clear()
+    spec = _diamond()
+    spec.nodes["a"].timeout_s = 0.05
+    started = time.perf_counter()
+    run = Orchestrator(spec).run_pipeline("mock news")
+
+    assert time.perf_counter() - started < 3 * _SlowNode.delay
+    statuses = {n["id"]: n["status"] for n in run["nodes"]}
+    assert statuses == {"a": "timeout", "b": "ok", "c": "skipped"}
+    assert run["status"] == "timeout"
+
+    run = Orchestrator(_diamond()).run_pipeline("mock news", deadline_s=0.05)
+    assert [n["status"] for n in run["nodes"]] == ["timeout", "timeout", "skipped"]
+
+
+def test_deadline_reaches_the_http_call(monkeypatch):
+    import requests
+
+    from thelighttrading.llm_router import router
+    from thelighttrading.llm_router.health import health_monitor
+    from thelighttrading.llm_router.llama_http_client import get_base_url
+
+    monkeypatch.setenv("LLM_MODE", "local")
+    monkeypatch.setenv("LLM_PORT", "9993")
+    monkeypatch.setenv("LLM_HEALTH_REFRESH_S", "0")
+    get_settings.cache_clear()
+    health_monitor.reset()
+    budgets = {}
+
+    def completion(messages, timeout_s=None, **_kwargs):
+        system = messages[0]["content"]
+        budgets[system] = timeout_s
+        if system == "Strategize":
+            time.sleep(timeout_s)
+            raise requests.ReadTimeout("read timed out")
+        return "{}"
+
+    monkeypatch.setattr(router, "post_completion", completion)
+    spec = default_graph_spec()
+    spec.nodes["brain"].timeout_s = 0.2
+    run = Orchestrator(spec).run_pipeline("mock news", deadline_s=5)
+
+    statuses = {n["id"]: n["status"] for n in run["nodes"]}
+    assert statuses == {
+        "news": "ok",
+        "parser": "ok",
+        "brain": "timeout",
+        "policy": "skipped",
+        "watchdog": "skipped",
+        "packet": "skipped",
+    }
+    assert 4 < budgets["Summarize headlines"] <= 5
+    assert budgets["Strategize"] <= 0.2
+    assert health_monitor.breaker(get_base_url()).state == "closed"
+    health_monitor.reset()
+
+
+def test_batch_pipelines_stages_across_runs(monkeypatch):
+    monkeypatch.setenv("ORCHESTRATOR_MEMOIZE", "false")
+    get_settings.cache_clear()
+    monkeypatch.setattr(_SlowNode, "delay", 0.1)
+    nodes = {
+        "a": NodeSpec(id="a", node_type="slow", profile="a"),
+        "b": NodeSpec(id="b", node_type="slow", profile="b", inputs_from=["a"]),
+        "c": NodeSpec(id="c", node_type="slow", profile="c", inputs_from=["b"]),
+    }
+    spec = GraphSpec(nodes=nodes, edges=[("a", "b"), ("b", "c")], version="chain")
+
+    batch = Orchestrator(spec).run_batch([[f"headline {i}"] for i in range(4)])
+
+    runs = batch["runs"]
+    assert [run["nodes"][0]["output"] for run in runs] == [{"node": "a"}] * 4
+    for profile in ("a", "b", "c"):
+        spans = sorted((n["ts_start"], n["ts_end"]) for run in runs for n in run["nodes"] if n["id"] == profile)
+        assert all(end <= nxt_start + 0.01 for (_, end), (nxt_start, _) in zip(spans, spans[1:]))
+    summary = batch["summary"]
+    assert summary["runs"] == 4 and summary["statuses"] == {"ok": 4}
+    assert summary["wall_s"] < 12 * 0.1
+    assert summary["speedup"] > 1.5
+
+
+def test_batch_endpoint():
+    from fastapi import HTTPException
+
+    from thelighttrading.api import routes
+
+    result = routes.run_pipeline_batch({"headline_sets": [["Oil rallies"], ["Gold slips"]]})
+    assert [run["status"] for run in result["runs"]] == ["ok", "ok"]
+    assert result["summary"]["runs"] == 2
+    assert routes.run_pipeline_batch({"headline_sets": []})["runs"] == []
+    with pytest.raises(HTTPException) as exc:
+        routes.run_pipeline_batch({"headline_sets": "Oil rallies"})
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("deadline_s", ["soon", -1, 0, float("nan"), [5]])
+def test_bad_deadline_is_rejected(deadline_s):
+    from fastapi import HTTPException
+
+    from thelighttrading.api import routes
+
+    for route, payload in (
+        (routes.run_pipeline, {"headlines": ["Oil rallies"]}),
+        (routes.run_pipeline_batch, {"headline_sets": [["Oil rallies"]]}),
+    ):
+        with pytest.raises(HTTPException) as exc:
+            route({**payload, "deadline_s": deadline_s})
+        assert exc.value.status_code == 400
+        assert exc.value.detail == "invalid_deadline_s"
+    assert routes.run_pipeline({"headlines": ["Oil rallies"], "deadline_s": "30"})["status"] == "ok"
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from thelighttrading.config.settings import get_settings
+from thelighttrading.llm_router import router
+from thelighttrading.llm_router.constraints import json_schema_for, output_constraint, profile_constraint
+from thelighttrading.llm_router.health import health_monitor
+from thelighttrading.nodes.brain_node import BrainNode
+from thelighttrading.observability.metrics import metrics
+from thelighttrading.protocols.schemas import PipelineDecision, Strategy
+
+
+def test_schema_is_self_contained_and_strict():
+    schema = json_schema_for(Strategy)
+    text = json.dumps(schema)
+    assert "$ref" not in text and "$defs" not in text and "title" not in text
+    assert schema["required"] == ["entries", "rationale", "horizon_minutes"]
+    entry = schema["properties"]["entries"]["items"]
+    assert entry["required"] == ["ticker", "direction", "size"]
+    assert entry["additionalProperties"] is False
+
+    decision = json_schema_for(PipelineDecision)
+    assert decision["properties"]["action"]["properties"]["type"]["enum"] == ["HOLD", "SIMULATE", "EXECUTE"]
+
+
+def test_fields_named_like_keywords_survive():
+    from pydantic import BaseModel
+
+    class Headline(BaseModel):
+        title: str
+        default: bool = False
+
+    class Digest(BaseModel):
+        title: str
+        items: list[Headline]
+
+    schema = json_schema_for(Digest)
+    assert "title" not in schema
+    assert schema["required"] == ["title", "items"]
+    item = schema["properties"]["items"]["items"]
+    assert item["properties"] == {"title": {"type": "string"}, "default": {"type": "boolean"}}
+    assert item["required"] == ["title", "default"]
+
+
+def test_constraint_modes():
+    assert set(profile_constraint("watchdog_phi", "json_schema")) == {"json_schema"}
+    fmt = profile_constraint("parser_qwen", "response_format")["response_format"]
+    assert fmt["type"] == "json_schema" and fmt["json_schema"]["name"] == "Signals"
+    assert profile_constraint("parser_qwen", "off") == {}
+    assert output_constraint(None, "json_schema") == {}
+    with pytest.raises(ValueError):
+        profile_constraint("parser_qwen", "grammar-ish")
+
+
+def test_router_sends_schema_and_counts_invalid_output(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "local")
+    monkeypatch.setenv("LLM_PORT", "9992")
+    monkeypatch.setenv("LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("LLM_HEALTH_REFRESH_S", "0")
+    get_settings.cache_clear()
+    health_monitor.reset()
+
+    sent = []
+    replies = iter(["not json", json.dumps({"entries": [], "rationale": "flat", "horizon_minutes": 5})])
+
+    def completion(messages, extra=None, **_kwargs):
+        sent.append(extra)
+        return next(replies)
+
+    monkeypatch.setattr(router, "post_completion", completion)
+    before = metrics.invalid_output_stats().get("brain_mistral", {"total": 0, "invalid": 0})
+
+    node = BrainNode()
+    assert node.run([{"role": "user", "content": "a"}]).output["error"] == "invalid_strategy"
+    assert "error" not in node.run([{"role": "user", "content": "b"}]).output
+
+    assert sent[0]["json_schema"] == json_schema_for(Strategy)
+    assert sent[0]["cache_prompt"] is True
+    stats = metrics.snapshot()["llm_invalid_output"]["brain_mistral"]
+    assert stats["total"] - before["total"] == 2
+    assert stats["invalid"] - before["invalid"] == 1
+    assert 0 < stats["invalid_rate"] < 1
+
+    health_monitor.reset()
+    get_settings.cache_clear()
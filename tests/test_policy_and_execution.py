@@ -7,6 +7,7 @@ from nacl.encoding import Base64Encoder
 from thelighttrading.nodes.orchestrator import Orchestrator
 from thelighttrading.protocols.signing import verify_signature
 from thelighttrading.config.settings import get_settings
+from thelighttrading.memory.write_behind import artefact_writer
 from thelighttrading.api import routes
 
 
@@ -51,6 +52,7 @@ def test_report_signing_optional(monkeypatch, tmp_path):
 
     orch = Orchestrator()
     run = orch.run_pipeline("mock news")
+    artefact_writer.flush()
     report_path = tmp_path / "data" / "state" / "reports" / f"{run['run_id']}.json"
     data = json.loads(report_path.read_text(encoding="utf-8"))
     body = {k: v for k, v in data.items() if k not in {"signature", "public_key", "report_hash"}}
@@ -63,6 +65,7 @@ def test_report_signing_optional(monkeypatch, tmp_path):
 
     orch_no_sign = Orchestrator()
     run2 = orch_no_sign.run_pipeline("mock news")
+    artefact_writer.flush()
     report_path2 = tmp_path / "data" / "state" / "reports" / f"{run2['run_id']}.json"
     data2 = json.loads(report_path2.read_text(encoding="utf-8"))
     assert data2.get("signature") is None
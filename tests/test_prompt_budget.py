@@ -0,0 +1,108 @@
+import json
+
+from thelighttrading.config.settings import get_settings
+from thelighttrading.pipeline import runner
+from thelighttrading.pipeline.prompt_budget import (
+    TokenCounter,
+    approx_tokens,
+    assemble_context,
+    count_messages,
+    trim_to_tokens,
+)
+
+
+def _words(text: str) -> int:
+    return len(text.split())
+
+
+def test_trim_keeps_whole_sentences():
+    counter = TokenCounter(_words)
+    text = "Oil rallies on supply cuts. Refiners follow suit today. Analysts expect more upside ahead."
+    assert trim_to_tokens(text, 100, counter) == text
+    assert trim_to_tokens(text, 10, counter) == "Oil rallies on supply cuts. Refiners follow suit today."
+    assert trim_to_tokens("one two three four five six", 4, counter) == "one two three four"
+    assert trim_to_tokens(text, 0, counter) == ""
+
+
+def test_counter_falls_back_to_approx_when_server_fails():
+    calls = []
+
+    def broken(text):
+        calls.append(text)
+        raise ConnectionError("no server")
+
+    counter = TokenCounter(broken)
+    assert counter.count("abcdefg") == approx_tokens("abcdefg")
+    assert counter.count("abcdefghijk") == approx_tokens("abcdefghijk")
+    assert len(calls) == 1
+    assert counter.name == "approx"
+
+
+def test_assemble_fills_greedily_by_score_within_budget():
+    docs = [
+        {"id": "low", "content": "Low relevance filler. " * 5, "score": 0.1},
+        {"id": "high", "content": "Key earnings beat. Guidance raised sharply. " * 20, "score": 0.9},
+        {"id": "mid", "content": "Sector rotation continues.", "score": 0.5},
+    ]
+    counter = TokenCounter()
+
+    def build(snippets):
+        return [{"role": "system", "content": "schema"}, {"role": "user", "content": json.dumps(snippets)}]
+
+    base = count_messages(build([]), counter)
+    messages, snippets, stats = assemble_context(docs, build, budget_tokens=base + 90, counter=counter)
+
+    assert [s["id"] for s in snippets][:1] == ["high"]
+    assert snippets[0]["snippet"].endswith(".")
+    assert stats["prompt_tokens"] <= base + 90
+    assert stats["docs_trimmed"] >= 1
+    assert stats["docs_included"] + stats["docs_dropped"] == 3
+    assert stats["prompt_tokens"] == count_messages(messages, counter)
+
+
+def test_title_only_docs_are_kept():
+    docs = [{"id": "headline", "title": "Fed holds rates", "content": "", "score": 0.9}]
+    counter = TokenCounter()
+
+    def build(snippets):
+        return [{"role": "user", "content": json.dumps(snippets)}]
+
+    _, snippets, stats = assemble_context(docs, build, budget_tokens=1000, counter=counter)
+    assert [(s["id"], s["snippet"]) for s in snippets] == [("headline", "")]
+    assert stats["docs_dropped"] == 0
+
+    _, snippets, stats = assemble_context(docs, build, budget_tokens=5, counter=counter)
+    assert snippets == [] and stats["docs_dropped"] == 1
+
+
+def test_run_record_reports_prompt_tokens(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "local")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("RAG_CONTEXT_TOKENS", "700")
+    monkeypatch.setenv("RAG_MAX_TOKENS", "256")
+    get_settings.cache_clear()
+
+    sent = {}
+
+    def chat(messages, settings, max_tokens=512, **_kwargs):
+        sent["messages"] = messages
+        sent["max_tokens"] = max_tokens
+        return ""
+
+    monkeypatch.setattr(runner, "chat_completion", chat)
+    news_dir = tmp_path / "data" / "state" / "news"
+    news_dir.mkdir(parents=True)
+    for i in range(6):
+        doc = {"id": f"d{i}", "title": f"Oil story {i}", "content": "Crude prices climb on supply cuts. " * 30}
+        (news_dir / f"d{i}.json").write_text(json.dumps(doc), encoding="utf-8")
+
+    result = runner.run_pipeline("oil supply", top_k=6, retrieval_mode="lexical")
+
+    prompt = result["prompt"]
+    assert prompt["budget_tokens"] == 700 - 256
+    assert 0 < prompt["prompt_tokens"] <= prompt["budget_tokens"]
+    assert prompt["docs_included"] == len(result["selected_docs"]) < 6
+    assert sent["max_tokens"] == 256
+    assert count_messages(sent["messages"], TokenCounter()) == prompt["prompt_tokens"]
+    get_settings.cache_clear()
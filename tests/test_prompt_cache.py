@@ -0,0 +1,98 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from thelighttrading.config.settings import get_settings
+from thelighttrading.llm_router import http_pool, router
+from thelighttrading.llm_router.health import health_monitor
+from thelighttrading.llm_router.routing import resolve_route
+from thelighttrading.nodes.orchestrator import Orchestrator
+from thelighttrading.observability.metrics import metrics
+from thelighttrading.pipeline.runner import _build_prompt
+
+
+class _TimingsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    payloads: list[dict] = []
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        self.payloads.append(payload)
+        warm = len(self.payloads) > 1
+        body = json.dumps(
+            {
+                "choices": [{"message": {"content": "{}"}}],
+                "timings": {"prompt_n": 4 if warm else 40, "cache_n": 36 if warm else 0},
+            }
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        return
+
+
+@pytest.fixture
+def timings_server(monkeypatch, tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _TimingsHandler)
+    _TimingsHandler.payloads = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("LLM_MODE", "local")
+    monkeypatch.setenv("LLM_PORT", str(server.server_address[1]))
+    monkeypatch.setenv("LLM_SERVER_SLOTS", "2")
+    monkeypatch.setenv("LOG_DIR", str(tmp_path))
+    monkeypatch.setenv("LLM_HEALTH_REFRESH_S", "0")
+    get_settings.cache_clear()
+    health_monitor.reset()
+    http_pool.close_sessions()
+    yield _TimingsHandler.payloads
+    http_pool.close_sessions()
+    server.shutdown()
+    server.server_close()
+    health_monitor.reset()
+    get_settings.cache_clear()
+
+
+def test_slots_are_stable_per_profile(monkeypatch):
+    monkeypatch.setenv("LLM_SERVER_SLOTS", "2")
+    get_settings.cache_clear()
+    settings = get_settings()
+    slots = {profile: resolve_route(profile, settings).slot for profile in router.PROFILES}
+    assert slots == {"news_llama": 0, "parser_qwen": 1, "brain_mistral": 0, "watchdog_phi": 1}
+    assert resolve_route("parser_qwen", settings).payload_hints() == {"cache_prompt": True, "id_slot": 1}
+
+    monkeypatch.setenv("LLM_SERVER_SLOTS", "0")
+    get_settings.cache_clear()
+    assert resolve_route("parser_qwen", get_settings()).payload_hints() == {"cache_prompt": True}
+    get_settings.cache_clear()
+
+
+def test_hints_sent_and_cached_tokens_recorded(timings_server):
+    for content in ("first", "second"):
+        router.generate("watchdog_phi", [{"role": "system", "content": "Risk check"}, {"role": "user", "content": content}])
+
+    assert [p["id_slot"] for p in timings_server] == [1, 1]
+    assert all(p["cache_prompt"] is True for p in timings_server)
+    stats = metrics.snapshot()["llm_prompt_tokens"]["watchdog_phi"]
+    assert stats["evaluated"] >= 44 and stats["cached"] >= 36
+    assert 0 < stats["cache_hit_rate"] < 1
+
+
+def test_static_prompt_parts_come_first():
+    orch = Orchestrator()
+    outputs = {"news": {"summary": "a"}, "parser": {"signals": []}, "brain": {"entries": []}}
+    for node_id in ("news", "parser", "brain", "watchdog"):
+        messages = orch._build_messages(node_id, outputs, ["headline"])
+        assert [m["role"] for m in messages] == ["system", "user"]
+
+    first = _build_prompt("query one", [{"id": "a"}], "policy_v1")
+    second = _build_prompt("query two", [{"id": "b"}], "policy_v1")
+    assert first[0] == second[0]
+    assert "policy_v1" in first[0]["content"]
+    assert json.loads(first[1]["content"]) == {"documents": [{"id": "a"}], "query": "query one"}
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from thelighttrading.config.settings import get_settings
+from thelighttrading.pipeline.embedding_store import EmbeddingStore
+from thelighttrading.pipeline.retrieval import VectorIndex, benchmark_quantization, dequantize_rows, quantize_rows
+from thelighttrading.pipeline.runner import run_pipeline
+
+
+def test_quantize_roundtrip_error_is_small():
+    rng = np.random.default_rng(1)
+    matrix = rng.normal(size=(50, 32)).astype(np.float32)
+    for dtype in ("float16", "int8"):
+        data, scales = quantize_rows(matrix, dtype)
+        assert data.dtype == np.dtype(dtype)
+        np.testing.assert_allclose(dequantize_rows(data, scales), matrix, atol=0.05)
+
+
+def test_int8_index_scores_close_to_float32():
+    rng = np.random.default_rng(2)
+    matrix = rng.normal(size=(200, 64)).astype(np.float32)
+    ids = [str(i) for i in range(200)]
+    exact = VectorIndex.from_matrix(ids, matrix)
+    data, scales = quantize_rows(exact._matrix, "int8")
+    quantized = VectorIndex.from_matrix(ids, data, normalized=True, scales=scales)
+
+    want = dict(exact.search(matrix[0], 5))
+    got = dict(quantized.search(matrix[0], 5))
+    assert next(iter(got)) == "0"
+    for doc_id, score in got.items():
+        if doc_id in want:
+            assert score == pytest.approx(want[doc_id], abs=0.02)
+    assert quantized.nbytes < exact.nbytes / 3
+
+    report = benchmark_quantization(matrix, matrix[:10], top_k=5, dtype="float16")
+    assert report["recall_at_k"] >= 0.9
+    assert report["compression"] == pytest.approx(2.0)
+
+
+def test_store_converts_between_dtypes(tmp_path):
+    store = EmbeddingStore(tmp_path, model="m")
+    store.upsert("a", "h1", [3.0, 4.0])
+    store.upsert("b", "h2", [1.0, 0.0])
+    store.flush()
+
+    int8_store = EmbeddingStore(tmp_path, model="m", dtype="int8")
+    int8_store.flush()
+    assert not (tmp_path / "embeddings.f32").exists()
+    np.testing.assert_allclose(dequantize_rows(int8_store.matrix(), int8_store.scales()), [[0.6, 0.8], [1.0, 0.0]], atol=0.01)
+
+    int8_store.upsert("a", "h3", [0.0, 2.0])
+    int8_store.remove(["b"])
+    int8_store.flush()
+    reopened = EmbeddingStore(tmp_path, model="m", dtype="int8")
+    assert reopened.ids == ["a"]
+    np.testing.assert_allclose(dequantize_rows(reopened.matrix(), reopened.scales()), [[0.0, 1.0]], atol=0.01)
+
+
+def test_pipeline_with_int8_store(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "mock")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("LOG_DIR", str(tmp_path / "logs"))
+    get_settings.cache_clear()
+    baseline = run_pipeline("energy", top_k=3)
+
+    monkeypatch.setenv("RETRIEVAL_EMBEDDING_DTYPE", "int8")
+    get_settings.cache_clear()
+    quantized = run_pipeline("energy", top_k=3)
+
+    assert [d["id"] for d in quantized["selected_docs"]] == [d["id"] for d in baseline["selected_docs"]]
+    assert (tmp_path / "data" / "state" / "index" / "embeddings.i8").exists()
+    get_settings.cache_clear()
@@ -0,0 +1,81 @@
+import json
+
+from thelighttrading.config.settings import get_settings
+from thelighttrading.observability.metrics import metrics
+from thelighttrading.pipeline import query_cache, runner
+from thelighttrading.pipeline.query_cache import QueryEmbeddingCache
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(query_cache.time, "time", lambda: clock["now"])
+    cache = QueryEmbeddingCache(max_entries=2, ttl_s=60)
+    cache.put("m", "Energy  Supply Risk", [1.0])
+    cache.put("m", "tech earnings", [2.0])
+    assert cache.get("m", "energy supply risk") == [1.0]
+    cache.put("m", "rates", [3.0])
+    assert cache.get("m", "tech earnings") is None
+    assert cache.get("other", "rates") is None
+
+    clock["now"] += 61
+    assert cache.get("m", "rates") is None
+
+
+def test_persisted_cache_survives_restart(tmp_path):
+    path = tmp_path / "query_cache.json"
+    QueryEmbeddingCache(path=path).put("m", "q", [0.5, 0.5])
+    assert QueryEmbeddingCache(path=path).get("m", "q") == [0.5, 0.5]
+
+
+def test_persistence_is_debounced(tmp_path):
+    path = tmp_path / "query_cache.json"
+    cache = QueryEmbeddingCache(path=path, persist_interval_s=60)
+    cache.put("m", "first", [1.0])
+    assert [row[1] for row in json.loads(path.read_text())] == ["first"]
+
+    cache.put("m", "second", [2.0])
+    cache.put("m", "third", [3.0])
+    assert len(json.loads(path.read_text())) == 1
+
+    cache.flush()
+    assert [row[1] for row in json.loads(path.read_text())] == ["first", "second", "third"]
+    assert QueryEmbeddingCache(path=path).get("m", "third") == [3.0]
+
+
+def test_malformed_rows_are_skipped(tmp_path):
+    path = tmp_path / "query_cache.json"
+    QueryEmbeddingCache(path=path).put("m", "q", [0.5, 0.5])
+    rows = json.loads(path.read_text())
+    rows += [["m", "short"], ["m", "ts", "yesterday", [1.0]], ["m", "vec", rows[0][2], "nope"], None, 7]
+    path.write_text(json.dumps(rows))
+
+    cache = QueryEmbeddingCache(path=path)
+    assert len(cache) == 1
+    assert cache.get("m", "q") == [0.5, 0.5]
+
+
+def test_run_pipeline_reuses_query_embedding(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "local")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("QUERY_CACHE_PERSIST", "true")
+    get_settings.cache_clear()
+    calls = []
+
+    def fake_embed(texts, settings, timeout_s=30):
+        calls.append(list(texts))
+        return [[1.0, 0.0, 0.0] for _ in texts]
+
+    monkeypatch.setattr(runner, "embed_texts", fake_embed)
+    monkeypatch.setattr(runner, "embed_texts_batched", fake_embed)
+    monkeypatch.setattr(runner, "chat_completion", lambda *_args, **_kwargs: "")
+    hits, misses = metrics.query_cache_hits, metrics.query_cache_misses
+
+    runner.run_pipeline("energy supply risk", top_k=1)
+    runner.run_pipeline("Energy supply  risk", top_k=1)
+
+    assert calls.count(["energy supply risk"]) == 1
+    assert metrics.query_cache_hits == hits + 1
+    assert metrics.query_cache_misses == misses + 1
+    assert (tmp_path / "data" / "state" / "query_cache.json").exists()
+    get_settings.cache_clear()
@@ -0,0 +1,96 @@
+import json
+from pathlib import Path
+
+from thelighttrading.config.settings import get_settings
+from thelighttrading.llm_router import response_cache, router
+from thelighttrading.llm_router.health import health_monitor
+from thelighttrading.llm_router.response_cache import ResponseCache, cache_key
+
+
+def _audit_modes(log_dir: Path) -> list[str]:
+    return [json.loads(line)["mode"] for line in (log_dir / "audit.jsonl").read_text().splitlines()]
+
+
+def test_cache_key_is_canonical():
+    a = cache_key("news_llama", "m", [{"role": "user", "content": "hi"}], 0.2, 256)
+    b = cache_key("news_llama", "m", [{"content": "hi", "role": "user"}], 0.2, 256)
+    assert a == b
+    assert a != cache_key("news_llama", "m", [{"role": "user", "content": "hi"}], 0.3, 256)
+    assert a != cache_key("parser_qwen", "m", [{"role": "user", "content": "hi"}], 0.2, 256)
+    assert a != cache_key("news_llama", "other", [{"role": "user", "content": "hi"}], 0.2, 256)
+    assert a != cache_key("news_llama", "m", [{"role": "user", "content": "hi"}], 0.2, 256, stop_on_json=True)
+
+
+def test_lru_eviction_and_ttl(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: clock[0])
+    cache = ResponseCache(tmp_path / "cache.db", max_entries=2, ttl_s=60)
+
+    cache.put("a", "p", "A")
+    clock[0] += 1
+    cache.put("b", "p", "B")
+    clock[0] += 1
+    assert cache.get("a") == "A"  # refreshes a
+    clock[0] += 1
+    cache.put("c", "p", "C")
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+
+    clock[0] += 60
+    assert cache.get("c") is None
+
+
+def test_generate_hits_cache_and_bypass(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "local")
+    monkeypatch.setenv("LLM_PORT", "9995")
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "true")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("LLM_HEALTH_REFRESH_S", "0")
+    get_settings.cache_clear()
+    health_monitor.reset()
+
+    calls = []
+
+    def completion(messages, **_kwargs):
+        calls.append(messages)
+        return f"answer {len(calls)}"
+
+    monkeypatch.setattr(router, "post_completion", completion)
+    messages = [{"role": "user", "content": "headline"}]
+
+    assert router.generate("news_llama", messages) == "answer 1"
+    assert router.generate("news_llama", messages) == "answer 1"
+    assert len(calls) == 1
+    assert router.generate("news_llama", messages, use_cache=False) == "answer 2"
+    assert router.generate("news_llama", messages, max_tokens=64) == "answer 3"
+    assert (tmp_path / "data" / "cache" / "llm_responses.db").exists()
+    assert _audit_modes(tmp_path / "logs") == ["local", "cache", "local", "local"]
+
+    health_monitor.reset()
+    get_settings.cache_clear()
+
+
+def test_failures_are_not_cached(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "local")
+    monkeypatch.setenv("LLM_PORT", "9994")
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "true")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("LLM_HEALTH_REFRESH_S", "0")
+    get_settings.cache_clear()
+    health_monitor.reset()
+
+    def refused(*_args, **_kwargs):
+        raise ConnectionError("refused")
+
+    monkeypatch.setattr(router, "post_completion", refused)
+    messages = [{"role": "user", "content": "headline"}]
+    assert "unreachable" in router.generate("news_llama", messages)
+    monkeypatch.setattr(router, "post_completion", lambda *_a, **_k: "ok")
+    assert router.generate("news_llama", messages) == "ok"
+    assert _audit_modes(tmp_path / "logs") == ["local_unreachable", "local"]
+
+    health_monitor.reset()
+    get_settings.cache_clear()
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from thelighttrading.pipeline.retrieval import VectorIndex, cosine_similarity, rank_documents
+
+
+def _reference_rank(query_embedding, documents, top_k):
+    scored = []
+    for doc in documents:
+        embedding = doc.get("embedding")
+        if not embedding:
+            continue
+        scored.append({**doc, "score": cosine_similarity(query_embedding, embedding)})
+    scored.sort(key=lambda item: item.get("score", 0.0), reverse=True)
+    return scored[: max(top_k, 0)]
+
+
+def _random_docs(count: int, dims: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    docs = []
+    for idx in range(count):
+        docs.append({"id": f"doc_{idx}", "title": f"t{idx}", "embedding": [rng.uniform(-1, 1) for _ in range(dims)]})
+    docs.append({"id": "no_embedding", "title": "skip"})
+    return docs
+
+
+@pytest.mark.parametrize("top_k", [0, 1, 5, 50, 500])
+def test_rank_documents_parity_with_reference(top_k):
+    docs = _random_docs(200, 8)
+    query = [0.3, -0.1, 0.8, 0.0, -0.5, 0.2, 0.9, -0.7]
+
+    expected = _reference_rank(query, docs, top_k)
+    actual = rank_documents(query, docs, top_k=top_k)
+
+    assert [d["id"] for d in actual] == [d["id"] for d in expected]
+    for got, want in zip(actual, expected):
+        assert got["score"] == pytest.approx(want["score"], abs=1e-5)
+        assert got["title"] == want["title"]
+
+
+def test_vector_index_returns_ids_and_scores():
+    index = VectorIndex(dims=3)
+    index.add(["a", "b", "c"], [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [1.0, 1.0, 0.0]])
+
+    results = index.search([1.0, 0.0, 0.0], top_k=2)
+
+    assert [doc_id for doc_id, _ in results] == ["a", "c"]
+    assert results[0][1] == pytest.approx(1.0)
+    assert index.search([1.0, 0.0], top_k=2) == []
+
+
+def test_vector_index_ties_keep_insertion_order():
+    index = VectorIndex(dims=2)
+    index.add(["first", "second", "third"], [[1.0, 0.0], [2.0, 0.0], [0.0, 1.0]])
+
+    assert [doc_id for doc_id, _ in index.search([1.0, 0.0], top_k=1)] == ["first"]
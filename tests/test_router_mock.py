@@ -3,8 +3,9 @@ from thelighttrading.llm_router import router
 from thelighttrading.config.settings import get_settings
 
 
-def test_parser_profile_returns_json(monkeypatch):
+def test_parser_profile_returns_json(monkeypatch, tmp_path):
     monkeypatch.setenv("LLM_MODE", "mock")
+    monkeypatch.setenv("LOG_DIR", str(tmp_path / "logs"))
     get_settings.cache_clear()
     settings = get_settings()
     out = router.generate("parser_qwen", [{"role": "user", "content": "test"}])
@@ -0,0 +1,94 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from thelighttrading.config.settings import get_settings
+from thelighttrading.llm_router import router
+from thelighttrading.llm_router.health import health_monitor
+from thelighttrading.llm_router.routing import Dispatcher, Route, resolve_route
+
+ROUTES = {
+    "brain_mistral": {"backends": ["http://10.0.0.1:8082/", "http://10.0.0.2:8082"], "model": "mistral-7b"},
+    "parser_qwen": {"base_url": "http://10.0.0.3:8083", "model": "qwen-1.5b", "max_concurrency": 1},
+}
+
+
+@pytest.fixture
+def routed(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "local")
+    monkeypatch.setenv("LLM_ROUTES", json.dumps(ROUTES))
+    monkeypatch.setenv("LOG_DIR", str(tmp_path))
+    monkeypatch.setenv("LLM_HEALTH_REFRESH_S", "0")
+    get_settings.cache_clear()
+    health_monitor.reset()
+    yield get_settings()
+    health_monitor.reset()
+    get_settings.cache_clear()
+
+
+def test_resolve_route_from_settings(routed):
+    brain = resolve_route("brain_mistral", routed)
+    assert brain.backends == ("http://10.0.0.1:8082", "http://10.0.0.2:8082")
+    assert brain.model == "mistral-7b"
+    assert resolve_route("parser_qwen", routed).max_concurrency == 1
+
+    default = resolve_route("news_llama", routed)
+    assert default.backends == ("http://127.0.0.1:8081",)
+    assert default.model == "auto"
+
+    routed.llm_routes["watchdog_phi"] = {"backends": "http://not-a-list"}
+    with pytest.raises(ValueError):
+        resolve_route("watchdog_phi", routed)
+
+
+def test_least_outstanding_and_unhealthy_skip(routed):
+    dispatcher = Dispatcher()
+    route = Route("brain_mistral", ("http://10.0.0.1:8082", "http://10.0.0.2:8082"))
+
+    with dispatcher.lease(route) as first, dispatcher.lease(route) as second:
+        assert {first.base_url, second.base_url} == set(route.backends)
+        assert dispatcher.outstanding(first.base_url) == 1
+    assert dispatcher.outstanding("http://10.0.0.1:8082") == 0
+
+    down = health_monitor.breaker("http://10.0.0.1:8082")
+    for _ in range(down.failure_threshold):
+        down.record_failure("refused")
+    for _ in range(3):
+        with dispatcher.lease(route) as lease:
+            assert lease.base_url == "http://10.0.0.2:8082"
+
+    health_monitor.breaker("http://10.0.0.2:8082").record_failure("refused")
+    health_monitor.breaker("http://10.0.0.2:8082").record_failure("refused")
+    with dispatcher.lease(route) as lease:
+        assert lease.base_url is None
+
+
+def test_generate_uses_route_model_and_caps_concurrency(routed, monkeypatch):
+    active = [0]
+    peak = [0]
+    seen = []
+    lock = threading.Lock()
+
+    def completion(messages, base_url=None, model=None, **_kwargs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            seen.append((base_url, model))
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return "{}"
+
+    monkeypatch.setattr(router, "post_completion", completion)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda i: router.generate("parser_qwen", [{"role": "user", "content": f"p{i}"}]), range(4)))
+
+    assert peak[0] == 1
+    assert set(seen) == {("http://10.0.0.3:8083", "qwen-1.5b")}
+
+    seen.clear()
+    router.generate("brain_mistral", [{"role": "user", "content": "plan"}])
+    assert seen == [("http://10.0.0.1:8082", "mistral-7b")]
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from thelighttrading.config.settings import get_settings
+from thelighttrading.llm_router import router
+from thelighttrading.llm_router.health import health_monitor
+from thelighttrading.llm_router.single_flight import SingleFlight
+
+
+def test_threads_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return "done"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(flight.do, "k", work, 5)]
+        while flight.in_flight() == 0:
+            time.sleep(0.001)
+        futures += [pool.submit(flight.do, "k", work, 5) for _ in range(3)]
+        while flight.waiters("k") < 3:
+            time.sleep(0.001)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert calls == [1]
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert {value for value, _ in results} == {"done"}
+    assert flight.in_flight() == 0 and flight.waiters("k") == 0
+
+
+def test_errors_propagate_and_waiters_time_out():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def boom():
+        release.wait(5)
+        raise RuntimeError("backend failed")
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        leader = pool.submit(flight.do, "k", boom)
+        while flight.in_flight() == 0:
+            time.sleep(0.001)
+        impatient = pool.submit(flight.do, "k", boom, 0.01)
+        with pytest.raises(TimeoutError):
+            impatient.result()
+        follower = pool.submit(flight.do, "k", boom, 5)
+        while flight.waiters("k") < 1:
+            time.sleep(0.001)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError):
+                future.result()
+
+
+def test_asyncio_and_thread_callers_coalesce():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def main():
+        leader = asyncio.ensure_future(flight.ado("k", work, 5))
+        await asyncio.sleep(0)
+        thread_waiter = asyncio.get_running_loop().run_in_executor(None, flight.do, "k", lambda: -1, 5)
+        followers = [flight.ado("k", work, 5) for _ in range(3)]
+        return await asyncio.gather(leader, thread_waiter, *followers)
+
+    results = asyncio.run(main())
+    assert calls == [1]
+    assert [value for value, _ in results] == [42] * 5
+    assert [shared for _, shared in results] == [False, True, True, True, True]
+
+
+def test_cancelled_leader_fails_followers_without_cancelling_them():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(5)
+        return "never"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.ado("k", work, 5))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.ado("k", work, 5))
+        while flight.waiters("k") < 1:
+            await asyncio.sleep(0.001)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        with pytest.raises(RuntimeError, match="single_flight_leader_cancelled"):
+            await follower
+        assert flight.in_flight() == 0
+        # The key is free again, so the next caller leads a fresh call.
+        return await flight.ado("k", lambda: asyncio.sleep(0, result="fresh"), 5)
+
+    assert asyncio.run(main()) == ("fresh", False)
+
+
+def test_router_coalesces_identical_generate_calls(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "local")
+    monkeypatch.setenv("LLM_PORT", "9993")
+    monkeypatch.setenv("LOG_DIR", str(tmp_path))
+    monkeypatch.setenv("LLM_HEALTH_REFRESH_S", "0")
+    get_settings.cache_clear()
+    health_monitor.reset()
+
+    release = threading.Event()
+    calls = []
+
+    def completion(messages, **_kwargs):
+        calls.append(messages)
+        release.wait(5)
+        return "shared answer"
+
+    monkeypatch.setattr(router, "post_completion", completion)
+    messages = [{"role": "user", "content": "same prompt"}]
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(router.generate, "news_llama", messages) for _ in range(3)]
+        while not calls or router.single_flight.waiters() < 2:
+            time.sleep(0.001)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert results == ["shared answer"] * 3
+    assert len(calls) == 1
+    modes = sorted(json.loads(line)["mode"] for line in (tmp_path / "audit.jsonl").read_text().splitlines())
+    assert modes == ["coalesced", "coalesced", "local"]
+
+    health_monitor.reset()
+    get_settings.cache_clear()
+
+
+def test_leader_deadline_does_not_fail_followers(monkeypatch, tmp_path):
+    import requests
+
+    from thelighttrading.llm_router.deadline import DeadlineExceeded
+
+    monkeypatch.setenv("LLM_MODE", "local")
+    monkeypatch.setenv("LLM_PORT", "9993")
+    monkeypatch.setenv("LOG_DIR", str(tmp_path))
+    monkeypatch.setenv("LLM_HEALTH_REFRESH_S", "0")
+    get_settings.cache_clear()
+    health_monitor.reset()
+
+    budgets = []
+
+    def completion(messages, timeout_s=None, **_kwargs):
+        budgets.append(timeout_s)
+        if timeout_s is not None and timeout_s < 1:
+            time.sleep(timeout_s)
+            raise requests.ReadTimeout("read timed out")
+        return "fresh answer"
+
+    monkeypatch.setattr(router, "post_completion", completion)
+    messages = [{"role": "user", "content": "same prompt"}]
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        leader = pool.submit(router.generate, "news_llama", messages, timeout_s=0.3)
+        while not budgets:
+            time.sleep(0.001)
+        patient = pool.submit(router.generate, "news_llama", messages, timeout_s=30)
+        unbounded = pool.submit(router.generate, "news_llama", messages)
+        while router.single_flight.waiters() < 2:
+            time.sleep(0.001)
+        with pytest.raises(DeadlineExceeded):
+            leader.result()
+        assert patient.result() == "fresh answer"
+        assert unbounded.result() == "fresh answer"
+
+    # Only the leader's own call ran under its short budget; the followers re-issued theirs.
+    assert budgets[0] <= 0.3
+    assert all(budget is None or budget > 1 for budget in budgets[1:])
+
+    health_monitor.reset()
+    get_settings.cache_clear()
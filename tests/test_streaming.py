@@ -0,0 +1,130 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from thelighttrading.config.settings import get_settings
+from thelighttrading.llm_router import http_pool, router
+from thelighttrading.llm_router.health import health_monitor
+from thelighttrading.llm_router.streaming import JSONCompletenessDetector, collect_text
+from thelighttrading.nodes.brain_node import BrainNode
+from thelighttrading.observability.metrics import metrics
+
+STRATEGY = '{"entries": [], "rationale": "brace } in \\"text\\"", "horizon_minutes": 5}'
+
+
+def test_detector_handles_split_deltas_and_strings():
+    detector = JSONCompletenessDetector()
+    chunks = ["Sure: ", STRATEGY[:10], STRATEGY[10:40], STRATEGY[40:], " trailing chatter {"]
+    done = [detector.feed(chunk) for chunk in chunks]
+    assert done == [False, False, False, True, True]
+    assert json.loads(detector.text[detector.text.index("{") :])["horizon_minutes"] == 5
+
+    arrays = JSONCompletenessDetector()
+    assert not arrays.feed('[1, [2, "]"')
+    assert arrays.feed("]]")
+    assert arrays.text == '[1, [2, "]"]]'
+
+
+def test_collect_text_stops_reading_after_json():
+    consumed = []
+
+    def deltas():
+        for chunk in ['{"a": ', "1}", "never", "read"]:
+            consumed.append(chunk)
+            yield chunk
+
+    assert collect_text(deltas(), stop_on_json=True) == '{"a": 1}'
+    assert consumed == ['{"a": ', "1}"]
+    assert collect_text(iter(["x", "y"])) == "xy"
+
+
+class _SSEHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    tail_events = 200
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        assert payload["stream"] is True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        pieces = [STRATEGY[i : i + 7] for i in range(0, len(STRATEGY), 7)] + [" more"] * self.tail_events
+        try:
+            for piece in pieces:
+                event = {"choices": [{"delta": {"content": piece}}]}
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def log_message(self, *_args):
+        return
+
+
+@pytest.fixture
+def sse_server(monkeypatch, tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SSEHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("LLM_MODE", "local")
+    monkeypatch.setenv("LLM_STREAM", "true")
+    monkeypatch.setenv("LLM_PORT", str(server.server_address[1]))
+    monkeypatch.setenv("LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("LLM_HEALTH_REFRESH_S", "0")
+    get_settings.cache_clear()
+    health_monitor.reset()
+    http_pool.close_sessions()
+    yield tmp_path
+    http_pool.close_sessions()
+    server.shutdown()
+    server.server_close()
+    health_monitor.reset()
+    get_settings.cache_clear()
+
+
+def test_stream_generate_yields_deltas(sse_server):
+    _SSEHandler.tail_events = 0
+    try:
+        deltas = list(router.stream_generate("brain_mistral", [{"role": "user", "content": "plan"}]))
+    finally:
+        _SSEHandler.tail_events = 200
+    assert len(deltas) > 1
+    assert "".join(deltas) == STRATEGY
+    record = json.loads((sse_server / "logs" / "audit.jsonl").read_text().splitlines()[-1])
+    assert record["mode"] == "local"
+
+
+def test_node_stops_on_complete_json_and_records_ttft(sse_server):
+    streams_before = metrics.llm_stream_stats().get("brain_mistral", {}).get("streams", 0)
+
+    result = BrainNode().run([{"role": "user", "content": "plan"}])
+
+    assert result.output["horizon_minutes"] == 5
+    assert "error" not in result.output
+    stats = metrics.snapshot()["llm_streams"]["brain_mistral"]
+    assert stats["streams"] == streams_before + 1
+    assert stats["ttft_ms_last"] >= 0
+    assert stats["tokens_per_s"] >= 0
+    audit = (Path(sse_server) / "logs" / "audit.jsonl").read_text()
+    assert " more" not in json.loads(audit.splitlines()[-1])["response"]
+
+
+def test_truncated_replies_are_cached_apart_from_full_ones(sse_server, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "true")
+    get_settings.cache_clear()
+    messages = [{"role": "user", "content": "plan"}]
+    _SSEHandler.tail_events = 3
+    try:
+        assert router.generate("brain_mistral", messages, stop_on_json=True) == STRATEGY
+        assert router.generate("brain_mistral", messages) == STRATEGY + " more" * 3
+        assert router.generate("brain_mistral", messages, stop_on_json=True) == STRATEGY
+    finally:
+        _SSEHandler.tail_events = 200
+    modes = [json.loads(line)["mode"] for line in (sse_server / "logs" / "audit.jsonl").read_text().splitlines()]
+    assert modes == ["local", "local", "cache"]
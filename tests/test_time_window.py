@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from thelighttrading.config.settings import get_settings
+from thelighttrading.pipeline.news_catalog import parse_timestamp
+from thelighttrading.pipeline.retrieval import TimeIndex, rank_documents
+from thelighttrading.pipeline.runner import run_pipeline
+
+DOCS = [
+    {"id": "old", "embedding": [1.0, 0.0], "created_ts": 100.0, "title": "crude"},
+    {"id": "mid", "embedding": [0.9, 0.1], "created_ts": 200.0, "title": "crude"},
+    {"id": "new", "embedding": [0.5, 0.5], "created_ts": 300.0, "title": "crude"},
+    {"id": "undated", "embedding": [1.0, 0.0], "created_ts": None, "title": "crude"},
+]
+
+
+def test_time_index_window_bisects():
+    index = TimeIndex.from_documents(DOCS)
+    assert list(index.window(150, 300)) == [1, 2]
+    assert list(index.window(None, 100)) == [0]
+    assert list(index.window(301, None)) == []
+    assert list(index.window()) == [0, 1, 2]
+    assert index.window_ids(150, 300) == ["mid", "new"]
+
+
+def test_rank_documents_uses_prebuilt_time_index(monkeypatch):
+    index = TimeIndex.from_documents(DOCS)
+    monkeypatch.setattr(TimeIndex, "from_documents", classmethod(lambda cls, docs: pytest.fail("rebuilt")))
+    ranked = rank_documents([1.0, 0.0], DOCS, top_k=5, since=150, time_index=index)
+    assert [doc["id"] for doc in ranked] == ["mid", "new"]
+
+
+def test_rank_documents_restricts_to_window():
+    ranked = rank_documents([1.0, 0.0], DOCS, top_k=5, since=150)
+    assert [doc["id"] for doc in ranked] == ["mid", "new"]
+
+    lexical = rank_documents(None, DOCS, top_k=5, mode="lexical", query_text="crude", until=200)
+    assert {doc["id"] for doc in lexical} == {"old", "mid"}
+
+
+def test_recency_decay_prefers_fresh_docs():
+    ranked = rank_documents([1.0, 0.0], DOCS[:3], top_k=3, recency_half_life_s=50, now=300)
+    assert ranked[0]["id"] == "new"
+    assert ranked[0]["score"] == pytest.approx(0.7071, abs=1e-3)
+
+
+def test_parse_timestamp_formats():
+    assert parse_timestamp("1970-01-01T00:01:40Z") == 100.0
+    assert parse_timestamp("100") == 100.0
+    assert parse_timestamp("yesterday") is None
+
+
+def test_run_pipeline_max_age_excludes_stale_news(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "mock")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("LOG_DIR", str(tmp_path / "logs"))
+    get_settings.cache_clear()
+
+    windowed = run_pipeline("energy", top_k=3, since="2024-01-16T00:00:00Z", until="2024-01-17T00:00:00Z")
+    assert [doc["id"] for doc in windowed["selected_docs"]] == ["tech_earnings"]
+
+    recent = run_pipeline("energy", top_k=3, max_age_s=3600)
+    assert recent["selected_docs"] == []
+    assert recent["time_window"]["since"] is not None
+
+    with pytest.raises(ValueError):
+        run_pipeline("energy", since="not-a-date")
+    with pytest.raises(ValueError):
+        run_pipeline("energy", recency_half_life_s="soon")
+    assert run_pipeline("energy", recency_half_life_s="3600")["time_window"]["recency_half_life_s"] == 3600.0
+    get_settings.cache_clear()
+
+
+def test_run_pipeline_reuses_time_index_until_catalog_changes(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "mock")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("LOG_DIR", str(tmp_path / "logs"))
+    get_settings.cache_clear()
+    builds = []
+    original = TimeIndex.from_documents.__func__
+    monkeypatch.setattr(TimeIndex, "from_documents", classmethod(lambda cls, docs: builds.append(len(docs)) or original(cls, docs)))
+
+    run_pipeline("energy", top_k=3, since="2024-01-01T00:00:00Z")
+    run_pipeline("energy", top_k=3, since="2024-01-16T00:00:00Z")
+    assert len(builds) == 1
+
+    news_dir = tmp_path / "data" / "state" / "news"
+    (news_dir / "late.json").write_text(
+        json.dumps({"id": "late", "title": "Late energy", "content": "energy", "created_at": "2024-02-01T00:00:00Z"})
+    )
+    latest = run_pipeline("energy", top_k=10, since="2024-01-31T00:00:00Z")
+    assert len(builds) == 2 and builds[1] == builds[0] + 1
+    assert [doc["id"] for doc in latest["selected_docs"]] == ["late"]
+    get_settings.cache_clear()
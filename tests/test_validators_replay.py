@@ -1,13 +1,21 @@
 import time
 import json
+
+import pytest
+
 from thelighttrading.protocols.validators import validate_replay, ValidationError
 from thelighttrading.memory.replay_state import load_state, save_state
 from thelighttrading.config.settings import get_settings
 
 
-def setup_function(_):
+@pytest.fixture(autouse=True)
+def env(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    get_settings.cache_clear()
     # reset state
     save_state({})
+    yield
+    get_settings.cache_clear()
 
 
 def test_replay_nonce_and_sequence():
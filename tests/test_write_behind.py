@@ -0,0 +1,89 @@
+import json
+import time
+
+import pytest
+
+from thelighttrading.api import routes
+from thelighttrading.config.settings import get_settings
+from thelighttrading.memory import write_behind
+from thelighttrading.memory.write_behind import WriteBehindWriter, artefact_writer, write_atomic
+from thelighttrading.nodes.orchestrator import Orchestrator
+from thelighttrading.observability.metrics import metrics
+
+
+@pytest.fixture(autouse=True)
+def env(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_MODE", "mock")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("LOG_DIR", str(tmp_path / "logs"))
+    get_settings.cache_clear()
+    yield
+    artefact_writer.flush()
+    get_settings.cache_clear()
+
+
+def test_write_atomic_last_write_wins(tmp_path):
+    target = tmp_path / "state" / "last.json"
+    written = write_atomic([(target, b"1"), (tmp_path / "other.txt", b"x"), (target, b"2")])
+    assert written == 2
+    assert target.read_bytes() == b"2"
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_writer_batches_and_flushes(tmp_path):
+    writer = WriteBehindWriter(batch_size=8, fsync=False)
+    before = metrics.artefact_write_stats()
+    writer.submit([(tmp_path / f"f{i}.json", json.dumps({"i": i})) for i in range(20)])
+    assert writer.flush(timeout_s=5)
+    assert sorted(p.name for p in tmp_path.glob("*.json")) == sorted(f"f{i}.json" for i in range(20))
+
+    stats = metrics.artefact_write_stats()
+    assert stats["files"] - before["files"] == 20
+    assert stats["batches"] - before["batches"] >= 3
+    assert stats["queue_depth"] == 0
+
+    writer.submit([(tmp_path / "late.txt", "done")])
+    writer.stop()
+    assert (tmp_path / "late.txt").read_text() == "done"
+
+
+def test_run_returns_before_artefacts_hit_disk(monkeypatch, tmp_path):
+    original = write_behind.write_atomic
+
+    def slow_write(items, fsync=True):
+        time.sleep(0.3)
+        return original(items, fsync=fsync)
+
+    monkeypatch.setattr(write_behind, "write_atomic", slow_write)
+    orch = Orchestrator()
+
+    started = time.perf_counter()
+    run = orch.run_pipeline("mock news")
+    assert time.perf_counter() - started < 0.3
+
+    # Readers flush first, so they see the run that was just queued.
+    assert routes.status()["last_run_id"] == run["run_id"]
+    state = tmp_path / "data" / "state"
+    assert json.loads((state / "runs" / f"{run['run_id']}.json").read_text())["run_id"] == run["run_id"]
+    assert json.loads((state / "last_report.json").read_text())["run_id"] == run["run_id"]
+    assert routes.get_metrics()["artefact_writes"]["write_ms_last"] >= 300
+
+
+def test_synchronous_mode(monkeypatch, tmp_path):
+    monkeypatch.setenv("ARTEFACT_WRITE_BEHIND", "false")
+    get_settings.cache_clear()
+    run = Orchestrator().run_pipeline("mock news")
+    assert (tmp_path / "data" / "state" / "last_run.txt").read_text() == run["run_id"]
+
+
+def test_health_waits_for_queued_artefacts(monkeypatch, tmp_path):
+    original = write_behind.write_atomic
+
+    def slow_write(items, fsync=True):
+        time.sleep(0.2)
+        return original(items, fsync=fsync)
+
+    monkeypatch.setattr(write_behind, "write_atomic", slow_write)
+    artefact_writer.submit([(tmp_path / "queued.json", "{}")])
+    routes.health()
+    assert (tmp_path / "queued.json").exists()